@@ -0,0 +1,42 @@
+import argparse
+import json
+import sys
+from benchmarks.suite import SCALES, compare, load_results, run_suite
+
+def main(argv=None) -> int:
+  parser = argparse.ArgumentParser(prog="python -m benchmarks", description="Time the core hot paths and check for regressions.")
+  parser.add_argument("--scales", default="small,medium", help=f"comma-separated subset of {','.join(SCALES)}")
+  parser.add_argument("--repeat", type=int, default=5)
+  parser.add_argument("--min-time", type=float, default=0.05, help="minimum seconds per timed repeat")
+  parser.add_argument("--output", help="write results JSON here (default: stdout)")
+  parser.add_argument("--baseline", default="benchmarks/baseline.json")
+  parser.add_argument("--threshold", type=float, default=0.25, help="allowed slowdown vs baseline, as a fraction")
+  parser.add_argument("--update-baseline", action="store_true", help="store these results as the new baseline")
+  args = parser.parse_args(argv)
+
+  scales = [s for s in args.scales.split(",") if s]
+  unknown = set(scales) - set(SCALES)
+  if unknown:
+    parser.error(f"unknown scales: {', '.join(sorted(unknown))}")
+
+  results = run_suite(scales, args.repeat, args.min_time)
+  baseline = load_results(args.baseline)
+  results["regressions"] = compare(results, baseline, args.threshold) if baseline else []
+
+  text = json.dumps(results, indent=2)
+  if args.output:
+    with open(args.output, "w") as f:
+      f.write(text + "\n")
+  else:
+    print(text)
+  if args.update_baseline:
+    with open(args.baseline, "w") as f:
+      json.dump({"meta": results["meta"], "results": results["results"]}, f, indent=2)
+      f.write("\n")
+    return 0
+  for reg in results["regressions"]:
+    print(f"REGRESSION {reg['case']}: {reg['current']:.3e}s vs {reg['baseline']:.3e}s ({reg['ratio']:.2f}x)", file=sys.stderr)
+  return 1 if results["regressions"] else 0
+
+if __name__ == "__main__":
+  sys.exit(main())
\ No newline at end of file
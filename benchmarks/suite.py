@@ -0,0 +1,179 @@
+import asyncio
+import itertools
+import json
+import platform
+import statistics
+import tempfile
+import time
+from typing import Any, Callable, Dict, List, Optional
+import numpy as np
+from core import (AnalyticEstimator, CarbonCalculator, FactorRegistry, IntensitySeriesStore, MonteCarloEstimator,
+                  RegistryVersion, ScenarioEngine, ScoringService, SketchGroup, TimeResolvedCalculator, WhatIfSession)
+from benchmarks.synthetic import (region_names, synthetic_intensity, synthetic_registry, synthetic_portfolio,
+                                 synthetic_payloads)
+
+SCALES = {
+  "small":  {"regions": 10,   "households": 1_000,     "mc_samples": 500},
+  "medium": {"regions": 100,  "households": 100_000,   "mc_samples": 10_000},
+  "large":  {"regions": 2000, "households": 1_000_000, "mc_samples": 100_000},
+}
+ACTIONS = {
+  "solar_share": 35, "efficiency_pct": 20, "ev_switch_pct": 30,
+  "mode_shift": {"to": "bus", "pct": 15}, "grid_factor_reduction_pct": 20,
+}
+
+def time_call(fn: Callable[[], Any], repeat: int = 5, min_time: float = 0.05) -> Dict[str, float]:
+  # calibrate the loop count so one repeat takes at least min_time, then report seconds per call
+  number = 1
+  while True:
+    start = time.perf_counter()
+    for _ in range(number):
+      fn()
+    elapsed = time.perf_counter() - start
+    if elapsed >= min_time or number >= 1 << 20:
+      break
+    number *= 10 if elapsed < min_time / 10 else 2
+  runs = [elapsed / number]
+  for _ in range(repeat - 1):
+    start = time.perf_counter()
+    for _ in range(number):
+      fn()
+    runs.append((time.perf_counter() - start) / number)
+  return {"min": min(runs), "median": statistics.median(runs), "loops": number, "repeat": repeat}
+
+def scale_cases(scale: str) -> Dict[str, Callable[[], Any]]:
+  cfg = SCALES[scale]
+  registry = synthetic_registry(cfg["regions"])
+  regions = region_names(cfg["regions"]) + ["ZZ-UNKNOWN"]
+  calc = CarbonCalculator(registry)
+  mc = MonteCarloEstimator(registry, samples=cfg["mc_samples"])
+  analytic = AnalyticEstimator(registry)
+  service = ScoringService(registry, actions=ACTIONS)
+  lines = [json.dumps(p) for p in synthetic_payloads(256, regions, seed=6)]
+  scenario = ScenarioEngine(registry)
+  portfolio = synthetic_portfolio(cfg["households"], regions, seed=1)
+  payload = synthetic_payloads(1, regions, seed=2)[0]
+  items = calc.calculate(payload)["items"]
+  scenario_items = calc.calculate(scenario.apply(payload, payload["region"], ACTIONS))["items"]
+  keys = [("electricity", "grid", r) for r in np.random.default_rng(3).choice(regions, 1000)]
+  session = WhatIfSession(registry, payload, ACTIONS, samples=cfg["mc_samples"])
+  ev_levels = itertools.cycle(range(0, 100, 5))
+  store = IntensitySeriesStore(tempfile.mkdtemp(prefix="greenchain-intensity-"))
+  store.write(regions[0], 2024, synthetic_intensity(0.4))
+  timeres = TimeResolvedCalculator(registry, store, year=2024)
+  hourly = np.random.default_rng(4).gamma(2.0, 0.25, (min(cfg["households"], 1_000), 8760))
+  monthly = hourly[:, :8640].reshape(len(hourly), 12, 720).sum(axis=2)
+
+  return {
+    "registry.lookup[x1000]": lambda: [registry.lookup(*k) for k in keys],
+    "registry.lookup_many": lambda: registry.lookup_many("electricity", "grid", portfolio["region"].to_numpy()),
+    "registry.build_version": lambda: RegistryVersion.build(FactorRegistry.from_columns(registry.interned())),
+    "calculator.calculate": lambda: calc.calculate(payload),
+    "calculator.calculate_many": lambda: calc.calculate_many(portfolio),
+    "scenario.apply": lambda: scenario.apply(payload, payload["region"], ACTIONS),
+    "montecarlo.run": lambda: mc.run(items),
+    "montecarlo.run[lhs]": lambda: mc.run(items, method="lhs"),
+    "montecarlo.run[sobol]": lambda: mc.run(items, method="sobol"),
+    "montecarlo.run_paired": lambda: mc.run_paired(items, scenario_items),
+    "analytic.run": lambda: analytic.run(items),
+    "timeseries.emissions_many[hourly]": lambda: timeres.emissions_many(hourly, regions[0]),
+    "timeseries.emissions_many[monthly]": lambda: timeres.emissions_many(monthly, regions[0]),
+    "service.score_batch[256]": lambda: service.score_batch(lines),
+    "sketch.update[portfolio by region]": lambda: SketchGroup().update(
+      portfolio["region"].to_numpy(), portfolio["electricity_kWh"].to_numpy()),
+    "session.set_action": lambda: (session.set_action("ev_switch_pct", next(ev_levels)), session.result()),
+  }
+
+def flow_cases() -> Dict[str, Callable[[], Any]]:
+  # the full UI handler on the default registry; needs matplotlib, skipped when it is missing
+  try:
+    import matplotlib
+    matplotlib.use("Agg")
+    from ui import gradio_app
+  except ImportError:
+    return {}
+  args = ("Combined (manual)", "IN", 3600, 120, 0, 0, 5000, 600, 800, 1200, 0, 0, 35, 20, 30, 15, "bus", 20)
+  loop = asyncio.new_event_loop()
+
+  async def drain():
+    # the streaming handler the app serves, through to its final update
+    async for update in gradio_app.run_calculation_stream(*args):
+      last = update
+    return last
+
+  def run():
+    return loop.run_until_complete(drain())
+
+  def cold():
+    gradio_app.result_cache.clear()
+    gradio_app.chart_renderer.images.clear()
+    return run()
+
+  breakdown = gradio_app.cached_result(gradio_app.build_payload(*args[:12]))["breakdown"]
+  categories = tuple(sorted(breakdown))
+  values = [breakdown[c] for c in categories]
+  levels = itertools.cycle(range(1, 100))
+
+  return {
+    "ui.run_calculation_stream[cold]": cold,
+    "ui.run_calculation_stream[cached]": run,
+    "ui.chart[template]": lambda: gradio_app.chart_renderer.template(categories).render(
+      [v * next(levels) / 50 for v in values], values, "bench"),
+  }
+
+def analytic_accuracy(scale: str, payloads: int = 50, samples: int = 200_000) -> Dict[str, Dict[str, float]]:
+  # relative error of the closed-form estimate against a large Monte Carlo run, per statistic
+  cfg = SCALES[scale]
+  registry = synthetic_registry(cfg["regions"])
+  calc = CarbonCalculator(registry)
+  mc = MonteCarloEstimator(registry, samples=samples)
+  analytic = AnalyticEstimator(registry)
+  errors: Dict[str, List[float]] = {"mean": [], "p05": [], "p95": []}
+  for payload in synthetic_payloads(payloads, region_names(cfg["regions"]), seed=5):
+    items = calc.calculate(payload)["items"]
+    if not items:
+      continue
+    exact, approx = mc.run(items), analytic.run(items)
+    for stat in errors:
+      errors[stat].append(abs(approx[stat] - exact[stat]) / abs(exact[stat]) if exact[stat] else 0.0)
+  return {stat: {"median": statistics.median(e), "max": max(e)} for stat, e in errors.items() if e}
+
+def run_suite(scales: List[str], repeat: int = 5, min_time: float = 0.05) -> Dict[str, Any]:
+  results: Dict[str, Dict[str, float]] = {}
+  for scale in scales:
+    for name, fn in scale_cases(scale).items():
+      results[f"{scale}/{name}"] = time_call(fn, repeat, min_time)
+  for name, fn in flow_cases().items():
+    results[f"flow/{name}"] = time_call(fn, repeat, min_time)
+  accuracy = {f"{scale}/analytic_vs_montecarlo": analytic_accuracy(scale) for scale in scales}
+  return {
+    "meta": {
+      "timestamp": time.strftime("%Y-%m-%dT%H:%M:%S%z"),
+      "python": platform.python_version(),
+      "numpy": np.__version__,
+      "machine": platform.machine(),
+      "platform": platform.platform(),
+      "scales": scales,
+    },
+    "results": results,
+    "accuracy": accuracy,
+  }
+
+def compare(current: Dict[str, Any], baseline: Dict[str, Any], threshold: float = 0.25) -> List[Dict[str, Any]]:
+  # a case regresses when its median per-call time exceeds the stored baseline by more than threshold
+  regressions = []
+  for name, stats in current["results"].items():
+    ref = baseline.get("results", {}).get(name)
+    if ref is None:
+      continue
+    ratio = stats["median"] / ref["median"] if ref["median"] > 0 else float("inf")
+    if ratio > 1 + threshold:
+      regressions.append({"case": name, "baseline": ref["median"], "current": stats["median"], "ratio": ratio})
+  return regressions
+
+def load_results(path: str) -> Optional[Dict[str, Any]]:
+  try:
+    with open(path) as f:
+      return json.load(f)
+  except FileNotFoundError:
+    return None
\ No newline at end of file
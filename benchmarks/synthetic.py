@@ -0,0 +1,59 @@
+import numpy as np
+import pandas as pd
+from typing import Any, Dict, List
+from core import FactorRegistry
+
+FUELS = {"petrol": 2.31, "diesel": 2.68, "lpg": 1.51}
+TRAVEL = {"car": 0.18, "bus": 0.089, "train": 0.041, "flight_short": 0.115, "flight_long": 0.102}
+ACTIVITY_COLUMNS = ["electricity_kWh", "petrol_liters", "diesel_liters", "lpg_liters",
+          "car_km", "bus_km", "train_km", "flight_short_km", "flight_long_km", "ev_km"]
+
+def region_names(n_regions: int, subregions: int = 4) -> List[str]:
+  countries = [f"R{i:04d}" for i in range(n_regions)]
+  return countries + [f"{c}-S{j}" for c in countries for j in range(subregions)]
+
+def synthetic_factor_table(n_regions: int = 100, years: int = 3, subregions: int = 4, seed: int = 0) -> pd.DataFrame:
+  rng = np.random.default_rng(seed)
+  rows = []
+  regions = region_names(n_regions, subregions) + ["GLOBAL"]
+  for year in range(2024 - years + 1, 2025):
+    factors = rng.uniform(0.05, 0.9, len(regions))
+    for region, f in zip(regions, factors):
+      rows.append(("electricity", "grid", region, "stationary", f, "kgCO2e/kWh", "synthetic", year, f * 0.85, f * 1.15, ""))
+    for sub, f in FUELS.items():
+      rows.append(("fuel", sub, "GLOBAL", "stationary", f, "kgCO2e/liter", "synthetic", year, f * 0.97, f * 1.03, ""))
+    for sub, f in TRAVEL.items():
+      rows.append(("travel", sub, "GLOBAL", "mobile", f, "kgCO2e/km", "synthetic", year, f * 0.7, f * 1.3, ""))
+  return pd.DataFrame(rows, columns=["category", "subcategory", "region", "scope", "factor", "unit",
+                                     "source", "year", "low", "high", "notes"])
+
+def synthetic_registry(n_regions: int = 100, years: int = 3, subregions: int = 4, seed: int = 0) -> FactorRegistry:
+  return FactorRegistry(synthetic_factor_table(n_regions, years, subregions, seed))
+
+def synthetic_portfolio(n_households: int, regions: List[str], seed: int = 0) -> pd.DataFrame:
+  # one row per household; roughly a third of the activity cells are zero, as in real bills
+  rng = np.random.default_rng(seed)
+  table = pd.DataFrame({"region": rng.choice(np.asarray(regions, dtype=object), n_households)})
+  scale = {"electricity_kWh": 6000, "car_km": 12000, "flight_short_km": 3000, "flight_long_km": 8000}
+  for col in ACTIVITY_COLUMNS:
+    values = rng.gamma(2.0, scale.get(col, 800) / 2.0, n_households)
+    table[col] = np.where(rng.random(n_households) < 0.35, 0.0, values)
+  table["ev_kwh_per_km"] = rng.uniform(0.12, 0.2, n_households)
+  table["_grid_factor_override_pct"] = np.where(rng.random(n_households) < 0.2, 0.25, 0.0)
+  return table
+
+def synthetic_intensity(base: float, hours: int = 8760, seed: int = 0) -> np.ndarray:
+  # hourly grid intensity: a midday solar dip, a seasonal swing and noise around base kgCO2e/kWh
+  rng = np.random.default_rng(seed)
+  t = np.arange(hours)
+  daily = 1 - 0.3 * np.exp(-0.5 * ((t % 24 - 13) / 2.5) ** 2)
+  seasonal = 1 + 0.15 * np.cos(2 * np.pi * t / hours)
+  return np.clip(base * daily * seasonal * rng.normal(1.0, 0.05, hours), 0.0, None)
+
+def to_payload(row: Dict[str, Any]) -> Dict[str, Any]:
+  payload = {k: v for k, v in row.items() if k not in ("petrol_liters", "diesel_liters", "lpg_liters")}
+  payload["fuel"] = {k: row.get(k, 0.0) for k in ("petrol_liters", "diesel_liters", "lpg_liters")}
+  return payload
+
+def synthetic_payloads(n: int, regions: List[str], seed: int = 0) -> List[Dict[str, Any]]:
+  return [to_payload(row) for row in synthetic_portfolio(n, regions, seed).to_dict("records")]
\ No newline at end of file
@@ -1,7 +1,57 @@
-from .factor import FactorRegistry, load_default_registry
-from .unitconverter import UnitConverter
-from .inputs import ElectricityInput, FuelInput, TravelInput
-from .footprint import FootPrintEngine, CarbonCalculator
-from .scenario import ScenarioEngine
-from .montecarlo import MonteCarloEstimator
-from .benchmark import benchmark
\ No newline at end of file
+import importlib
+
+# exports resolve on first access, so importing core (e.g. for UnitConverter) does not pull in pandas
+_EXPORTS = {
+  "FactorRegistry": ".factor",
+  "load_default_registry": ".factor",
+  "UnitConverter": ".unitconverter",
+  "ElectricityInput": ".inputs",
+  "FuelInput": ".inputs",
+  "TravelInput": ".inputs",
+  "benchmark": ".benchmark",
+  "benchmark_many": ".benchmark",
+  "FootPrintEngine": ".footprint",
+  "CarbonCalculator": ".footprint",
+  "ResultItem": ".footprint",
+  "ScenarioEngine": ".scenario",
+  "KLLSketch": ".sketch",
+  "SketchGroup": ".sketch",
+  "MonteCarloEstimator": ".montecarlo",
+  "AnalyticEstimator": ".analytic",
+  "StreamingPipeline": ".ingest",
+  "ChunkResult": ".ingest",
+  "ParallelRunner": ".parallel",
+  "ScenarioSweep": ".sweep",
+  "SweepResult": ".sweep",
+  "WhatIfSession": ".session",
+  "IntensitySeriesStore": ".timeseries",
+  "TimeResolvedCalculator": ".timeseries",
+  "ScoringService": ".service",
+  "RegistryManager": ".registry",
+  "RegistryVersion": ".registry",
+  "ResultCache": ".cache",
+  "content_key": ".cache",
+  "metrics": ".instrument",
+  "instrumented": ".instrument",
+  "SlowRequestProfiler": ".instrument",
+}
+__all__ = list(_EXPORTS)
+
+# core.benchmark is both a submodule and a function. The module needs only the standard library,
+# so the function is bound eagerly: a later `import core.benchmark` finds the module already
+# loaded and leaves the package attribute alone, whatever the import order
+from .benchmark import benchmark, benchmark_many
+
+def __getattr__(name):
+  module = _EXPORTS.get(name)
+  if module is None:
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+  loaded = importlib.import_module(module, __name__)
+  # bind every export of the submodule at once
+  for export, source in _EXPORTS.items():
+    if source == module:
+      globals()[export] = getattr(loaded, export)
+  return globals()[name]
+
+def __dir__():
+  return sorted(set(globals()) | set(__all__))
\ No newline at end of file
@@ -0,0 +1,124 @@
+import math
+from typing import Dict, Any, List, Optional
+import numpy as np
+from core import FactorRegistry, MonteCarloEstimator
+from core.instrument import instrumented, count
+
+try:
+  from scipy.special import ndtr as _ndtr
+except ImportError:
+  _ndtr = None
+
+# standard normal quantiles of the reported percentiles
+_Z05 = -1.6448536269514722
+_Z95 = 1.6448536269514722
+
+# excess kurtosis of each factor distribution: the fourth cumulant is this times variance²
+EXCESS_KURTOSIS = {"triangular": -0.6, "uniform": -1.2}
+
+def _erf(x: np.ndarray) -> np.ndarray:
+  # Abramowitz & Stegun 7.1.26, absolute error below 1.5e-7
+  sign, x = np.sign(x), np.abs(x)
+  t = 1.0 / (1.0 + 0.3275911 * x)
+  poly = t * (0.254829592 + t * (-0.284496736 + t * (1.421413741 + t * (-1.453152027 + t * 1.061405429))))
+  return sign * (1.0 - poly * np.exp(-x * x))
+
+def _normal_cdf(z: np.ndarray) -> np.ndarray:
+  if _ndtr is not None:
+    return _ndtr(z)
+  return 0.5 * (1.0 + _erf(np.asarray(z, dtype=float) / math.sqrt(2.0)))
+
+class AnalyticEstimator:
+  # Same interface as MonteCarloEstimator.run. The total is a linear sum of amount x factor with
+  # independent triangular factors, so its cumulants are sums of the items' cumulants:
+  #   mean (a+b+c)/3, variance (a²+b²+c²-ab-ac-bc)/18, third (a+b-2c)(2a-b-c)(a-2b+c)/270,
+  #   fourth -3/5 variance² (excess kurtosis -3/5)
+  # and p05/p95 follow from the Cornish-Fisher expansion, clamped to the support of the total.
+  # Correlated factors or items that are not a finite amount x triangular factor fall back to
+  # sampling.
+  def __init__(self, registry: FactorRegistry, rf_uplift: float = 1.0, samples: int = 500, seed: Optional[int] = 42):
+    self.registry = registry
+    self.mc = MonteCarloEstimator(registry, rf_uplift, samples, seed)
+
+  @staticmethod
+  def cumulants(amounts: np.ndarray, low: np.ndarray, center: np.ndarray, high: np.ndarray,
+                distribution: str = "triangular") -> np.ndarray:
+    # per-item cumulants (mean, variance, third, fourth) of amount x Triangular(low, center, high);
+    # "uniform" treats each factor as Uniform(low, high) instead
+    a, b, c = low, high, center
+    if distribution == "uniform":
+      mean = (a + b) / 2
+      var = (b - a) ** 2 / 12
+      third = np.zeros_like(mean)
+    elif distribution == "triangular":
+      mean = (a + b + c) / 3
+      var = (a*a + b*b + c*c - a*b - a*c - b*c) / 18
+      third = (a + b - 2*c) * (2*a - b - c) * (a - 2*b + c) / 270
+    else:
+      raise ValueError(f"Unknown factor distribution {distribution!r}, expected one of {tuple(EXCESS_KURTOSIS)}")
+    fourth = EXCESS_KURTOSIS[distribution] * var * var
+    return np.stack([amounts * mean, amounts**2 * var, amounts**3 * third, amounts**4 * fourth])
+
+  @staticmethod
+  def cornish_fisher(mean: float, var: float, third: float, fourth: float, z: float) -> float:
+    if var <= 0:
+      return mean
+    sd = math.sqrt(var)
+    g1, g2 = third / sd**3, fourth / var**2
+    w = z + (z*z - 1) * g1 / 6 + (z**3 - 3*z) * g2 / 24 - (2*z**3 - 5*z) * g1*g1 / 36
+    return mean + sd * w
+
+  @staticmethod
+  def is_linear(arrays, correlation: Optional[np.ndarray] = None) -> bool:
+    amounts, center, low, high = arrays
+    if correlation is not None and not np.allclose(correlation, np.eye(len(amounts))):
+      return False
+    return bool(np.isfinite(amounts).all() and np.isfinite(center).all()
+                and (low <= center).all() and (center <= high).all())
+
+  def _sample_correlated(self, arrays, correlation: np.ndarray, samples: int, seed: Optional[int]) -> np.ndarray:
+    # Gaussian copula: correlated normals mapped to uniforms, then through each triangular inverse CDF
+    amounts, center, low, high = arrays
+    rng = np.random.default_rng(self.mc.seed if seed is None else seed)
+    chol = np.linalg.cholesky(np.asarray(correlation, dtype=float))
+    u = _normal_cdf(rng.standard_normal((samples, len(amounts))) @ chol.T)
+    return self.mc._triangular(u, low, center, high) * amounts
+
+  @instrumented("analytic.run")
+  def run(self, items: List[Dict[str,Any]], samples: Optional[int] = None, seed: Optional[int] = None,
+          contributions: bool = False, correlation: Optional[np.ndarray] = None) -> Dict[str, Any]:
+    if not items:
+      result = {"mean": 0.0, "p05": 0.0, "p95": 0.0, "samples": 0, "method": "analytic"}
+      if contributions:
+        result["contributions"] = []
+      return result
+
+    arrays = self.mc._item_arrays(items)
+    if not self.is_linear(arrays, correlation):
+      count("analytic.fallback")
+      if correlation is None:
+        return {**self.mc.run(items, samples, seed, contributions), "method": "montecarlo"}
+      samples = self.mc._sample_count(samples)
+      per_item = self._sample_correlated(arrays, correlation, samples, seed)
+      result = {**self.mc.summarize(per_item.sum(axis=1)), "samples": samples, "method": "montecarlo"}
+      if contributions:
+        result["contributions"] = [{"activity": it["activity"], **self.mc.summarize(per_item[:, i])}
+                                   for i, it in enumerate(items)]
+      return result
+
+    amounts, center, low, high = arrays
+    per_item = self.cumulants(amounts, low, center, high)
+    k1, k2, k3, k4 = per_item.sum(axis=1)
+    # the expansion can step outside the support in skewed cases, e.g. below zero for Triangular(0, 0, 1)
+    floor = float(np.minimum(amounts * low, amounts * high).sum())
+    ceiling = float(np.maximum(amounts * low, amounts * high).sum())
+    p05 = min(max(self.cornish_fisher(k1, k2, k3, k4, _Z05), floor), ceiling)
+    p95 = min(max(self.cornish_fisher(k1, k2, k3, k4, _Z95), floor), ceiling)
+    result = {"mean": float(k1), "p05": float(p05), "p95": float(p95), "samples": 0, "method": "analytic"}
+    if contributions:
+      # a single item is exactly triangular, so its percentiles come from the inverse CDF
+      q = self.mc._triangular(np.array([[0.05], [0.95]]), low, center, high) * amounts
+      result["contributions"] = [{"activity": it["activity"], "mean": float(per_item[0, i]),
+                                  "p05": float(q[0, i]), "p95": float(q[1, i])}
+                                 for i, it in enumerate(items)]
+    return result
\ No newline at end of file
@@ -1,15 +1,30 @@
-AVG_PER_CAPITA_TONNES = {
-    "IN": 1.9,
-    "US": 14.0,
-    "EU": 6.5,
-    "GLOBAL": 4.7
-}
-def benchmark(per_capita_tonnes: float, region: str="GLOBAL") -> str:
-  ref = AVG_PER_CAPITA_TONNES.get(region, AVG_PER_CAPITA_TONNES["GLOBAL"])
-  if per_capita_tonnes < ref*0.6:
-    return "excellent (well below regional average)"
-  if per_capita_tonnes < ref:
-    return "good (below regional average)"
-  if per_capita_tonnes < ref*1.2:
-    return "around regional average"
-  return "above regional average—room to improve"
\ No newline at end of file
+AVG_PER_CAPITA_TONNES = {
+    "IN": 1.9,
+    "US": 14.0,
+    "EU": 6.5,
+    "GLOBAL": 4.7
+}
+BENCHMARK_LABELS = [
+    "excellent (well below regional average)",
+    "good (below regional average)",
+    "around regional average",
+    "above regional average—room to improve",
+]
+def benchmark(per_capita_tonnes: float, region: str="GLOBAL") -> str:
+  ref = AVG_PER_CAPITA_TONNES.get(region, AVG_PER_CAPITA_TONNES["GLOBAL"])
+  if per_capita_tonnes < ref*0.6:
+    return BENCHMARK_LABELS[0]
+  if per_capita_tonnes < ref:
+    return BENCHMARK_LABELS[1]
+  if per_capita_tonnes < ref*1.2:
+    return BENCHMARK_LABELS[2]
+  return BENCHMARK_LABELS[3]
+
+def benchmark_many(per_capita_tonnes, regions) -> "np.ndarray":
+  import numpy as np
+  t = np.asarray(per_capita_tonnes, dtype=float)
+  uniq, inverse = np.unique(np.asarray(regions, dtype=str), return_inverse=True)
+  refs = np.array([AVG_PER_CAPITA_TONNES.get(r, AVG_PER_CAPITA_TONNES["GLOBAL"]) for r in uniq])
+  ref = refs[inverse.reshape(t.shape)]
+  labels = np.array(BENCHMARK_LABELS, dtype=object)
+  return labels[np.select([t < ref*0.6, t < ref, t < ref*1.2], [0, 1, 2], 3)]
\ No newline at end of file
@@ -0,0 +1,113 @@
+import hashlib
+import json
+import threading
+import time
+from collections import OrderedDict
+from concurrent.futures import Future
+from types import MappingProxyType
+from typing import Any, Callable, Dict, Hashable, Optional
+import numpy as np
+
+def _canonical(value: Any) -> Any:
+  if isinstance(value, np.generic):
+    return value.item()
+  if isinstance(value, np.ndarray):
+    return value.tolist()
+  raise TypeError(f"Cannot hash value of type {type(value).__name__}")
+
+def content_key(*parts: Any) -> str:
+  blob = json.dumps(parts, sort_keys=True, separators=(",", ":"), default=_canonical)
+  return hashlib.sha256(blob.encode("utf-8")).hexdigest()
+
+def freeze(value: Any) -> Any:
+  # read-only view of a result shared through the cache: dicts become mapping proxies, lists
+  # tuples and arrays non-writeable views, so one caller cannot change what the next one sees
+  if isinstance(value, dict):
+    return MappingProxyType({k: freeze(v) for k, v in value.items()})
+  if isinstance(value, (list, tuple)):
+    return tuple(freeze(v) for v in value)
+  if isinstance(value, np.ndarray):
+    view = value.view()
+    view.flags.writeable = False
+    return view
+  return value
+
+class ResultCache:
+  # LRU with an optional TTL. Values are stored frozen (see freeze), and concurrent misses on one
+  # key share a single computation: the first caller computes, the others wait for its result.
+  def __init__(self, maxsize: int = 256, ttl: Optional[float] = 600.0):
+    self.maxsize = maxsize
+    self.ttl = ttl
+    self._data: "OrderedDict[Hashable, tuple]" = OrderedDict()
+    self._inflight: Dict[Hashable, Future] = {}
+    self._lock = threading.Lock()
+    self.hits = 0
+    self.misses = 0
+    self.evictions = 0
+
+  def get(self, key: Hashable, default: Any = None) -> Any:
+    with self._lock:
+      entry = self._data.get(key)
+      if entry is not None and self._live(entry):
+        self._data.move_to_end(key)
+        self.hits += 1
+        return entry[1]
+      if entry is not None:
+        del self._data[key]
+        self.evictions += 1
+      self.misses += 1
+      return default
+
+  def _live(self, entry: tuple) -> bool:
+    return self.ttl is None or time.monotonic() - entry[0] <= self.ttl
+
+  def set(self, key: Hashable, value: Any) -> Any:
+    value = freeze(value)
+    with self._lock:
+      self._store(key, value)
+    return value
+
+  def _store(self, key: Hashable, value: Any):
+    self._data[key] = (time.monotonic(), value)
+    self._data.move_to_end(key)
+    while len(self._data) > self.maxsize:
+      self._data.popitem(last=False)
+      self.evictions += 1
+
+  def get_or_compute(self, key: Hashable, compute: Callable[[], Any]) -> Any:
+    sentinel = object()
+    value = self.get(key, sentinel)
+    if value is not sentinel:
+      return value
+    with self._lock:
+      # another caller may have stored it between the miss and here
+      entry = self._data.get(key)
+      if entry is not None and self._live(entry):
+        return entry[1]
+      future = self._inflight.get(key)
+      owner = future is None
+      if owner:
+        future = self._inflight[key] = Future()
+    if not owner:
+      return future.result()
+    try:
+      value = freeze(compute())
+    except BaseException as exc:
+      # failures are not cached; waiting callers see the same exception
+      with self._lock:
+        del self._inflight[key]
+      future.set_exception(exc)
+      raise
+    with self._lock:
+      self._store(key, value)
+      del self._inflight[key]
+    future.set_result(value)
+    return value
+
+  def clear(self):
+    with self._lock:
+      self._data.clear()
+
+  def stats(self) -> Dict[str, int]:
+    with self._lock:
+      return {"hits": self.hits, "misses": self.misses, "evictions": self.evictions, "size": len(self._data)}
\ No newline at end of file
@@ -1,34 +1,226 @@
-import numpy as np
-import pandas as pd
-from typing import Dict, Any
-
-class FactorRegistry:
-  def __init__(self, df : pd.DataFrame):
-    self.df = df.copy()
-    self._validate()
-
-  def _validate(self):
-    required = {"category","subcategory","region","factor","unit","source","year"}
-    missing = required - set(self.df.columns)
-    if missing:
-      raise ValueError(f"Missing columns: {missing}")
-    if "low" not in self.df.columns:
-      self.df["low"] = np.nan
-    if "high" not in self.df.columns:
-      self.df["high"] = np.nan
-
-  def lookup(self, category: str, subcategory: str, region: str)->Dict[str, Any]:
-    candidates = self.df[(self.df.category == category) & (self.df.subcategory == subcategory) & (self.df.region == region)]
-    if candidates.empty and len(region)>=2:
-      country = region.split("-")[0]
-      candidates = self.df[(self.df["category"] == category) & (self.df["subcategory"] == subcategory) & (self.df["region"] == country)]
-    if candidates.empty:
-      candidates = self.df[(self.df["category"] == category) & (self.df["subcategory"] == subcategory) & (self.df["region"] == "GLOBAL")]
-    if candidates.empty:
-      raise ValueError(f"No factors found for {category}, {subcategory}, {region}")
-    row = candidates.sort_values("year", ascending=False).iloc[0]
-    return row.to_dict()
-
-def load_default_registry(csv_path: str = "data/emission_factors.csv") -> FactorRegistry:
-  df = pd.read_csv(csv_path)
-  return FactorRegistry(df)
\ No newline at end of file
+import hashlib
+import io
+import sys
+import numpy as np
+from typing import Dict, Any, List, Optional, Tuple
+from core.instrument import instrumented
+
+REQUIRED_COLUMNS = {"category","subcategory","region","factor","unit","source","year"}
+
+def _native(value: Any) -> Any:
+  return value.item() if isinstance(value, np.generic) else value
+
+def _intern(values: List[Any]) -> Tuple[np.ndarray, List[str]]:
+  # string column -> (int32 codes, table of distinct interned strings); missing values get code -1
+  table: List[str] = []
+  seen: Dict[str, int] = {}
+  codes = np.empty(len(values), dtype=np.int32)
+  for i, v in enumerate(values):
+    if not isinstance(v, str):
+      codes[i] = -1
+      continue
+    code = seen.get(v)
+    if code is None:
+      code = seen[v] = len(table)
+      table.append(sys.intern(v))
+    codes[i] = code
+  return codes, table
+
+class FactorRegistry:
+  def __init__(self, df : "pd.DataFrame"):
+    self._init_columns({name: df[name].to_numpy(copy=True) for name in df.columns})
+
+  @classmethod
+  def from_columns(cls, columns: Dict[str, Any], version: Optional[str] = None) -> "FactorRegistry":
+    # pandas-free constructor, used when opening a compiled snapshot; a column is either an
+    # array or an already interned (codes, string table) pair
+    registry = cls.__new__(cls)
+    registry._init_columns(columns, version)
+    return registry
+
+  def _init_columns(self, columns: Dict[str, Any], version: Optional[str] = None):
+    # numeric columns stay typed arrays; string columns are stored as codes into interned tables
+    self._names: List[str] = []
+    self._numeric: Dict[str, np.ndarray] = {}
+    self._codes: Dict[str, np.ndarray] = {}
+    self._strings: Dict[str, np.ndarray] = {}
+    for name, col in columns.items():
+      if isinstance(col, tuple):
+        codes, table = col
+      else:
+        col = np.asarray(col)
+        if col.dtype.kind in "biuf":
+          self._add_numeric(name, col)
+          continue
+        codes, table = _intern(col.tolist())
+      self._names.append(name)
+      self._codes[name] = np.asarray(codes)
+      self._strings[name] = np.array(list(table) + [np.nan], dtype=object)
+    self._df = None
+    self._validate()
+    self._build_index(version)
+
+  def _add_numeric(self, name: str, col: np.ndarray):
+    self._names.append(name)
+    self._numeric[name] = col
+
+  def _column(self, name: str) -> np.ndarray:
+    if name in self._numeric:
+      return self._numeric[name]
+    return self._strings[name][self._codes[name]]
+
+  @property
+  def df(self) -> "pd.DataFrame":
+    if self._df is None:
+      import pandas as pd
+      self._df = pd.DataFrame(self.columns())
+    return self._df
+
+  def __len__(self) -> int:
+    return len(self._numeric["factor"])
+
+  def columns(self) -> Dict[str, np.ndarray]:
+    return {name: self._column(name) for name in self._names}
+
+  def interned(self) -> Dict[str, Any]:
+    # columns in storage form: typed arrays, or (codes, string table) pairs
+    return {name: self._numeric[name] if name in self._numeric else (self._codes[name], self._strings[name][:-1].tolist())
+            for name in self._names}
+
+  def _validate(self):
+    missing = REQUIRED_COLUMNS - set(self._names)
+    if missing:
+      raise ValueError(f"Missing columns: {missing}")
+    if "factor" not in self._numeric:
+      raise ValueError("Column 'factor' must be numeric")
+    if "low" not in self._names:
+      self._add_numeric("low", np.full(len(self), np.nan))
+    if "high" not in self._names:
+      self._add_numeric("high", np.full(len(self), np.nan))
+
+  def _content_version(self) -> str:
+    # content hash of the factor table, so caches can key on the data they were computed from
+    digest = hashlib.sha256()
+    for name, col in self.columns().items():
+      digest.update(name.encode("utf-8") + b"\0")
+      if col.dtype.kind in "biuf":
+        digest.update(np.ascontiguousarray(col).tobytes())
+      else:
+        digest.update("\0".join(map(str, col.tolist())).encode("utf-8"))
+    return digest.hexdigest()[:16]
+
+  def _build_index(self, version: Optional[str] = None):
+    self.version = version or self._content_version()
+    self._factor = np.asarray(self._numeric["factor"], dtype=float)
+    self._low = np.asarray(self._column("low"), dtype=float)
+    self._high = np.asarray(self._column("high"), dtype=float)
+    # factor/low/high side by side, so override-adjusted rows for many items are one gather and multiply
+    self._bands = np.column_stack([self._factor, self._low, self._high])
+
+    # exact (category, subcategory, region) -> row of the latest year
+    years = self._column("year")
+    latest: Dict[Tuple[str, str, str], int] = {}
+    keys = zip(self._column("category").tolist(), self._column("subcategory").tolist(), self._column("region").tolist())
+    for pos, key in enumerate(keys):
+      best = latest.get(key)
+      if best is None or years[pos] > years[best]:
+        latest[key] = pos
+    self._exact = latest
+
+    # resolve the region -> country -> GLOBAL fallback for every known key up front
+    self._index: Dict[Tuple[str, str, str], int] = {}
+    regions = {k[2] for k in latest}
+    for category, subcategory in {(k[0], k[1]) for k in latest}:
+      for region in regions:
+        pos = self._resolve(category, subcategory, region)
+        if pos is not None:
+          self._index[(category, subcategory, region)] = pos
+
+  def _resolve(self, category: str, subcategory: str, region: str) -> Optional[int]:
+    pos = self._exact.get((category, subcategory, region))
+    if pos is None and len(region)>=2:
+      country = region.split("-")[0]
+      pos = self._exact.get((category, subcategory, country))
+    if pos is None:
+      pos = self._exact.get((category, subcategory, "GLOBAL"))
+    return pos
+
+  def _position(self, category: str, subcategory: str, region: str) -> int:
+    key = (category, subcategory, region)
+    pos = self._index.get(key)
+    if pos is None:
+      pos = self._resolve(category, subcategory, region)
+      if pos is None:
+        raise ValueError(f"No factors found for {category}, {subcategory}, {region}")
+      self._index[key] = pos
+    return pos
+
+  def value(self, factor_id: int, name: str) -> Any:
+    if name in self._numeric:
+      return _native(self._numeric[name][factor_id])
+    return self._strings[name][self._codes[name][factor_id]]
+
+  def _record(self, pos: int) -> Dict[str, Any]:
+    return {name: self.value(pos, name) for name in self._names}
+
+  @instrumented("registry.lookup")
+  def lookup(self, category: str, subcategory: str, region: str)->Dict[str, Any]:
+    return self._record(self._position(category, subcategory, region))
+
+  @instrumented("registry.lookup_id")
+  def lookup_id(self, category: str, subcategory: str, region: str) -> int:
+    return self._position(category, subcategory, region)
+
+  def factor_value(self, factor_id: int, override: float = 0.0) -> float:
+    # the factor of one ID scaled by (1 - override); band()[0] without building the row
+    factor = self._factor.item(factor_id)
+    return factor * (1 - override) if override else factor
+
+  def band(self, factor_id: int, override: float = 0.0) -> Tuple[float, float, float]:
+    # (factor, low, high) of one ID scaled by (1 - override); the same numbers as adjusted()
+    factor, low, high = self._bands[factor_id].tolist()
+    if not override:
+      return factor, low, high
+    scale = 1 - override
+    return factor * scale, low * scale, high * scale
+
+  def adjusted(self, factor_ids, overrides=0.0) -> np.ndarray:
+    # (n, 3) factor/low/high per ID, scaled by (1 - override) the same way ResultItem does
+    bands = self._bands[np.asarray(factor_ids, dtype=np.intp)]
+    overrides = np.asarray(overrides, dtype=float)
+    if not overrides.any():
+      return bands
+    return np.where(overrides[..., None] != 0, bands * (1 - overrides)[..., None], bands)
+
+  def regions(self) -> List[str]:
+    return sorted({key[2] for key in self._exact})
+
+  @instrumented("registry.lookup_many")
+  def lookup_many(self, categories, subcategories, regions) -> Tuple[np.ndarray, np.ndarray, np.ndarray]:
+    # scalars broadcast against arrays, e.g. lookup_many("electricity", "grid", regions)
+    cats, subs, regs = np.broadcast_arrays(np.asarray(categories, dtype=object),
+                                           np.asarray(subcategories, dtype=object),
+                                           np.asarray(regions, dtype=object))
+    positions = np.fromiter((self._position(c, s, r) for c, s, r in zip(cats.ravel(), subs.ravel(), regs.ravel())),
+                            dtype=np.intp, count=cats.size).reshape(cats.shape)
+    return self._factor[positions], self._low[positions], self._high[positions]
+
+def load_default_registry(csv_path: str = "data/emission_factors.csv", snapshot: bool = True) -> FactorRegistry:
+  # the compiled snapshot next to the CSV opens without pandas; it is rebuilt whenever the CSV changes
+  if snapshot:
+    from core.snapshot import snapshot_path, open_snapshot, write_snapshot, source_fingerprint
+    path = snapshot_path(csv_path)
+    registry = open_snapshot(path, source=csv_path)
+    if registry is not None:
+      return registry
+  import pandas as pd
+  # parse the same bytes that are hashed, so an edit in between cannot pair old rows with a new hash
+  with open(csv_path, "rb") as f:
+    data = f.read()
+  registry = FactorRegistry(pd.read_csv(io.BytesIO(data)))
+  if snapshot:
+    try:
+      write_snapshot(registry, path, fingerprint=source_fingerprint(csv_path, data))
+    except OSError:
+      pass
+  return registry
\ No newline at end of file
@@ -1,117 +1,252 @@
-from typing import Dict, Any, List
-import math
-import numpy as np
-import pandas as pd
-from core import FactorRegistry, ElectricityInput, FuelInput, TravelInput, UnitConverter
-
-class FootPrintEngine:
-  def __init__(self, registry: FactorRegistry, rf_uplift: float=1.0):
-    self.registry = registry
-    self.rf_uplift = rf_uplift
-
-  def electricity(self, item: ElectricityInput)->Dict[str, Any]:
-    kwh = UnitConverter.energytokwh(item.amount, item.unit)
-    meta = self.registry.lookup("electricity", "grid", item.region)
-    base = meta["factor"]*kwh
-    return {"kgCO2e": base, "meta": meta, "activity": "electricity", "inputkWh": kwh}
-
-  def fuel(self, item: FuelInput)->Dict[str, Any]:
-    meta = self.registry.lookup("fuel", item.fuel_type, "GLOBAL")
-    base = meta["factor"]*item.liters
-    return {"kgCO2e": base, "meta": meta, "activity": f"fuel_{item.fuel_type}", "inputLiters": item.liters}
-
-  def travel(self, item: TravelInput)->Dict[str, Any]:
-    km = UnitConverter.distancetokm(item.distance, item.unit)
-    subcat = item.mode
-    meta = self.registry.lookup("travel", subcat, "GLOBAL")
-    factor = meta["factor"]*(self.rf_uplift if subcat.startswith("flight") else 1.0)
-    base = factor*km*max(1, item.passengers)/item.passengers
-    return {"kgCO2e": base, "meta": meta, "activity": f"travel_{item.mode}", "inputKm": km}
-
-class CarbonCalculator:
-  def __init__(self, registry: FactorRegistry, rf_uplift: float = 1.0):
-    self.registry = registry
-    self.engine = FootPrintEngine(registry, rf_uplift)
-  def _sum_months(self, v):
-    if isinstance(v, (list, tuple, np.ndarray, pd.Series)):
-      return float(np.nansum(v))
-    return float(v or 0.0)
-
-  def _grid_factor_override(self, base_factor: float, override_pct: float) -> float:
-    return base_factor * (1 - override_pct)
-
-  def calculate(self, payload: Dict[str,Any]) -> Dict[str, Any]:
-    region = payload.get("region", "IN")
-
-    items = []
-    breakdown = {}
-
-    elec_kwh = self._sum_months(payload.get("electricity_kWh", 0.0))
-    if elec_kwh > 0:
-      meta = self.registry.lookup("electricity","grid",region)
-      override = payload.get("_grid_factor_override_pct", 0.0)
-      if override:
-        meta = meta.copy()
-        meta["factor"] = self._grid_factor_override(meta["factor"], override)
-        if not math.isnan(meta.get("low", np.nan)):
-          meta["low"] = self._grid_factor_override(meta["low"], override)
-        if not math.isnan(meta.get("high", np.nan)):
-          meta["high"] = self._grid_factor_override(meta["high"], override)
-      it = {"kgCO2e": elec_kwh * meta["factor"], "meta": meta, "activity":"electricity","input_kWh":elec_kwh}
-      breakdown["electricity"] = it["kgCO2e"]
-      items.append(it)
-
-    fuel = payload.get("fuel", {})
-    for ft in ["petrol_liters","diesel_liters","lpg_liters"]:
-      vol = self._sum_months(fuel.get(ft, 0.0))
-      if vol > 0:
-        sub = ft.split("_")[0]
-        meta = self.registry.lookup("fuel", sub, "GLOBAL")
-        it = {"kgCO2e": vol * meta["factor"], "meta": meta, "activity": f"fuel_{sub}", "input_liters": vol}
-        breakdown[f"fuel_{sub}"] = it["kgCO2e"]
-        items.append(it)
-
-    for mode in ["car","bus","train"]:
-      km = self._sum_months(payload.get(f"{mode}_km", 0.0))
-      if km > 0:
-        meta = self.registry.lookup("travel", mode, "GLOBAL")
-        it = {"kgCO2e": km * meta["factor"], "meta": meta, "activity": f"travel_{mode}", "input_km": km}
-        breakdown[f"{mode}"] = it["kgCO2e"]
-        items.append(it)
-
-    ev_km = self._sum_months(payload.get("ev_km", 0.0))
-    if ev_km > 0:
-      kwh_per_km = payload.get("ev_kwh_per_km", 0.15)
-      meta = self.registry.lookup("electricity","grid",region)
-
-      override = payload.get("_grid_factor_override_pct", 0.0)
-      if override:
-        meta = meta.copy()
-        meta["factor"] = self._grid_factor_override(meta["factor"], override)
-        if not math.isnan(meta.get("low", np.nan)):
-          meta["low"] = self._grid_factor_override(meta["low"], override)
-        if not math.isnan(meta.get("high", np.nan)):
-          meta["high"] = self._grid_factor_override(meta["high"], override)
-
-      ev_kwh = ev_km * kwh_per_km
-      it = {"kgCO2e": ev_kwh * meta["factor"], "meta": meta, "activity": "travel_ev", "input_kWh": ev_kwh}
-      breakdown["ev"] = it["kgCO2e"]
-      items.append(it)
-
-    for subcat in ["flight_short","flight_long"]:
-      km = self._sum_months(payload.get(f"{subcat}_km", 0.0))
-      if km > 0:
-        meta = self.registry.lookup("travel", subcat, "GLOBAL")
-        rf = 1.0
-        it = {"kgCO2e": km * meta["factor"] * rf, "meta": meta, "activity": f"travel_{subcat}", "input_km": km}
-        breakdown[subcat] = it["kgCO2e"]
-        items.append(it)
-
-    total = sum(breakdown.values())
-    return {"total_kgCO2e": total, "breakdown": breakdown, "items": items}
-
-  @staticmethod
-  def eco_score(annual_kg: float) -> float:
-    t = annual_kg / 1000.0
-    score = 100 - min(100, (t / 20.0) * 100.0)
-    return round(max(0.0, score), 1)
\ No newline at end of file
+from collections.abc import Mapping
+from typing import Dict, Any, List, Optional
+import numpy as np
+from core import FactorRegistry, ElectricityInput, FuelInput, TravelInput, UnitConverter, benchmark_many
+from core.instrument import instrumented, count
+
+class ResultItem(Mapping):
+  # One breakdown item; references its factor by registry ID and builds the "meta" dict only on access.
+  # It reads like the old item dict but is not one: it is read-only, and json.dumps needs to_dict()
+  # (CarbonCalculator.to_dict converts a whole result). The registry reference is shared by every item
+  # scored against it and is not copied; pickling sends the plain dict instead.
+  __slots__ = ("registry", "factor_id", "activity", "amount_key", "amount", "kgCO2e", "override")
+
+  def __init__(self, registry: FactorRegistry, factor_id: int, activity: str, amount_key: str, amount: float,
+               kgCO2e: float = 0.0, override: float = 0.0):
+    self.registry = registry
+    self.factor_id = factor_id
+    self.activity = activity
+    self.amount_key = amount_key
+    self.amount = amount
+    self.kgCO2e = kgCO2e
+    self.override = override
+
+  # factor, low and high come from the registry's precomputed band rows, scaled by the override
+  @property
+  def factor(self) -> float:
+    return self.registry.factor_value(self.factor_id, self.override)
+
+  @property
+  def low(self) -> float:
+    return self.registry.band(self.factor_id, self.override)[1]
+
+  @property
+  def high(self) -> float:
+    return self.registry.band(self.factor_id, self.override)[2]
+
+  @property
+  def meta(self) -> Dict[str, Any]:
+    meta = self.registry._record(self.factor_id)
+    if self.override:
+      meta["factor"], meta["low"], meta["high"] = self.registry.band(self.factor_id, self.override)
+    return meta
+
+  def __getitem__(self, key: str) -> Any:
+    if key == "kgCO2e":
+      return self.kgCO2e
+    if key == "meta":
+      return self.meta
+    if key == "activity":
+      return self.activity
+    if key == self.amount_key:
+      return self.amount
+    raise KeyError(key)
+
+  def __contains__(self, key: object) -> bool:
+    return key in ("kgCO2e", "meta", "activity", self.amount_key)
+
+  def __iter__(self):
+    return iter(("kgCO2e", "meta", "activity", self.amount_key))
+
+  def __len__(self) -> int:
+    return 4
+
+  def _key(self) -> tuple:
+    return (self.registry.version, self.factor_id, self.activity, self.amount_key, self.amount, self.kgCO2e,
+            self.override)
+
+  def __eq__(self, other: object) -> bool:
+    # two items scored from the same factor row are equal; comparing meta dicts would not be, since a
+    # missing low/high is NaN and NaN never equals itself
+    if isinstance(other, ResultItem):
+      return self._key() == other._key()
+    return Mapping.__eq__(self, other)
+
+  __hash__ = None
+
+  def __reduce__(self):
+    return dict, (self.to_dict(),)
+
+  def __repr__(self) -> str:
+    return f"ResultItem({self.activity!r}, kgCO2e={self.kgCO2e}, factor_id={self.factor_id})"
+
+  def to_dict(self) -> Dict[str, Any]:
+    # a plain, mutable copy with meta filled in, the shape calculate() returned before items were records
+    return dict(self)
+
+class FootPrintEngine:
+  def __init__(self, registry: FactorRegistry, rf_uplift: float=1.0):
+    self.registry = registry
+    self.rf_uplift = rf_uplift
+
+  def electricity(self, item: ElectricityInput)->Dict[str, Any]:
+    kwh = UnitConverter.energytokwh(item.amount, item.unit)
+    meta = self.registry.lookup("electricity", "grid", item.region)
+    base = meta["factor"]*kwh
+    return {"kgCO2e": base, "meta": meta, "activity": "electricity", "inputkWh": kwh}
+
+  def fuel(self, item: FuelInput)->Dict[str, Any]:
+    meta = self.registry.lookup("fuel", item.fuel_type, "GLOBAL")
+    base = meta["factor"]*item.liters
+    return {"kgCO2e": base, "meta": meta, "activity": f"fuel_{item.fuel_type}", "inputLiters": item.liters}
+
+  def travel(self, item: TravelInput)->Dict[str, Any]:
+    km = UnitConverter.distancetokm(item.distance, item.unit)
+    subcat = item.mode
+    meta = self.registry.lookup("travel", subcat, "GLOBAL")
+    factor = meta["factor"]*(self.rf_uplift if subcat.startswith("flight") else 1.0)
+    base = factor*km*max(1, item.passengers)/item.passengers
+    return {"kgCO2e": base, "meta": meta, "activity": f"travel_{item.mode}", "inputKm": km}
+
+class CarbonCalculator:
+  def __init__(self, registry: FactorRegistry, rf_uplift: float = 1.0):
+    self.registry = registry
+    self.engine = FootPrintEngine(registry, rf_uplift)
+  def _sum_months(self, v):
+    if isinstance(v, (list, tuple, np.ndarray)) or hasattr(v, "to_numpy"):
+      return float(np.nansum(v))
+    return float(v or 0.0)
+
+  def _grid_factor_override(self, base_factor: float, override_pct: float) -> float:
+    return base_factor * (1 - override_pct)
+
+  def _item(self, category: str, subcategory: str, region: str, activity: str, amount_key: str, amount: float,
+            override: float = 0.0) -> ResultItem:
+    it = ResultItem(self.registry, self.registry.lookup_id(category, subcategory, region), activity, amount_key, amount,
+                    override=override)
+    it.kgCO2e = amount * it.factor
+    return it
+
+  # breakdown keys in output order, with the payload fields each item reads
+  ITEM_DEPENDENCIES = {
+    "electricity": ("electricity_kWh", "region", "_grid_factor_override_pct"),
+    "fuel_petrol": ("fuel",),
+    "fuel_diesel": ("fuel",),
+    "fuel_lpg": ("fuel",),
+    "car": ("car_km",),
+    "bus": ("bus_km",),
+    "train": ("train_km",),
+    "ev": ("ev_km", "ev_kwh_per_km", "region", "_grid_factor_override_pct"),
+    "flight_short": ("flight_short_km",),
+    "flight_long": ("flight_long_km",),
+  }
+
+  def item(self, key: str, payload: Dict[str, Any]) -> Optional[ResultItem]:
+    # the breakdown item for one key, or None when its activity amount is zero
+    if key == "electricity":
+      kwh = self._sum_months(payload.get("electricity_kWh", 0.0))
+      if kwh > 0:
+        return self._item("electricity", "grid", payload.get("region", "IN"), "electricity", "input_kWh", kwh,
+                          payload.get("_grid_factor_override_pct", 0.0))
+      return None
+    if key == "ev":
+      ev_km = self._sum_months(payload.get("ev_km", 0.0))
+      if ev_km > 0:
+        ev_kwh = ev_km * payload.get("ev_kwh_per_km", 0.15)
+        return self._item("electricity", "grid", payload.get("region", "IN"), "travel_ev", "input_kWh", ev_kwh,
+                          payload.get("_grid_factor_override_pct", 0.0))
+      return None
+    if key.startswith("fuel_"):
+      sub = key[5:]
+      vol = self._sum_months(payload.get("fuel", {}).get(f"{sub}_liters", 0.0))
+      return self._item("fuel", sub, "GLOBAL", key, "input_liters", vol) if vol > 0 else None
+    if key not in self.ITEM_DEPENDENCIES:
+      raise KeyError(key)
+    km = self._sum_months(payload.get(f"{key}_km", 0.0))
+    return self._item("travel", key, "GLOBAL", f"travel_{key}", "input_km", km) if km > 0 else None
+
+  @instrumented("calculator.calculate")
+  def calculate(self, payload: Dict[str,Any]) -> Dict[str, Any]:
+    items = []
+    breakdown = {}
+    for key in self.ITEM_DEPENDENCIES:
+      it = self.item(key, payload)
+      if it is not None:
+        breakdown[key] = it.kgCO2e
+        items.append(it)
+
+    total = sum(breakdown.values())
+    count("calculator.items", len(items))
+    return {"total_kgCO2e": total, "breakdown": breakdown, "items": items}
+
+  @instrumented("calculator.calculate_many")
+  def calculate_many(self, table: "pd.DataFrame", household_size: float = 4) -> "pd.DataFrame":
+    import pandas as pd
+    n = len(table)
+    def column(name, default=0.0):
+      if name in table.columns:
+        return table[name].to_numpy(dtype=float)
+      return np.full(n, default)
+
+    regions = table["region"].fillna("IN").astype(str).to_numpy() if "region" in table.columns else np.full(n, "IN")
+    override = column("_grid_factor_override_pct")
+    breakdown = {}
+
+    # grid factors are resolved once per distinct region, and only where the scalar path would look them up
+    elec_kwh = column("electricity_kWh")
+    ev_km = column("ev_km")
+    ev_kwh = ev_km * column("ev_kwh_per_km", 0.15)
+    grid = np.zeros(n)
+    needs_grid = (elec_kwh > 0) | (ev_km > 0)
+    if needs_grid.any():
+      uniq, inverse = np.unique(regions[needs_grid], return_inverse=True)
+      factors, _, _ = self.registry.lookup_many("electricity", "grid", uniq)
+      grid[needs_grid] = factors[inverse]
+      grid = np.where(override != 0, self._grid_factor_override(grid, override), grid)
+
+    def scored(amount, factor):
+      return np.where(amount > 0, amount * factor, 0.0)
+
+    breakdown["electricity"] = scored(elec_kwh, grid)
+    for ft in ["petrol_liters","diesel_liters","lpg_liters"]:
+      vol = column(ft)
+      sub = ft.split("_")[0]
+      factor = self.registry.lookup("fuel", sub, "GLOBAL")["factor"] if (vol > 0).any() else 0.0
+      breakdown[f"fuel_{sub}"] = scored(vol, factor)
+    for mode in ["car","bus","train"]:
+      km = column(f"{mode}_km")
+      factor = self.registry.lookup("travel", mode, "GLOBAL")["factor"] if (km > 0).any() else 0.0
+      breakdown[mode] = scored(km, factor)
+    breakdown["ev"] = np.where(ev_km > 0, ev_kwh * grid, 0.0)
+    for subcat in ["flight_short","flight_long"]:
+      km = column(f"{subcat}_km")
+      factor = self.registry.lookup("travel", subcat, "GLOBAL")["factor"] if (km > 0).any() else 0.0
+      breakdown[subcat] = scored(km, factor)
+
+    # accumulate in the same order as calculate() so totals agree bit for bit
+    total = np.zeros(n)
+    for values in breakdown.values():
+      total = total + values
+
+    out = pd.DataFrame(breakdown, index=table.index)
+    out["total_kgCO2e"] = total
+    out["eco_score"] = self.eco_score_many(total)
+    out["benchmark"] = benchmark_many((total / 1000.0) / household_size, regions)
+    return out
+
+  @staticmethod
+  def to_dict(result: Dict[str, Any]) -> Dict[str, Any]:
+    # a calculate() result with plain dict items, for json.dumps or callers that edit items in place
+    return {**result, "breakdown": dict(result["breakdown"]), "items": [dict(it) for it in result["items"]]}
+
+  @staticmethod
+  def eco_score(annual_kg: float) -> float:
+    t = annual_kg / 1000.0
+    score = 100 - min(100, (t / 20.0) * 100.0)
+    return round(max(0.0, score), 1)
+
+  @staticmethod
+  def eco_score_many(annual_kg) -> np.ndarray:
+    t = np.asarray(annual_kg, dtype=float) / 1000.0
+    score = 100 - np.minimum(100, (t / 20.0) * 100.0)
+    return np.round(np.maximum(0.0, score), 1)
\ No newline at end of file
@@ -0,0 +1,114 @@
+import os
+from dataclasses import dataclass
+from itertools import islice
+from typing import Dict, Any, Iterable, Iterator, Optional, Union
+import numpy as np
+import pandas as pd
+from core import FactorRegistry, UnitConverter, SketchGroup
+
+CONVERTERS = {
+  "electricity": UnitConverter.energytokwh,
+  "fuel": UnitConverter.volumetoliters,
+  "travel": UnitConverter.distancetokm,
+}
+DEFAULT_UNITS = {"electricity": "kWh", "fuel": "liters", "travel": "km"}
+
+@dataclass
+class ChunkResult:
+  records: pd.DataFrame
+  aggregates: Dict[str, Dict[str, float]]
+  # per-region distribution of record emissions so far in this run; mergeable with another run's
+  sketches: Optional[SketchGroup] = None
+
+class StreamingPipeline:
+  # Aggregates belong to a run, not to the pipeline, so one pipeline can serve concurrent or
+  # repeated runs. Records without a region are scored against default_region.
+  def __init__(self, registry: FactorRegistry, chunk_size: int = 50_000, rf_uplift: float = 1.0,
+               default_region: str = "IN"):
+    self.registry = registry
+    self.chunk_size = chunk_size
+    self.rf_uplift = rf_uplift
+    self.default_region = default_region
+
+  def read_chunks(self, source: Union[str, os.PathLike, Iterable[Dict[str, Any]]], fmt: Optional[str] = None) -> Iterator[pd.DataFrame]:
+    if isinstance(source, (str, os.PathLike)) or hasattr(source, "read"):
+      if fmt is None:
+        name = str(getattr(source, "name", source))
+        fmt = "ndjson" if name.endswith((".jsonl", ".ndjson")) else "csv"
+      if fmt == "csv":
+        reader = pd.read_csv(source, chunksize=self.chunk_size)
+      elif fmt == "ndjson":
+        reader = pd.read_json(source, lines=True, chunksize=self.chunk_size)
+      else:
+        raise ValueError(f"Unknown input format: {fmt}")
+      with reader:
+        yield from reader
+      return
+    records = iter(source)
+    while True:
+      batch = list(islice(records, self.chunk_size))
+      if not batch:
+        return
+      yield pd.DataFrame.from_records(batch)
+
+  def process_chunk(self, chunk: pd.DataFrame) -> pd.DataFrame:
+    missing = {"category", "subcategory", "amount"} - set(chunk.columns)
+    if missing:
+      raise ValueError(f"Missing columns: {missing}")
+    out = chunk.copy()
+    n = len(out)
+    category = out["category"].astype(str).to_numpy()
+    subcategory = out["subcategory"].astype(str).to_numpy()
+    if "region" in out.columns:
+      region = out["region"].fillna(self.default_region).astype(str).to_numpy()
+    else:
+      region = np.full(n, self.default_region, dtype=object)
+    amount = out["amount"].to_numpy(dtype=float)
+    units = out["unit"] if "unit" in out.columns else pd.Series(None, index=out.index, dtype=object)
+
+    # UnitConverter is plain arithmetic, so each distinct (category, unit) converts as one array
+    normalized = np.empty(n)
+    for cat in np.unique(category):
+      if cat not in CONVERTERS:
+        raise ValueError(f"Unknown activity category: {cat}")
+      rows = np.flatnonzero(category == cat)
+      cat_units = units.iloc[rows].fillna(DEFAULT_UNITS[cat]).astype(str).to_numpy()
+      for u in np.unique(cat_units):
+        mask = rows[cat_units == u]
+        normalized[mask] = CONVERTERS[cat](amount[mask], u)
+
+    # fuel and travel factors are global, as in CarbonCalculator.calculate
+    factor_region = np.where(category == "electricity", region, "GLOBAL")
+    keys = pd.MultiIndex.from_arrays([category, subcategory, factor_region])
+    codes, uniq = pd.factorize(keys)
+    factors, _, _ = self.registry.lookup_many(uniq.get_level_values(0).to_numpy(dtype=object),
+                                              uniq.get_level_values(1).to_numpy(dtype=object),
+                                              uniq.get_level_values(2).to_numpy(dtype=object))
+    factor = factors[codes]
+    flight = (category == "travel") & np.char.startswith(subcategory.astype(str), "flight")
+    factor = np.where(flight, factor * self.rf_uplift, factor)
+
+    out["input_amount"] = normalized
+    out["kgCO2e"] = normalized * factor
+    out["region"] = region
+    return out
+
+  @staticmethod
+  def _update_aggregates(aggregates: Dict[str, Dict[str, float]], sketches: SketchGroup, records: pd.DataFrame):
+    grouped = records.groupby("region", sort=False)["kgCO2e"].agg(["size", "sum"])
+    for region, row in grouped.iterrows():
+      agg = aggregates.setdefault(region, {"records": 0, "kgCO2e": 0.0})
+      agg["records"] += int(row["size"])
+      agg["kgCO2e"] += float(row["sum"])
+    sketches.update(records["region"].to_numpy(), records["kgCO2e"].to_numpy(dtype=float))
+    for region, agg in aggregates.items():
+      p05, p50, p95 = sketches.sketches[region].quantiles([0.05, 0.5, 0.95])
+      agg["p05"], agg["p50"], agg["p95"] = float(p05), float(p50), float(p95)
+
+  def run(self, source: Union[str, os.PathLike, Iterable[Dict[str, Any]]], fmt: Optional[str] = None) -> Iterator[ChunkResult]:
+    aggregates: Dict[str, Dict[str, float]] = {}
+    sketches = SketchGroup()
+    for chunk in self.read_chunks(source, fmt):
+      records = self.process_chunk(chunk)
+      self._update_aggregates(aggregates, sketches, records)
+      yield ChunkResult(records, {k: dict(v) for k, v in aggregates.items()}, sketches)
\ No newline at end of file
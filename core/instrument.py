@@ -0,0 +1,271 @@
+import bisect
+import contextvars
+import functools
+import inspect
+import itertools
+import json
+import os
+import sys
+import threading
+import time
+from collections import Counter
+from contextlib import aclosing, contextmanager
+from typing import Any, Callable, Dict, Iterator, Optional, Tuple
+
+# latency histogram bucket upper bounds, in seconds
+BUCKETS = (0.0001, 0.00025, 0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+
+class _State:
+  enabled = False
+  profiler: Optional["SlowRequestProfiler"] = None
+
+_state = _State()
+
+# thread IDs the current request's profiler samples; carry() adds a worker thread while it runs a
+# piece of the request, so handlers that offload their work are profiled where the work happens
+_profiled_threads: contextvars.ContextVar[Optional[set]] = contextvars.ContextVar("profiled_threads", default=None)
+
+class Histogram:
+  def __init__(self, buckets: Tuple[float, ...] = BUCKETS):
+    self.buckets = buckets
+    self.counts = [0] * (len(buckets) + 1)
+    self.count = 0
+    self.sum = 0.0
+
+  def observe(self, value: float):
+    self.counts[bisect.bisect_left(self.buckets, value)] += 1
+    self.count += 1
+    self.sum += value
+
+  def to_dict(self) -> Dict[str, Any]:
+    cumulative, running = {}, 0
+    for bound, n in zip(self.buckets + (float("inf"),), self.counts):
+      running += n
+      cumulative["+Inf" if bound == float("inf") else repr(bound)] = running
+    return {"count": self.count, "sum": self.sum, "buckets": cumulative}
+
+class Metrics:
+  def __init__(self):
+    self._lock = threading.Lock()
+    self.histograms: Dict[str, Histogram] = {}
+    self.counters: Counter = Counter()
+
+  def observe(self, stage: str, seconds: float):
+    with self._lock:
+      hist = self.histograms.get(stage)
+      if hist is None:
+        hist = self.histograms[stage] = Histogram()
+      hist.observe(seconds)
+
+  def inc(self, name: str, n: int = 1):
+    with self._lock:
+      self.counters[name] += n
+
+  def reset(self):
+    with self._lock:
+      self.histograms.clear()
+      self.counters.clear()
+
+  def to_json(self) -> str:
+    with self._lock:
+      return json.dumps({"histograms": {k: h.to_dict() for k, h in self.histograms.items()},
+                         "counters": dict(self.counters)}, sort_keys=True)
+
+  def to_prometheus(self, prefix: str = "greenchain") -> str:
+    lines = [f"# TYPE {prefix}_stage_seconds histogram"]
+    with self._lock:
+      for stage, hist in sorted(self.histograms.items()):
+        for le, n in hist.to_dict()["buckets"].items():
+          lines.append(f'{prefix}_stage_seconds_bucket{{stage="{stage}",le="{le}"}} {n}')
+        lines.append(f'{prefix}_stage_seconds_sum{{stage="{stage}"}} {hist.sum!r}')
+        lines.append(f'{prefix}_stage_seconds_count{{stage="{stage}"}} {hist.count}')
+      lines.append(f"# TYPE {prefix}_events_total counter")
+      for name, n in sorted(self.counters.items()):
+        lines.append(f'{prefix}_events_total{{event="{name}"}} {n}')
+    return "\n".join(lines) + "\n"
+
+metrics = Metrics()
+
+def enable(flag: bool = True):
+  _state.enabled = flag
+
+def is_enabled() -> bool:
+  return _state.enabled
+
+def count(name: str, n: int = 1):
+  if _state.enabled:
+    metrics.inc(name, n)
+
+def instrumented(stage: str) -> Callable:
+  # when disabled the wrapper costs one attribute check on top of the call; an async generator is
+  # timed from its first step until it is exhausted or closed
+  def decorator(fn):
+    if inspect.isasyncgenfunction(fn):
+      @functools.wraps(fn)
+      async def stream(*args, **kwargs):
+        async with aclosing(fn(*args, **kwargs)) as gen:
+          if not _state.enabled:
+            async for item in gen:
+              yield item
+            return
+          start = time.perf_counter()
+          try:
+            async for item in gen:
+              yield item
+          finally:
+            metrics.observe(stage, time.perf_counter() - start)
+      return stream
+
+    @functools.wraps(fn)
+    def wrapper(*args, **kwargs):
+      if not _state.enabled:
+        return fn(*args, **kwargs)
+      start = time.perf_counter()
+      try:
+        return fn(*args, **kwargs)
+      finally:
+        metrics.observe(stage, time.perf_counter() - start)
+    return wrapper
+  return decorator
+
+@contextmanager
+def timed(stage: str) -> Iterator[None]:
+  if not _state.enabled:
+    yield
+    return
+  start = time.perf_counter()
+  try:
+    yield
+  finally:
+    metrics.observe(stage, time.perf_counter() - start)
+
+class SlowRequestProfiler:
+  # samples the profiled thread's stack from a helper thread and keeps the folded stacks
+  # (flamegraph.pl / speedscope format) only for requests slower than threshold
+  def __init__(self, threshold: float = 1.0, interval: float = 0.005, output_dir: str = "profiles", max_depth: int = 64):
+    self.threshold = threshold
+    self.interval = interval
+    self.output_dir = output_dir
+    self.max_depth = max_depth
+    self._seq = itertools.count()
+
+  def _stack(self, frame) -> str:
+    names = []
+    while frame is not None and len(names) < self.max_depth:
+      code = frame.f_code
+      names.append(f"{os.path.basename(code.co_filename)}:{code.co_name}")
+      frame = frame.f_back
+    return ";".join(reversed(names))
+
+  @contextmanager
+  def profile(self, name: str = "request", current_thread: bool = True) -> Iterator[None]:
+    # samples the calling thread (unless current_thread is False, e.g. an event loop that only
+    # awaits) plus any thread that joins through carry() while the block runs
+    target = threading.get_ident()
+    threads = {target} if current_thread else set()
+    token = _profiled_threads.set(threads)
+    samples: Counter = Counter()
+    stop = threading.Event()
+
+    def sample():
+      while not stop.wait(self.interval):
+        frames = sys._current_frames()
+        for ident in list(threads):
+          frame = frames.get(ident)
+          if frame is not None:
+            samples[self._stack(frame)] += 1
+
+    sampler = threading.Thread(target=sample, name=f"profiler-{name}", daemon=True)
+    start = time.perf_counter()
+    sampler.start()
+    try:
+      yield
+    finally:
+      stop.set()
+      sampler.join()
+      try:
+        _profiled_threads.reset(token)
+      except ValueError:
+        # a generator resumed in another context; that context's value is left for it to drop
+        pass
+      elapsed = time.perf_counter() - start
+      if elapsed >= self.threshold and samples:
+        self._dump(name, elapsed, samples, target)
+
+  def _dump(self, name: str, elapsed: float, samples: Counter, thread: int):
+    # pid, thread and a per-profiler sequence number keep concurrent slow requests from sharing a name
+    os.makedirs(self.output_dir, exist_ok=True)
+    path = os.path.join(self.output_dir, f"{name}-{time.strftime('%Y%m%dT%H%M%S')}-{os.getpid()}-{thread}"
+                                         f"-{next(self._seq)}-{int(elapsed * 1000)}ms.folded")
+    with open(path, "x") as f:
+      for stack, n in samples.most_common():
+        f.write(f"{stack} {n}\n")
+    count("profiler.dumps")
+
+def set_profiler(profiler: Optional[SlowRequestProfiler]):
+  _state.profiler = profiler
+
+@contextmanager
+def request_profile(name: str, current_thread: bool = True) -> Iterator[None]:
+  profiler = _state.profiler
+  if profiler is None:
+    yield
+    return
+  with profiler.profile(name, current_thread):
+    yield
+
+def carry(fn: Callable) -> Callable:
+  # fn bound to the caller's context, for running on a pool thread: the thread is sampled by the
+  # caller's request profile for as long as fn runs
+  context = contextvars.copy_context()
+
+  def run(*args, **kwargs):
+    return context.run(_run_profiled, fn, args, kwargs)
+  return run
+
+def _run_profiled(fn: Callable, args: tuple, kwargs: dict) -> Any:
+  threads = _profiled_threads.get()
+  if threads is None:
+    return fn(*args, **kwargs)
+  ident = threading.get_ident()
+  if ident in threads:
+    return fn(*args, **kwargs)
+  threads.add(ident)
+  try:
+    return fn(*args, **kwargs)
+  finally:
+    threads.discard(ident)
+
+def profiled(name: str) -> Callable:
+  # an async generator (a streaming handler) samples only the threads its steps are carried to
+  def decorator(fn):
+    if inspect.isasyncgenfunction(fn):
+      @functools.wraps(fn)
+      async def stream(*args, **kwargs):
+        async with aclosing(fn(*args, **kwargs)) as gen:
+          if _state.profiler is None:
+            async for item in gen:
+              yield item
+            return
+          with request_profile(name, current_thread=False):
+            async for item in gen:
+              yield item
+      return stream
+
+    @functools.wraps(fn)
+    def wrapper(*args, **kwargs):
+      if _state.profiler is None:
+        return fn(*args, **kwargs)
+      with request_profile(name):
+        return fn(*args, **kwargs)
+    return wrapper
+  return decorator
+
+def configure_from_env():
+  # GREENCHAIN_METRICS=1 turns on timers; GREENCHAIN_PROFILE_SLOW_MS=<ms> profiles slower requests
+  if os.environ.get("GREENCHAIN_METRICS", "").lower() in ("1", "true", "yes"):
+    enable()
+  slow_ms = os.environ.get("GREENCHAIN_PROFILE_SLOW_MS")
+  if slow_ms:
+    set_profiler(SlowRequestProfiler(threshold=float(slow_ms) / 1000.0,
+                                     output_dir=os.environ.get("GREENCHAIN_PROFILE_DIR", "profiles")))
\ No newline at end of file
@@ -1,46 +1,269 @@
-import math
-import random
-import statistics
-from typing import Dict, Any, List, Optional
-import numpy as np
-from core import FactorRegistry
-
-class MonteCarloEstimator:
-  def __init__(self, registry: FactorRegistry, rf_uplift: float = 1.0, samples: int = 500, seed: Optional[int]=42):
-    self.registry = registry
-    self.samples = samples
-    self.rf_uplift = rf_uplift
-    random.seed(seed)
-
-  @staticmethod
-  def _triangular(center: float, low: Optional[float], high: Optional[float])->float:
-    if math.isnan(low) and math.isnan(high):
-      low=center*0.95
-      high=center*1.05
-    return random.triangular(low, high, center)
-
-  def _sample_factor(self, row: Dict[str,Any], rf: float = 1.0)->float:
-    f = self._triangular(row["factor"], row.get("low", np.nan), row.get("high", np.nan))
-    return f * rf
-
-  def run(self, items: List[Dict[str,Any]]) -> Dict[str, Any]:
-    totals = []
-    for _ in range(self.samples):
-        total = 0.0
-        for it in items:
-            meta = it["meta"]
-            rf = self.rf_uplift if str(it["activity"]).startswith("travel_flight") else 1.0
-            sampled = self._sample_factor(meta, rf)
-            if "input_kWh" in it:
-                total += it["input_kWh"] * sampled
-            elif "input_liters" in it:
-                total += it["input_liters"] * sampled
-            elif "input_km" in it:
-                total += it["input_km"] * sampled
-            else:
-                raise RuntimeError("Unknown input payload.")
-        totals.append(total)
-    mean = statistics.mean(totals)
-    p05 = np.percentile(totals, 5)
-    p95 = np.percentile(totals, 95)
-    return {"mean": mean, "p05": p05, "p95": p95, "samples": self.samples}
\ No newline at end of file
+from typing import Dict, Any, List, Optional, Tuple
+import numpy as np
+from core import FactorRegistry, ResultItem, KLLSketch
+from core.instrument import instrumented, count
+
+AMOUNT_KEYS = ("input_kWh", "input_liters", "input_km")
+METHODS = ("random", "lhs", "sobol", "antithetic")
+
+# Joe & Kuo (2008) direction numbers, new-joe-kuo-6.21201: (degree s, polynomial a, initial m_1..m_s)
+# for dimensions 2..21; dimension 1 is the van der Corput sequence
+_SOBOL_DIRECTIONS = (
+  (1, 0, (1,)), (2, 1, (1, 3)), (3, 1, (1, 3, 1)), (3, 2, (1, 1, 1)), (4, 1, (1, 1, 3, 3)),
+  (4, 4, (1, 3, 5, 13)), (5, 2, (1, 1, 5, 5, 17)), (5, 4, (1, 1, 5, 5, 5)), (5, 7, (1, 1, 7, 11, 19)),
+  (5, 11, (1, 1, 5, 1, 1)), (5, 13, (1, 1, 1, 3, 11)), (5, 14, (1, 3, 5, 5, 31)), (6, 1, (1, 3, 3, 9, 7, 49)),
+  (6, 13, (1, 1, 1, 15, 21, 21)), (6, 16, (1, 3, 1, 13, 27, 49)), (6, 19, (1, 1, 1, 15, 7, 5)),
+  (6, 22, (1, 3, 1, 15, 13, 25)), (6, 25, (1, 1, 5, 5, 19, 61)), (7, 1, (1, 3, 7, 11, 23, 15, 103)),
+  (7, 4, (1, 3, 7, 13, 13, 15, 69)),
+)
+SOBOL_MAX_DIMS = len(_SOBOL_DIRECTIONS) + 1
+_SOBOL_BITS = 32
+
+def _sobol_directions(dims: int) -> np.ndarray:
+  v = np.zeros((dims, _SOBOL_BITS), dtype=np.uint64)
+  v[0] = [1 << (_SOBOL_BITS - 1 - k) for k in range(_SOBOL_BITS)]
+  for d, (s, a, m) in enumerate(_SOBOL_DIRECTIONS[:dims - 1], start=1):
+    for k in range(_SOBOL_BITS):
+      if k < s:
+        v[d, k] = m[k] << (_SOBOL_BITS - 1 - k)
+      else:
+        x = v[d, k - s] ^ (v[d, k - s] >> np.uint64(s))
+        for i in range(1, s):
+          if (a >> (s - 1 - i)) & 1:
+            x ^= v[d, k - i]
+        v[d, k] = x
+  return v
+
+class UniformSampler:
+  # stream of (n, dims) uniforms for one of METHODS; successive draws continue the same sequence,
+  # so a Sobol stream can be extended by the adaptive runner without losing its balance
+  def __init__(self, method: str, dims: int, rng: np.random.Generator):
+    if method not in METHODS:
+      raise ValueError(f"Unknown sampling method {method!r}, expected one of {METHODS}")
+    if method == "sobol" and dims > SOBOL_MAX_DIMS:
+      raise ValueError(f"Sobol sampling supports at most {SOBOL_MAX_DIMS} items, got {dims}")
+    self.method = method
+    self.dims = dims
+    self.rng = rng
+    self.index = 0
+    if method == "sobol":
+      self._directions = _sobol_directions(dims)
+      # random digital shift: every shifted point set keeps the net structure and is uniform on average
+      self._shift = rng.integers(0, 1 << _SOBOL_BITS, dims, dtype=np.uint64)
+
+  def _sobol(self, n: int) -> np.ndarray:
+    idx = np.arange(self.index, self.index + n, dtype=np.uint64)
+    gray = idx ^ (idx >> np.uint64(1))
+    x = np.zeros((n, self.dims), dtype=np.uint64)
+    for k in range(max(1, int(self.index + n).bit_length())):
+      bit = ((gray >> np.uint64(k)) & np.uint64(1)).astype(bool)
+      x[bit] ^= self._directions[:, k]
+    return ((x ^ self._shift).astype(float) + 0.5) / float(1 << _SOBOL_BITS)
+
+  def draw(self, n: int) -> np.ndarray:
+    if self.method == "random":
+      u = self.rng.random((n, self.dims))
+    elif self.method == "lhs":
+      # one point per 1/n stratum in every dimension, strata paired at random across dimensions
+      strata = self.rng.permuted(np.tile(np.arange(n), (self.dims, 1)), axis=1).T
+      u = (strata + self.rng.random((n, self.dims))) / n
+    elif self.method == "antithetic":
+      half = self.rng.random(((n + 1) // 2, self.dims))
+      u = np.concatenate([half, 1 - half])[:n]
+    else:
+      u = self._sobol(n)
+    self.index += n
+    return u
+
+class MonteCarloEstimator:
+  # runs up to exact_limit samples keep every total for exact percentiles; larger runs are drawn in
+  # chunks of chunk_size and summarized by a KLL sketch, so memory stays bounded
+  exact_limit = 1_000_000
+  chunk_size = 1 << 16
+  sketch_k = 400
+
+  def __init__(self, registry: FactorRegistry, rf_uplift: float = 1.0, samples: int = 500, seed: Optional[int]=42,
+               method: str = "random"):
+    if method not in METHODS:
+      raise ValueError(f"Unknown sampling method {method!r}, expected one of {METHODS}")
+    self.registry = registry
+    self.samples = samples
+    self.rf_uplift = rf_uplift
+    self.seed = seed
+    self.method = method
+
+  def _sample_count(self, samples: Optional[int]) -> int:
+    # None means the estimator's default; an explicit count must be positive
+    samples = self.samples if samples is None else samples
+    if samples <= 0:
+      raise ValueError(f"samples must be positive, got {samples}")
+    return int(samples)
+
+  @staticmethod
+  def _item_amount(it: Dict[str,Any]) -> float:
+    if isinstance(it, ResultItem):
+      return it.amount
+    for key in AMOUNT_KEYS:
+      if key in it:
+        return it[key]
+    raise RuntimeError("Unknown input payload.")
+
+  @staticmethod
+  def _item_params(it: Dict[str,Any]) -> Tuple[float, float, float]:
+    if isinstance(it, ResultItem):
+      return it.registry.band(it.factor_id, it.override)
+    meta = it["meta"]
+    return meta["factor"], meta.get("low", np.nan), meta.get("high", np.nan)
+
+  def _item_arrays(self, items: List[Dict[str,Any]]) -> Tuple[np.ndarray, np.ndarray, np.ndarray, np.ndarray]:
+    amounts = np.array([self._item_amount(it) for it in items], dtype=float)
+    registry = items[0].registry if items and isinstance(items[0], ResultItem) else None
+    if registry is not None and all(isinstance(it, ResultItem) and it.registry is registry for it in items):
+      # items carry the registry version they were scored against, so its band table applies
+      params = registry.adjusted([it.factor_id for it in items], [it.override for it in items])
+    else:
+      params = np.array([self._item_params(it) for it in items], dtype=float).reshape(len(items), 3)
+    center, low, high = params[:, 0], params[:, 1], params[:, 2]
+    low = np.where(np.isnan(low), center*0.95, low)
+    high = np.where(np.isnan(high), center*1.05, high)
+    rf = np.array([self.rf_uplift if str(it["activity"]).startswith("travel_flight") else 1.0 for it in items])
+    return amounts, center*rf, low*rf, high*rf
+
+  @staticmethod
+  def _triangular(u: np.ndarray, low: np.ndarray, center: np.ndarray, high: np.ndarray) -> np.ndarray:
+    # inverse CDF of the triangular distribution, so any uniform source can drive it
+    width = high - low
+    safe = np.where(width > 0, width, 1.0)
+    split = (center - low) / safe
+    left = low + np.sqrt(u * safe * (center - low))
+    right = high - np.sqrt((1 - u) * safe * (high - center))
+    return np.where(width > 0, np.where(u < split, left, right), center)
+
+  def sample_factors(self, items: List[Dict[str,Any]], samples: int, rng: np.random.Generator,
+                     method: Optional[str] = None) -> Tuple[np.ndarray, np.ndarray]:
+    amounts, center, low, high = self._item_arrays(items)
+    u = UniformSampler(method or self.method, len(items), rng).draw(samples)
+    return self._triangular(u, low, center, high), amounts
+
+  @staticmethod
+  def summarize(values: np.ndarray) -> Dict[str, float]:
+    return {"mean": float(values.mean()), "p05": float(np.percentile(values, 5)), "p95": float(np.percentile(values, 95))}
+
+  @staticmethod
+  def summarize_sketch(sketch: KLLSketch) -> Dict[str, float]:
+    p05, p95 = sketch.quantiles([0.05, 0.95])
+    return {"mean": sketch.mean, "p05": float(p05), "p95": float(p95)}
+
+  def _run_streaming(self, items: List[Dict[str,Any]], samples: int, rng: np.random.Generator,
+                     method: Optional[str], contributions: bool) -> Dict[str, Any]:
+    amounts, center, low, high = self._item_arrays(items)
+    sampler = UniformSampler(method or self.method, len(items), rng)
+    sketch_seed = int(rng.integers(1 << 32))
+    totals = KLLSketch(self.sketch_k, seed=sketch_seed)
+    per_item = [KLLSketch(self.sketch_k, seed=sketch_seed + 1 + i) for i in range(len(items))] if contributions else []
+    done = 0
+    while done < samples:
+      n = min(self.chunk_size, samples - done)
+      factors = self._triangular(sampler.draw(n), low, center, high)
+      totals.update(factors @ amounts)
+      for i, sketch in enumerate(per_item):
+        sketch.update(factors[:, i] * amounts[i])
+      done += n
+    result = {**self.summarize_sketch(totals), "samples": samples}
+    if contributions:
+      result["contributions"] = [{"activity": it["activity"], **self.summarize_sketch(sketch)}
+                                 for it, sketch in zip(items, per_item)]
+    return result
+
+  @instrumented("montecarlo.run")
+  def run(self, items: List[Dict[str,Any]], samples: Optional[int] = None, seed: Optional[int] = None,
+          contributions: bool = False, method: Optional[str] = None) -> Dict[str, Any]:
+    samples = self._sample_count(samples)
+    rng = np.random.default_rng(self.seed if seed is None else seed)
+    if not items:
+      result = {"mean": 0.0, "p05": 0.0, "p95": 0.0, "samples": samples}
+      if contributions:
+        result["contributions"] = []
+      return result
+
+    count("montecarlo.samples", samples * len(items))
+    if samples > self.exact_limit:
+      return self._run_streaming(items, samples, rng, method, contributions)
+    factors, amounts = self.sample_factors(items, samples, rng, method)
+    totals = factors @ amounts
+    result = {**self.summarize(totals), "samples": samples}
+    if contributions:
+      per_item = factors * amounts
+      result["contributions"] = [{"activity": it["activity"], **self.summarize(per_item[:, i])}
+                                 for i, it in enumerate(items)]
+    return result
+
+  def _paired_arrays(self, baseline: List[Dict[str,Any]], scenario: List[Dict[str,Any]]):
+    # one uniform column per activity, shared by both sides: common random numbers
+    activities = list(dict.fromkeys([str(it["activity"]) for it in baseline] + [str(it["activity"]) for it in scenario]))
+    column = {a: i for i, a in enumerate(activities)}
+    sides = []
+    for items in (baseline, scenario):
+      amounts, center, low, high = self._item_arrays(items) if items else (np.zeros(0),) * 4
+      cols = np.array([column[str(it["activity"])] for it in items], dtype=int)
+      sides.append((cols, amounts, center, low, high))
+    return len(activities), sides
+
+  def _paired_totals(self, sides, u: np.ndarray) -> Tuple[np.ndarray, np.ndarray]:
+    totals = []
+    for cols, amounts, center, low, high in sides:
+      totals.append(self._triangular(u[:, cols], low, center, high) @ amounts)
+    return totals[0], totals[1]
+
+  @instrumented("montecarlo.run_paired")
+  def run_paired(self, baseline: List[Dict[str,Any]], scenario: List[Dict[str,Any]], samples: Optional[int] = None,
+                 seed: Optional[int] = None, method: Optional[str] = None) -> Dict[str, Any]:
+    # baseline and scenario driven by the same draws, so the savings interval reflects the change
+    # rather than the noise of two independent runs
+    samples = self._sample_count(samples)
+    rng = np.random.default_rng(self.seed if seed is None else seed)
+    dims, sides = self._paired_arrays(baseline, scenario)
+    count("montecarlo.samples", samples * (len(baseline) + len(scenario)))
+    u = UniformSampler(method or self.method, max(dims, 1), rng).draw(samples)
+    base, scen = self._paired_totals(sides, u)
+    return {"baseline": {**self.summarize(base), "samples": samples},
+            "scenario": {**self.summarize(scen), "samples": samples},
+            "savings": {**self.summarize(base - scen), "samples": samples}}
+
+  @instrumented("montecarlo.run_adaptive")
+  def run_adaptive(self, items: List[Dict[str,Any]], scenario: Optional[List[Dict[str,Any]]] = None,
+                   rtol: float = 0.02, batch: int = 256, max_samples: int = 100_000, seed: Optional[int] = None,
+                   method: Optional[str] = None) -> Dict[str, Any]:
+    # doubles the sample count until p05/p95 move by less than rtol of the p05-p95 width between
+    # two successive doublings (the savings interval when a scenario is given), or max_samples
+    # is reached; doubling keeps the check meaningful for random draws and extends Sobol
+    # sequences in balanced power-of-two blocks
+    if batch < 1:
+      raise ValueError(f"batch must be positive, got {batch}")
+    if max_samples < 1:
+      raise ValueError(f"max_samples must be positive, got {max_samples}")
+    rng = np.random.default_rng(self.seed if seed is None else seed)
+    dims, sides = self._paired_arrays(items, scenario or [])
+    sampler = UniformSampler(method or self.method, max(dims, 1), rng)
+    base, scen = np.zeros(0), np.zeros(0)
+    previous, error = None, float("inf")
+    while len(base) < max_samples:
+      size = min(max(batch, len(base)), max_samples - len(base))
+      b, s = self._paired_totals(sides, sampler.draw(size))
+      base, scen = np.concatenate([base, b]), np.concatenate([scen, s])
+      watched = base - scen if scenario is not None else base
+      current = np.percentile(watched, [5, 95])
+      if previous is not None:
+        width = current[1] - current[0]
+        error = float(np.abs(current - previous).max() / width) if width > 0 else 0.0
+        if error <= rtol:
+          break
+      previous = current
+    n = len(base)
+    count("montecarlo.samples", n * (len(items) + len(scenario or [])))
+    status = {"samples": n, "converged": error <= rtol, "relative_error": error}
+    if scenario is None:
+      return {**self.summarize(base), **status}
+    return {"baseline": {**self.summarize(base), "samples": n},
+            "scenario": {**self.summarize(scen), "samples": n},
+            "savings": {**self.summarize(base - scen), "samples": n}, **status}
\ No newline at end of file
@@ -0,0 +1,112 @@
+import os
+from concurrent.futures import ProcessPoolExecutor
+from itertools import repeat
+from typing import Dict, Any, List, Optional
+import numpy as np
+import pandas as pd
+from core import FactorRegistry, CarbonCalculator, MonteCarloEstimator, KLLSketch, SketchGroup
+from core.montecarlo import AMOUNT_KEYS
+from core.sketch import merge_all
+
+# per-process engines, built once by the pool initializer so the registry is not pickled per task
+_worker: Dict[str, Any] = {}
+
+def _init_worker(registry: FactorRegistry, rf_uplift: float):
+  _worker["calc"] = CarbonCalculator(registry, rf_uplift)
+  _worker["mc"] = MonteCarloEstimator(registry, rf_uplift)
+
+def _score_shard(shard: pd.DataFrame, household_size: float) -> pd.DataFrame:
+  return _worker["calc"].calculate_many(shard, household_size)
+
+def _portable(items: List[Dict[str,Any]]) -> List[Dict[str,Any]]:
+  # plain factor parameters only, so registry-backed ResultItems do not drag the registry into each task
+  out = []
+  for it in items:
+    factor, low, high = MonteCarloEstimator._item_params(it)
+    amounts = {key: it[key] for key in AMOUNT_KEYS if key in it}
+    out.append({"activity": it["activity"], "meta": {"factor": factor, "low": low, "high": high}, **amounts})
+  return out
+
+def _mc_shard(items: List[Dict[str,Any]], samples: int, seed: np.random.SeedSequence, sketch: bool = False):
+  factors, amounts = _worker["mc"].sample_factors(items, samples, np.random.default_rng(seed))
+  totals = factors @ amounts
+  if sketch:
+    # ship a few hundred sketch items back instead of every total
+    return KLLSketch(MonteCarloEstimator.sketch_k, seed=int(seed.generate_state(1)[0])).update(totals)
+  return totals
+
+def _sketch_shard(shard: pd.DataFrame, household_size: float, by: str, columns: List[str],
+                  seed: np.random.SeedSequence) -> Dict[str, SketchGroup]:
+  scored = _worker["calc"].calculate_many(shard, household_size)
+  keys = shard[by].fillna("IN").astype(str).to_numpy() if by in shard.columns else np.full(len(shard), "IN")
+  # compaction offsets are seeded per shard, so the sketches do not depend on which process built them
+  seeds = seed.generate_state(len(columns))
+  return {col: SketchGroup(seed=int(s)).update(keys, scored[col].to_numpy(dtype=float)) for col, s in zip(columns, seeds)}
+
+class ParallelRunner:
+  def __init__(self, registry: FactorRegistry, rf_uplift: float = 1.0, workers: Optional[int] = None,
+               shard_rows: int = 100_000, shard_samples: int = 50_000):
+    self.registry = registry
+    self.rf_uplift = rf_uplift
+    self.workers = workers or os.cpu_count() or 1
+    self.shard_rows = shard_rows
+    self.shard_samples = shard_samples
+    self._executor: Optional[ProcessPoolExecutor] = None
+
+  def __enter__(self):
+    return self
+
+  def __exit__(self, *exc):
+    self.close()
+
+  def close(self):
+    if self._executor is not None:
+      self._executor.shutdown()
+      self._executor = None
+
+  def _map(self, fn, *iterables) -> List[Any]:
+    if self.workers == 1:
+      _init_worker(self.registry, self.rf_uplift)
+      return list(map(fn, *iterables))
+    if self._executor is None:
+      self._executor = ProcessPoolExecutor(max_workers=self.workers, initializer=_init_worker,
+                                           initargs=(self.registry, self.rf_uplift))
+    return list(self._executor.map(fn, *iterables))
+
+  def calculate_many(self, table: pd.DataFrame, household_size: float = 4) -> pd.DataFrame:
+    if len(table) <= self.shard_rows:
+      return CarbonCalculator(self.registry, self.rf_uplift).calculate_many(table, household_size)
+    shards = [table.iloc[i:i + self.shard_rows] for i in range(0, len(table), self.shard_rows)]
+    return pd.concat(self._map(_score_shard, shards, repeat(household_size)))
+
+  def monte_carlo(self, items: List[Dict[str,Any]], samples: int, seed: Optional[int] = 42) -> Dict[str, Any]:
+    if samples <= 0:
+      raise ValueError(f"samples must be positive, got {samples}")
+    if not items:
+      return {"mean": 0.0, "p05": 0.0, "p95": 0.0, "samples": samples}
+    # shard sizes and seed streams depend only on (samples, seed), never on the worker count
+    sizes = [min(self.shard_samples, samples - start) for start in range(0, samples, self.shard_samples)]
+    streams = np.random.SeedSequence(seed).spawn(len(sizes))
+    if samples > MonteCarloEstimator.exact_limit:
+      # shards merge in a fixed order, so the result still does not depend on the worker count
+      sketches = self._map(_mc_shard, repeat(_portable(items)), sizes, streams, repeat(True))
+      merged = merge_all(sketches)
+      return {**MonteCarloEstimator.summarize_sketch(merged), "samples": samples}
+    totals = np.concatenate(self._map(_mc_shard, repeat(_portable(items)), sizes, streams))
+    return {**MonteCarloEstimator.summarize(totals), "samples": samples}
+
+  def portfolio_quantiles(self, table: pd.DataFrame, household_size: float = 4, by: str = "region",
+                          columns: tuple = ("total_kgCO2e", "eco_score"), seed: Optional[int] = 42) -> Dict[str, SketchGroup]:
+    # per-group distribution sketches of the scored columns; shards return sketches, never rows
+    shards = [table.iloc[i:i + self.shard_rows] for i in range(0, len(table), self.shard_rows)] or [table]
+    streams = np.random.SeedSequence(seed).spawn(len(shards))
+    if len(shards) == 1:
+      _init_worker(self.registry, self.rf_uplift)
+      parts = [_sketch_shard(shards[0], household_size, by, list(columns), streams[0])]
+    else:
+      parts = self._map(_sketch_shard, shards, repeat(household_size), repeat(by), repeat(list(columns)), streams)
+    merged = {col: group.copy() for col, group in parts[0].items()}
+    for part in parts[1:]:
+      for col, group in part.items():
+        merged[col].merge(group)
+    return merged
\ No newline at end of file
@@ -0,0 +1,165 @@
+import dataclasses
+import os
+import threading
+import time
+from dataclasses import dataclass
+from typing import Callable, Dict, List, Optional, Tuple
+from core import (FactorRegistry, CarbonCalculator, MonteCarloEstimator, ScenarioEngine, AnalyticEstimator,
+                  load_default_registry)
+from core.instrument import instrumented, count
+
+# scored once per region while a new version is built, so the first real request after a swap
+# does not pay for page faults on the snapshot or lazily resolved lookups
+_WARM_PAYLOAD = {"electricity_kWh": 1.0, "fuel": {"petrol_liters": 1.0, "diesel_liters": 1.0, "lpg_liters": 1.0},
+                 "car_km": 1.0, "bus_km": 1.0, "train_km": 1.0, "ev_km": 1.0,
+                 "flight_short_km": 1.0, "flight_long_km": 1.0}
+
+def _fingerprint(path: str) -> Optional[Dict[str, int]]:
+  try:
+    st = os.stat(path)
+  except OSError:
+    return None
+  return {"size": st.st_size, "mtime_ns": st.st_mtime_ns}
+
+@dataclass(frozen=True)
+class RegistryVersion:
+  # one immutable generation of the factor table and every engine built on it; a request takes a
+  # version once and uses it for all of its steps, so a reload never mixes two tables in one result
+  registry: FactorRegistry
+  calculator: CarbonCalculator
+  mc: MonteCarloEstimator
+  scenario: ScenarioEngine
+  analytic: AnalyticEstimator
+  generation: int = 0
+  source: Optional[Dict[str, int]] = None
+  loaded_at: float = 0.0
+
+  @property
+  def version(self) -> str:
+    return self.registry.version
+
+  def engines(self) -> Tuple[FactorRegistry, CarbonCalculator, MonteCarloEstimator, ScenarioEngine]:
+    return self.registry, self.calculator, self.mc, self.scenario
+
+  @classmethod
+  def build(cls, registry: FactorRegistry, rf_uplift: float = 1.0, samples: int = 500, seed: Optional[int] = 42,
+            generation: int = 0, source: Optional[Dict[str, int]] = None) -> "RegistryVersion":
+    built = cls(registry, CarbonCalculator(registry, rf_uplift), MonteCarloEstimator(registry, rf_uplift, samples, seed),
+                ScenarioEngine(registry), AnalyticEstimator(registry, rf_uplift, samples, seed),
+                generation, source, time.time())
+    built.warm()
+    return built
+
+  def warm(self):
+    for region in self.registry.regions():
+      self.calculator.calculate({**_WARM_PAYLOAD, "region": region})
+
+class RegistryManager:
+  # Serves the current RegistryVersion and replaces it when the factor CSV changes. The next version
+  # is built completely off to the side (snapshot or CSV, fallback index, band table, engines,
+  # warm-up) and then published with a single reference assignment: readers never take a lock, and
+  # requests already holding the old version finish on it. Content that hashes the same as the
+  # current version is not swapped, so caches keyed on the version stay warm across a touch.
+  #
+  # With poll_interval set, a daemon thread stats the CSV and reloads once a change has held still
+  # for one interval, so a file that is still being written is not read half-way. A version that
+  # fails to load is counted and reported in last_error; the current version keeps serving.
+  def __init__(self, csv_path: str = "data/emission_factors.csv", snapshot: bool = True, rf_uplift: float = 1.0,
+               samples: int = 500, seed: Optional[int] = 42, poll_interval: Optional[float] = None):
+    self.csv_path = csv_path
+    self.snapshot = snapshot
+    self.rf_uplift = rf_uplift
+    self.samples = samples
+    self.seed = seed
+    self.poll_interval = poll_interval
+    self.last_error: Optional[str] = None
+    self._current: Optional[RegistryVersion] = None
+    self._pending: Optional[Dict[str, int]] = None
+    self._listeners: List[Callable[[RegistryVersion], None]] = []
+    # serializes loads; only the first current() call and reloads ever wait on it
+    self._lock = threading.Lock()
+    self._stop = threading.Event()
+    self._thread: Optional[threading.Thread] = None
+
+  def _build(self, source: Optional[Dict[str, int]], generation: int) -> RegistryVersion:
+    registry = load_default_registry(self.csv_path, self.snapshot)
+    return RegistryVersion.build(registry, self.rf_uplift, self.samples, self.seed, generation, source)
+
+  def current(self) -> RegistryVersion:
+    current = self._current
+    if current is None:
+      with self._lock:
+        if self._current is None:
+          self._current = self._build(_fingerprint(self.csv_path), 0)
+          if self.poll_interval:
+            self.start()
+        current = self._current
+    return current
+
+  @property
+  def version(self) -> str:
+    return self.current().version
+
+  def subscribe(self, listener: Callable[[RegistryVersion], None]):
+    # called with each new version after it is published, from the thread that loaded it
+    self._listeners.append(listener)
+
+  @instrumented("registry.reload")
+  def reload(self, force: bool = False) -> bool:
+    # True when a new version was published
+    with self._lock:
+      old = self._current
+      source = _fingerprint(self.csv_path)
+      if old is not None and not force and source == old.source:
+        return False
+      try:
+        new = self._build(source, old.generation + 1 if old is not None else 0)
+      except Exception as exc:
+        if old is None:
+          raise
+        count("registry.reload_errors")
+        self.last_error = f"{type(exc).__name__}: {exc}"
+        return False
+      self.last_error = None
+      if old is not None and new.version == old.version:
+        self._current = dataclasses.replace(old, source=source)
+        return False
+      self._current = new
+    count("registry.swaps")
+    for listener in list(self._listeners):
+      listener(new)
+    return True
+
+  def check(self) -> bool:
+    current = self._current
+    source = _fingerprint(self.csv_path)
+    if current is None or source is None or source == current.source:
+      self._pending = None
+      return False
+    if source != self._pending:
+      self._pending = source
+      return False
+    self._pending = None
+    return self.reload()
+
+  def _watch(self):
+    while not self._stop.wait(self.poll_interval):
+      try:
+        self.check()
+      except Exception:
+        count("registry.reload_errors")
+
+  def start(self, poll_interval: Optional[float] = None):
+    if poll_interval is not None:
+      self.poll_interval = poll_interval
+    if not self.poll_interval or (self._thread is not None and self._thread.is_alive()):
+      return
+    self._stop.clear()
+    self._thread = threading.Thread(target=self._watch, name="greenchain-registry", daemon=True)
+    self._thread.start()
+
+  def stop(self):
+    self._stop.set()
+    if self._thread is not None:
+      self._thread.join()
+      self._thread = None
\ No newline at end of file
@@ -0,0 +1,248 @@
+import json
+import threading
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+from itertools import islice
+from typing import Dict, Any, Iterable, Iterator, List, Optional, Union
+from core import FactorRegistry, CarbonCalculator, ResultItem, RegistryVersion, benchmark
+from core.instrument import instrumented, count, metrics
+
+UNCERTAINTY = ("none", "analytic", "montecarlo")
+
+def _jsonable(value: Any) -> Any:
+  if isinstance(value, ResultItem):
+    return value.to_dict()
+  if hasattr(value, "item"):
+    return value.item()
+  if hasattr(value, "tolist"):
+    return value.tolist()
+  raise TypeError(f"Object of type {type(value).__name__} is not JSON serializable")
+
+class ScoringService:
+  # Headless scoring for NDJSON batch jobs. Each input line is either a bare payload or
+  # {"id": ..., "payload": {...}, "actions": {...}, "household_size": 4}; each output line carries
+  # the totals, breakdown, eco score and benchmark, the scenario and its deltas when actions are
+  # given, and confidence intervals unless uncertainty is "none". A bad line yields an
+  # {"id", "error"} line instead of stopping the stream.
+  #
+  # registry may be a RegistryVersion (e.g. a RegistryManager's current one), which is used as built;
+  # rf_uplift, samples and seed only configure the engines built for a bare FactorRegistry.
+  def __init__(self, registry: Union[FactorRegistry, RegistryVersion], rf_uplift: float = 1.0, uncertainty: str = "none",
+               samples: int = 500, seed: Optional[int] = 42, actions: Optional[Dict[str, Any]] = None,
+               batch_size: int = 256, workers: int = 1, max_pending: Optional[int] = None):
+    if uncertainty not in UNCERTAINTY:
+      raise ValueError(f"Unknown uncertainty mode {uncertainty!r}, expected one of {UNCERTAINTY}")
+    self.rf_uplift = rf_uplift
+    self.samples = samples
+    self.seed = seed
+    self.version = self._pin(registry)
+    self.uncertainty = uncertainty
+    self.actions = actions
+    self.batch_size = batch_size
+    self.workers = max(1, workers)
+    # batches in flight; once full, no more input is read until the oldest batch is written out
+    self.max_pending = max_pending or 2 * self.workers
+    self._executor: Optional[ThreadPoolExecutor] = None
+    self._lock = threading.Lock()
+
+  @property
+  def registry(self) -> FactorRegistry:
+    return self.version.registry
+
+  def _pin(self, registry: Union[FactorRegistry, RegistryVersion], generation: int = 0) -> RegistryVersion:
+    if isinstance(registry, RegistryVersion):
+      return registry
+    return RegistryVersion.build(registry, self.rf_uplift, self.samples, self.seed, generation)
+
+  def use_registry(self, registry: Union[FactorRegistry, RegistryVersion]):
+    # batches already running finish on the version they started with; later batches see the new one.
+    # A RegistryVersion is pinned as is, so a manager's reload is not built and warmed a second time
+    self.version = self._pin(registry, self.version.generation + 1)
+
+  def close(self):
+    if self._executor is not None:
+      self._executor.shutdown()
+      self._executor = None
+
+  def _ci(self, version: RegistryVersion, items, scenario_items=None) -> Dict[str, Any]:
+    def stats(summary):
+      return {k: summary[k] for k in ("mean", "p05", "p95")}
+    if self.uncertainty == "analytic":
+      out = {"ci": stats(version.analytic.run(items))}
+      if scenario_items is not None:
+        out["scenario_ci"] = stats(version.analytic.run(scenario_items))
+      return out
+    if scenario_items is None:
+      return {"ci": stats(version.mc.run(items))}
+    paired = version.mc.run_paired(items, scenario_items)
+    return {"ci": stats(paired["baseline"]), "scenario_ci": stats(paired["scenario"]),
+            "savings_ci": stats(paired["savings"])}
+
+  def score(self, record: Dict[str, Any], version: Optional[RegistryVersion] = None) -> Dict[str, Any]:
+    version = version or self.version
+    if "payload" in record:
+      payload = record["payload"]
+    else:
+      payload = {k: v for k, v in record.items() if k not in ("id", "actions", "household_size")}
+    actions = record.get("actions", self.actions)
+    region = payload.get("region", "IN")
+    household_size = record.get("household_size", 4)
+
+    base = version.calculator.calculate(payload)
+    total = base["total_kgCO2e"]
+    out: Dict[str, Any] = {"id": record.get("id"), "total_kgCO2e": total, "breakdown": base["breakdown"],
+                           "eco_score": CarbonCalculator.eco_score(total),
+                           "benchmark": benchmark((total / 1000.0) / household_size, region=region)}
+    scenario_items = None
+    if actions:
+      after = version.calculator.calculate(version.scenario.apply(payload, region, actions))
+      saved = total - after["total_kgCO2e"]
+      keys = list(dict.fromkeys(list(base["breakdown"]) + list(after["breakdown"])))
+      out["scenario"] = {"total_kgCO2e": after["total_kgCO2e"], "breakdown": after["breakdown"]}
+      out["delta"] = {"kgCO2e": saved, "pct": 100 * saved / total if total > 0 else 0.0,
+                      "breakdown": {k: base["breakdown"].get(k, 0.0) - after["breakdown"].get(k, 0.0) for k in keys}}
+      scenario_items = after["items"]
+    if self.uncertainty != "none":
+      out.update(self._ci(version, base["items"], scenario_items))
+    return out
+
+  def _score_line(self, line: str, version: RegistryVersion) -> str:
+    record: Dict[str, Any] = {}
+    try:
+      record = json.loads(line)
+      if not isinstance(record, dict):
+        raise ValueError("each line must be a JSON object")
+      result = self.score(record, version)
+    except Exception as exc:
+      count("service.errors")
+      result = {"id": record.get("id") if isinstance(record, dict) else None, "error": f"{type(exc).__name__}: {exc}"}
+    return json.dumps(result, default=_jsonable)
+
+  @instrumented("service.batch")
+  def score_batch(self, lines: List[str]) -> List[str]:
+    count("service.records", len(lines))
+    version = self.version
+    return [self._score_line(line, version) for line in lines]
+
+  def _batches(self, lines: Iterable[str]) -> Iterator[List[str]]:
+    it = (line for line in lines if line.strip())
+    while True:
+      batch = list(islice(it, self.batch_size))
+      if not batch:
+        return
+      yield batch
+
+  def stream(self, lines: Iterable[str]) -> Iterator[List[str]]:
+    # scored batches in input order; input is pulled lazily, at most max_pending batches ahead
+    if self.workers == 1:
+      for batch in self._batches(lines):
+        yield self.score_batch(batch)
+      return
+    with self._lock:
+      if self._executor is None:
+        self._executor = ThreadPoolExecutor(max_workers=self.workers, thread_name_prefix="greenchain-score")
+    pending: deque = deque()
+    for batch in self._batches(lines):
+      pending.append(self._executor.submit(self.score_batch, batch))
+      if len(pending) >= self.max_pending:
+        yield pending.popleft().result()
+    while pending:
+      yield pending.popleft().result()
+
+  def run(self, lines: Iterable[str], out) -> int:
+    # writes one result line per input line and flushes per batch; returns the number written
+    written = 0
+    for results in self.stream(lines):
+      out.write("\n".join(results) + "\n")
+      out.flush()
+      written += len(results)
+    return written
+
+def _chunked_lines(rfile) -> Iterator[str]:
+  # lines of a Transfer-Encoding: chunked request body
+  buffer = b""
+  while True:
+    size = int(rfile.readline().split(b";")[0].strip() or b"0", 16)
+    if size == 0:
+      rfile.readline()
+      break
+    buffer += rfile.read(size)
+    rfile.readline()
+    *lines, buffer = buffer.split(b"\n")
+    for line in lines:
+      yield line.decode("utf-8")
+  if buffer:
+    yield buffer.decode("utf-8")
+
+def _sized_lines(rfile, length: int) -> Iterator[str]:
+  # lines of a Content-Length request body; reads are capped at 1 MiB, but a longer line is
+  # joined back together so it still yields exactly one record
+  parts: List[bytes] = []
+  while length > 0:
+    part = rfile.readline(min(length, 1 << 20))
+    if not part:
+      break
+    length -= len(part)
+    parts.append(part)
+    if part.endswith(b"\n"):
+      yield b"".join(parts).decode("utf-8")
+      parts = []
+  if parts:
+    yield b"".join(parts).decode("utf-8")
+
+def make_server(service: ScoringService, host: str = "127.0.0.1", port: int = 8080, max_requests: int = 4):
+  # POST /score takes an NDJSON body and streams NDJSON back with chunked encoding; GET /healthz
+  # and GET /metrics (Prometheus text). Requests beyond max_requests in flight get 503, and a slow
+  # reader stalls its own request through TCP flow control rather than buffering results
+  from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+  slots = threading.BoundedSemaphore(max_requests)
+
+  class Handler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"
+
+    def _send(self, status: int, body: str, content_type: str = "text/plain; charset=utf-8"):
+      data = body.encode("utf-8")
+      self.send_response(status)
+      self.send_header("Content-Type", content_type)
+      self.send_header("Content-Length", str(len(data)))
+      self.end_headers()
+      self.wfile.write(data)
+
+    def do_GET(self):
+      if self.path == "/healthz":
+        self._send(200, json.dumps({"status": "ok", "registry_version": service.registry.version}),
+                   "application/json")
+      elif self.path == "/metrics":
+        self._send(200, metrics.to_prometheus(), "text/plain; version=0.0.4")
+      else:
+        self._send(404, "not found\n")
+
+    def do_POST(self):
+      if self.path != "/score":
+        self._send(404, "not found\n")
+        return
+      if not slots.acquire(blocking=False):
+        self.close_connection = True
+        self._send(503, "busy\n")
+        return
+      try:
+        if "chunked" in self.headers.get("Transfer-Encoding", "").lower():
+          lines = _chunked_lines(self.rfile)
+        else:
+          lines = _sized_lines(self.rfile, int(self.headers.get("Content-Length", 0)))
+        self.send_response(200)
+        self.send_header("Content-Type", "application/x-ndjson")
+        self.send_header("Transfer-Encoding", "chunked")
+        self.end_headers()
+        for results in service.stream(lines):
+          data = ("\n".join(results) + "\n").encode("utf-8")
+          self.wfile.write(b"%x\r\n%s\r\n" % (len(data), data))
+          self.wfile.flush()
+        self.wfile.write(b"0\r\n\r\n")
+      finally:
+        slots.release()
+
+    def log_message(self, format, *args):
+      pass
+
+  return ThreadingHTTPServer((host, port), Handler)
\ No newline at end of file
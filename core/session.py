@@ -0,0 +1,153 @@
+import zlib
+from typing import Dict, Any, Optional, Set
+import numpy as np
+from core import FactorRegistry, CarbonCalculator, ScenarioEngine, MonteCarloEstimator, ResultItem
+from core.instrument import instrumented, count
+
+def _same(a: Any, b: Any) -> bool:
+  if a is b:
+    return True
+  if isinstance(a, dict) and isinstance(b, dict):
+    return a.keys() == b.keys() and all(_same(a[k], b[k]) for k in a)
+  try:
+    return bool(a == b)
+  except (TypeError, ValueError):
+    # monthly arrays / Series compare elementwise
+    return np.array_equal(np.asarray(a), np.asarray(b))
+
+class _Side:
+  # per-item state of one payload (baseline or scenario) kept between updates
+  def __init__(self):
+    self.payload: Dict[str, Any] = {}
+    self.items: Dict[str, Optional[ResultItem]] = {}
+    self.samples: Dict[str, np.ndarray] = {}
+    self.totals: Optional[np.ndarray] = None
+    self.summary: Optional[Dict[str, float]] = None
+
+class WhatIfSession:
+  # Keeps a baseline and a scenario evaluated item by item. An update diffs the payload fields each
+  # item reads (CarbonCalculator.ITEM_DEPENDENCIES); actions reach items through the fields
+  # ScenarioEngine.apply writes. Only items whose inputs changed are rebuilt and resampled, then
+  # the totals are re-aggregated.
+  #
+  # Monte Carlo samples are drawn per breakdown key from a stream seeded by (seed, key), so the
+  # baseline and scenario share random numbers and their difference has low variance.
+  def __init__(self, registry: FactorRegistry, payload: Dict[str, Any], actions: Optional[Dict[str, Any]] = None,
+               rf_uplift: float = 1.0, samples: int = 500, seed: int = 42):
+    self.registry = registry
+    self.calculator = CarbonCalculator(registry, rf_uplift)
+    self.scenario_engine = ScenarioEngine(registry)
+    self.mc = MonteCarloEstimator(registry, rf_uplift, samples, seed)
+    self.samples = samples
+    self.seed = seed
+    self.payload: Dict[str, Any] = {}
+    self.actions: Dict[str, Any] = dict(actions or {})
+    self._baseline = _Side()
+    self._scenario = _Side()
+    self._uniforms: Dict[str, np.ndarray] = {}
+    self._factor_samples: Dict[tuple, np.ndarray] = {}
+    self.last_dirty: Dict[str, Set[str]] = {}
+    self.update(payload=payload)
+
+  def _uniform(self, key: str) -> np.ndarray:
+    u = self._uniforms.get(key)
+    if u is None:
+      rng = np.random.default_rng([self.seed, zlib.crc32(key.encode("utf-8"))])
+      u = self._uniforms[key] = rng.random(self.samples)
+    return u
+
+  def _sample(self, key: str, it: ResultItem) -> np.ndarray:
+    # factor samples depend only on the item's (override-adjusted) factor distribution, so an
+    # amount change reuses them and only rescales
+    _, center, low, high = self.mc._item_arrays([it])
+    params = (key, float(center[0]), float(low[0]), float(high[0]))
+    factors = self._factor_samples.get(params)
+    if factors is None:
+      if len(self._factor_samples) >= 256:
+        self._factor_samples.clear()
+      factors = self._factor_samples[params] = self.mc._triangular(self._uniform(key), low, center, high)
+    return factors * it.amount
+
+  def _refresh(self, side: _Side, payload: Dict[str, Any]) -> Set[str]:
+    old = side.payload
+    changed = {f for f in old.keys() | payload.keys() if not _same(old.get(f), payload.get(f))}
+    first = not side.items
+    dirty = set()
+    for key, fields in CarbonCalculator.ITEM_DEPENDENCIES.items():
+      if first or changed.intersection(fields):
+        it = self.calculator.item(key, payload)
+        side.items[key] = it
+        if it is None:
+          side.samples.pop(key, None)
+        else:
+          side.samples[key] = self._sample(key, it)
+        dirty.add(key)
+    if dirty:
+      side.totals = side.summary = None
+    side.payload = payload
+    count("session.items_recomputed", len(dirty))
+    return dirty
+
+  @instrumented("session.update")
+  def update(self, payload: Optional[Dict[str, Any]] = None, actions: Optional[Dict[str, Any]] = None,
+             **fields: Any) -> Dict[str, Set[str]]:
+    # payload replaces the baseline payload, fields patch it; actions are merged into the current ones
+    # returns the breakdown keys recomputed on each side
+    if payload is not None:
+      self.payload = dict(payload)
+    if fields:
+      self.payload = {**self.payload, **fields}
+    if actions:
+      self.actions = {**self.actions, **actions}
+    baseline = self._refresh(self._baseline, self.payload)
+    scen_payload = self.scenario_engine.apply(self.payload, self.payload.get("region", "IN"), self.actions)
+    scenario = self._refresh(self._scenario, scen_payload)
+    self.last_dirty = {"baseline": baseline, "scenario": scenario}
+    return self.last_dirty
+
+  def set_action(self, name: str, value: Any) -> Dict[str, Set[str]]:
+    return self.update(actions={name: value})
+
+  @staticmethod
+  def _aggregate(side: _Side) -> Dict[str, Any]:
+    # same shape and summation order as CarbonCalculator.calculate
+    items, breakdown = [], {}
+    for key in CarbonCalculator.ITEM_DEPENDENCIES:
+      it = side.items.get(key)
+      if it is not None:
+        breakdown[key] = it.kgCO2e
+        items.append(it)
+    return {"total_kgCO2e": sum(breakdown.values()), "breakdown": breakdown, "items": items}
+
+  def _totals(self, side: _Side) -> np.ndarray:
+    if side.totals is None:
+      totals = np.zeros(self.samples)
+      for key in CarbonCalculator.ITEM_DEPENDENCIES:
+        if key in side.samples:
+          totals = totals + side.samples[key]
+      side.totals = totals
+    return side.totals
+
+  def _summary(self, side: _Side) -> Dict[str, float]:
+    if side.summary is None:
+      side.summary = {**MonteCarloEstimator.summarize(self._totals(side)), "samples": self.samples}
+    return side.summary
+
+  @property
+  def baseline(self) -> Dict[str, Any]:
+    return self._aggregate(self._baseline)
+
+  @property
+  def scenario(self) -> Dict[str, Any]:
+    return self._aggregate(self._scenario)
+
+  def uncertainty(self) -> Dict[str, Any]:
+    savings = self._totals(self._baseline) - self._totals(self._scenario)
+    return {
+      "baseline_mc": dict(self._summary(self._baseline)),
+      "scenario_mc": dict(self._summary(self._scenario)),
+      "savings_mc": {**MonteCarloEstimator.summarize(savings), "samples": self.samples},
+    }
+
+  def result(self) -> Dict[str, Any]:
+    return {"baseline": self.baseline, "scenario": self.scenario, **self.uncertainty()}
\ No newline at end of file
@@ -0,0 +1,174 @@
+import copy
+import math
+from typing import Dict, Any, Hashable, Iterable, List, Optional, Sequence
+import numpy as np
+
+class KLLSketch:
+  # Mergeable streaming quantile sketch (Karnin, Lang & Liberty 2016). Level h holds items of weight
+  # 2**h; a level over its capacity is sorted and every other item (random offset) is promoted,
+  # which moves any rank by at most 2**h. Capacities shrink geometrically with depth, so memory
+  # stays around k / (1 - c) items for any stream length, with rank error roughly 1.7 / k.
+  # Whole arrays are inserted and compacted at once, so updates cost a sort, not a Python loop.
+  def __init__(self, k: int = 200, c: float = 2/3, seed: Optional[int] = None):
+    self.k = k
+    self.c = c
+    self.levels: List[np.ndarray] = [np.empty(0)]
+    self.n = 0
+    self.total = 0.0
+    self.min = math.inf
+    self.max = -math.inf
+    self._rng = np.random.default_rng(seed)
+
+  def __len__(self) -> int:
+    return self.n
+
+  def _capacity(self, level: int) -> int:
+    depth = len(self.levels) - 1 - level
+    return max(2, int(math.ceil(self.k * self.c ** depth)))
+
+  def _compress(self):
+    level = 0
+    while level < len(self.levels):
+      items = self.levels[level]
+      if len(items) > self._capacity(level):
+        items = np.sort(items)
+        # an odd item out stays behind, so the promoted half is an exact halving
+        keep = items[:1] if len(items) % 2 else items[:0]
+        items = items[len(keep):]
+        promoted = items[self._rng.integers(0, 2)::2]
+        self.levels[level] = keep
+        if level + 1 == len(self.levels):
+          self.levels.append(np.empty(0))
+        self.levels[level + 1] = np.concatenate([self.levels[level + 1], promoted])
+      level += 1
+
+  def update(self, values) -> "KLLSketch":
+    values = np.asarray(values, dtype=float).ravel()
+    values = values[~np.isnan(values)]
+    if len(values) == 0:
+      return self
+    self.n += len(values)
+    self.total += float(values.sum())
+    self.min = min(self.min, float(values.min()))
+    self.max = max(self.max, float(values.max()))
+    self.levels[0] = np.concatenate([self.levels[0], values])
+    self._compress()
+    return self
+
+  def merge(self, other: "KLLSketch") -> "KLLSketch":
+    if other.n == 0:
+      return self
+    while len(self.levels) < len(other.levels):
+      self.levels.append(np.empty(0))
+    for h, items in enumerate(other.levels):
+      self.levels[h] = np.concatenate([self.levels[h], items])
+    self.n += other.n
+    self.total += other.total
+    self.min = min(self.min, other.min)
+    self.max = max(self.max, other.max)
+    self._compress()
+    return self
+
+  def copy(self) -> "KLLSketch":
+    # independent of this sketch, random state included; level arrays are only ever replaced,
+    # never written in place, so they can be shared
+    dup = KLLSketch(self.k, self.c)
+    dup.levels = list(self.levels)
+    dup.n, dup.total, dup.min, dup.max = self.n, self.total, self.min, self.max
+    dup._rng = copy.deepcopy(self._rng)
+    return dup
+
+  def quantiles(self, qs: Sequence[float]) -> np.ndarray:
+    if self.n == 0:
+      return np.full(len(qs), np.nan)
+    items = np.concatenate(self.levels)
+    weights = np.concatenate([np.full(len(lv), 2.0 ** h) for h, lv in enumerate(self.levels)])
+    order = np.argsort(items, kind="stable")
+    items, cumulative = items[order], np.cumsum(weights[order])
+    # weights sum to n; a rank maps to the first item whose cumulative weight reaches it
+    ranks = np.asarray(qs, dtype=float) * cumulative[-1]
+    idx = np.minimum(np.searchsorted(cumulative, ranks, side="left"), len(items) - 1)
+    out = items[idx]
+    out = np.where(np.asarray(qs) <= 0, self.min, out)
+    return np.where(np.asarray(qs) >= 1, self.max, out)
+
+  def quantile(self, q: float) -> float:
+    return float(self.quantiles([q])[0])
+
+  @property
+  def mean(self) -> float:
+    return self.total / self.n if self.n else float("nan")
+
+  def summary(self) -> Dict[str, float]:
+    p05, p50, p95 = self.quantiles([0.05, 0.5, 0.95])
+    return {"count": self.n, "mean": self.mean, "min": self.min, "max": self.max,
+            "p05": float(p05), "p50": float(p50), "p95": float(p95)}
+
+  def to_dict(self) -> Dict[str, Any]:
+    # plain JSON-able state, so shards can be stored and merged later without the raw values;
+    # an empty sketch has no min/max (None rather than the infinities json would write as Infinity)
+    empty = self.n == 0
+    return {"k": self.k, "c": self.c, "n": self.n, "total": self.total,
+            "min": None if empty else self.min, "max": None if empty else self.max,
+            "levels": [lv.tolist() for lv in self.levels]}
+
+  @classmethod
+  def from_dict(cls, state: Dict[str, Any], seed: Optional[int] = None) -> "KLLSketch":
+    sketch = cls(state["k"], state["c"], seed)
+    sketch.levels = [np.asarray(lv, dtype=float) for lv in state["levels"]] or [np.empty(0)]
+    sketch.n, sketch.total = state["n"], state["total"]
+    if state["min"] is not None:
+      sketch.min, sketch.max = state["min"], state["max"]
+    return sketch
+
+class SketchGroup:
+  # one KLLSketch per group key (region, segment, ...), updated from whole columns at once
+  def __init__(self, k: int = 200, seed: Optional[int] = None):
+    self.k = k
+    self.seed = seed
+    self.sketches: Dict[Hashable, KLLSketch] = {}
+
+  def _get(self, key: Hashable) -> KLLSketch:
+    sketch = self.sketches.get(key)
+    if sketch is None:
+      sketch = self.sketches[key] = KLLSketch(self.k, seed=self.seed)
+    return sketch
+
+  def update(self, keys, values) -> "SketchGroup":
+    keys = np.asarray(keys)
+    values = np.asarray(values, dtype=float)
+    uniq, inverse = np.unique(keys, return_inverse=True)
+    order = np.argsort(inverse, kind="stable")
+    bounds = np.cumsum(np.bincount(inverse, minlength=len(uniq)))[:-1]
+    for key, part in zip(uniq.tolist(), np.split(values[order], bounds)):
+      self._get(key).update(part)
+    return self
+
+  def copy(self) -> "SketchGroup":
+    group = SketchGroup(self.k, self.seed)
+    group.sketches = {key: sketch.copy() for key, sketch in self.sketches.items()}
+    return group
+
+  def merge(self, other: "SketchGroup") -> "SketchGroup":
+    for key, sketch in other.sketches.items():
+      self._get(key).merge(sketch)
+    return self
+
+  def summary(self) -> Dict[Hashable, Dict[str, float]]:
+    return {key: sketch.summary() for key, sketch in self.sketches.items()}
+
+  def to_dict(self) -> Dict[str, Any]:
+    return {"k": self.k, "groups": {str(key): s.to_dict() for key, s in self.sketches.items()}}
+
+  @classmethod
+  def from_dict(cls, state: Dict[str, Any], seed: Optional[int] = None) -> "SketchGroup":
+    group = cls(state["k"], seed)
+    group.sketches = {key: KLLSketch.from_dict(s, seed) for key, s in state["groups"].items()}
+    return group
+
+def merge_all(sketches: Iterable[KLLSketch]) -> KLLSketch:
+  # a new sketch; the inputs are left as they were
+  merged: Optional[KLLSketch] = None
+  for sketch in sketches:
+    merged = sketch.copy() if merged is None else merged.merge(sketch)
+  return merged if merged is not None else KLLSketch()
\ No newline at end of file
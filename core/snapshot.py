@@ -0,0 +1,105 @@
+import hashlib
+import json
+import os
+import struct
+import tempfile
+from typing import Dict, Any, Optional
+import numpy as np
+from core import FactorRegistry
+
+# layout: magic | u64 header length | JSON header | padding to ALIGN | packed row records
+MAGIC = b"CFREGSN1"
+ALIGN = 64
+
+def snapshot_path(csv_path: str) -> str:
+  return csv_path + ".snapshot"
+
+def source_fingerprint(source: str, data: Optional[bytes] = None) -> Dict[str, Any]:
+  # size and mtime alone miss an edit that keeps the size within the filesystem's mtime
+  # resolution, so the snapshot is also tied to a hash of the CSV bytes it was built from
+  st = os.stat(source)
+  if data is None:
+    with open(source, "rb") as f:
+      data = f.read()
+  return {"size": st.st_size, "mtime_ns": st.st_mtime_ns, "sha256": hashlib.sha256(data).hexdigest()}
+
+def write_snapshot(registry: FactorRegistry, path: str, source: Optional[str] = None,
+                   fingerprint: Optional[Dict[str, Any]] = None):
+  # fingerprint, when given, describes the exact CSV bytes the registry was parsed from
+  if fingerprint is None and source:
+    fingerprint = source_fingerprint(source)
+  fields, arrays, strings = [], {}, {}
+  for name, col in registry.interned().items():
+    if isinstance(col, tuple):
+      # string columns are already interned: int32 codes into a table, -1 for missing values
+      arrays[name], strings[name] = col
+      dtype = "<i4"
+    else:
+      dtype = "<i8" if col.dtype.kind in "biu" else "<f8"
+      arrays[name] = col
+    fields.append((name, dtype))
+
+  records = np.empty(len(registry), dtype=np.dtype(fields))
+  for name, arr in arrays.items():
+    records[name] = arr
+  header = json.dumps({
+    "fields": fields,
+    "rows": len(registry),
+    "strings": strings,
+    "version": registry.version,
+    "source": fingerprint,
+  }).encode("utf-8")
+  offset = len(MAGIC) + 8 + len(header)
+  padding = (-offset) % ALIGN
+
+  # write to a temp file and rename, so concurrent readers never see a partial snapshot
+  directory = os.path.dirname(os.path.abspath(path))
+  fd, tmp = tempfile.mkstemp(dir=directory, prefix=".snapshot-")
+  try:
+    with os.fdopen(fd, "wb") as f:
+      f.write(MAGIC + struct.pack("<Q", len(header)) + header + b"\0" * padding)
+      f.write(records.tobytes())
+    os.chmod(tmp, 0o644)
+    os.replace(tmp, path)
+  except BaseException:
+    os.unlink(tmp)
+    raise
+
+def read_header(path: str) -> Optional[Dict[str, Any]]:
+  try:
+    with open(path, "rb") as f:
+      if f.read(len(MAGIC)) != MAGIC:
+        return None
+      (size,) = struct.unpack("<Q", f.read(8))
+      header = json.loads(f.read(size).decode("utf-8"))
+  except (OSError, ValueError, struct.error):
+    return None
+  offset = len(MAGIC) + 8 + size
+  header["offset"] = offset + (-offset) % ALIGN
+  return header
+
+def open_snapshot(path: str, source: Optional[str] = None) -> Optional[FactorRegistry]:
+  # returns None when the snapshot is missing, unreadable, or older than its source CSV
+  header = read_header(path)
+  if header is None:
+    return None
+  if source is not None:
+    recorded = header.get("source") or {}
+    try:
+      st = os.stat(source)
+      if recorded.get("size") != st.st_size or recorded.get("sha256") != source_fingerprint(source)["sha256"]:
+        return None
+    except OSError:
+      return None
+  dtype = np.dtype([tuple(f) for f in header["fields"]])
+  if header["rows"] == 0:
+    records = np.empty(0, dtype=dtype)
+  else:
+    records = np.memmap(path, dtype=dtype, mode="r", offset=header["offset"], shape=(header["rows"],))
+  columns = {}
+  for name, _ in header["fields"]:
+    if name in header["strings"]:
+      columns[name] = (records[name], header["strings"][name])
+    else:
+      columns[name] = records[name]
+  return FactorRegistry.from_columns(columns, version=header["version"])
\ No newline at end of file
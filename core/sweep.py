@@ -0,0 +1,115 @@
+from dataclasses import dataclass
+from typing import Dict, Any, Iterable, List, Optional
+import numpy as np
+from core import FactorRegistry, CarbonCalculator
+
+SWEEP_ACTIONS = ("efficiency_pct", "solar_share", "ev_switch_pct", "mode_shift", "grid_factor_reduction_pct")
+
+@dataclass
+class SweepResult:
+  axes: List[str]
+  levels: List[np.ndarray]
+  total: np.ndarray
+  breakdown: Dict[str, np.ndarray]
+  baseline_total: float
+  mode_shift_to: str = "bus"
+
+  @property
+  def savings_pct(self) -> np.ndarray:
+    if self.baseline_total <= 0:
+      return np.zeros_like(self.total)
+    return 100 * (self.baseline_total - self.total) / self.baseline_total
+
+  def actions_at(self, index) -> Dict[str, Any]:
+    actions = {}
+    for axis, levels, i in zip(self.axes, self.levels, index):
+      level = float(levels[i])
+      actions[axis] = {"to": self.mode_shift_to, "pct": level} if axis == "mode_shift" else level
+    return actions
+
+  def cheapest(self, target_pct: float, k: int = 5, costs: Optional[Dict[str, float]] = None) -> List[Dict[str, Any]]:
+    # cost of a grid point is the weighted sum of its action levels (percentage points)
+    costs = costs or {}
+    cost = np.zeros(self.total.shape)
+    for dim, (axis, levels) in enumerate(zip(self.axes, self.levels)):
+      shape = [1] * len(self.axes)
+      shape[dim] = len(levels)
+      cost = cost + costs.get(axis, 1.0) * np.asarray(levels, dtype=float).reshape(shape)
+    feasible = np.flatnonzero(self.savings_pct.ravel() >= target_pct)
+    best = feasible[np.argsort(cost.ravel()[feasible], kind="stable")[:k]]
+    out = []
+    for flat in best:
+      index = np.unravel_index(flat, self.total.shape)
+      out.append({"actions": self.actions_at(index), "cost": float(cost[index]),
+                  "total_kgCO2e": float(self.total[index]), "savings_pct": float(self.savings_pct[index])})
+    return out
+
+class ScenarioSweep:
+  def __init__(self, registry: FactorRegistry):
+    self.registry = registry
+    self.calculator = CarbonCalculator(registry)
+
+  def run(self, payload: Dict[str, Any], ranges: Dict[str, Iterable[float]], mode_shift_to: str = "bus") -> SweepResult:
+    unknown = set(ranges) - set(SWEEP_ACTIONS)
+    if unknown:
+      raise ValueError(f"Unknown sweep actions: {unknown}")
+    axes = [a for a in SWEEP_ACTIONS if a in ranges]
+    levels = [np.asarray(list(ranges[a]), dtype=float) for a in axes]
+
+    # each action becomes a fraction broadcast along its own axis; unswept actions are 0
+    def fraction(action):
+      if action not in axes:
+        return 0.0
+      dim = axes.index(action)
+      shape = [1] * len(axes)
+      shape[dim] = len(levels[dim])
+      return (np.clip(levels[dim], 0.0, 100.0) / 100.0).reshape(shape)
+
+    sm = self.calculator._sum_months
+    region = payload.get("region", "IN")
+    fuel = payload.get("fuel", {})
+    eff, solar, sw = fraction("efficiency_pct"), fraction("solar_share"), fraction("ev_switch_pct")
+    ms, red = fraction("mode_shift"), fraction("grid_factor_reduction_pct")
+
+    # the same linear rescalings ScenarioEngine.apply performs, written against whole arrays
+    elec = sm(payload.get("electricity_kWh", 0.0)) * (1 - eff)
+    elec = elec * (1 - solar)
+    car = sm(payload.get("car_km", 0.0))
+    shift = car * sw
+    ev_km = sm(payload.get("ev_km", 0.0)) + shift
+    car = car - shift
+    shift = car * ms
+    car = car - shift
+    km = {"car": car, "bus": sm(payload.get("bus_km", 0.0)), "train": sm(payload.get("train_km", 0.0)), "ev": ev_km,
+          "flight_short": sm(payload.get("flight_short_km", 0.0)), "flight_long": sm(payload.get("flight_long_km", 0.0))}
+    # apply() adds the shift to <to>_km; targets without a scored column (walk, bike, ...) emit nothing
+    if mode_shift_to in km:
+      km[mode_shift_to] = km[mode_shift_to] + shift
+    ev_km = km["ev"]
+
+    def factor(category, subcategory, region, amount):
+      return self.registry.lookup(category, subcategory, region)["factor"] if np.any(amount > 0) else 0.0
+
+    def scored(amount, f):
+      return np.where(amount > 0, amount * f, 0.0)
+
+    grid = factor("electricity", "grid", region, np.maximum(elec, ev_km))
+    grid = np.where(red != 0, self.calculator._grid_factor_override(grid, red), grid)
+    breakdown = {"electricity": scored(elec, grid)}
+    for ft in ["petrol_liters","diesel_liters","lpg_liters"]:
+      vol = sm(fuel.get(ft, 0.0))
+      sub = ft.split("_")[0]
+      breakdown[f"fuel_{sub}"] = scored(vol, factor("fuel", sub, "GLOBAL", vol))
+    for mode in ["car","bus","train"]:
+      breakdown[mode] = scored(km[mode], factor("travel", mode, "GLOBAL", km[mode]))
+    breakdown["ev"] = np.where(ev_km > 0, ev_km * payload.get("ev_kwh_per_km", 0.15) * grid, 0.0)
+    for subcat in ["flight_short","flight_long"]:
+      breakdown[subcat] = scored(km[subcat], factor("travel", subcat, "GLOBAL", km[subcat]))
+
+    shape = tuple(len(l) for l in levels)
+    total = np.zeros(shape)
+    for values in breakdown.values():
+      total = total + values
+    breakdown = {k: np.broadcast_to(v, shape) for k, v in breakdown.items()}
+    baseline_total = self.calculator.calculate(payload)["total_kgCO2e"]
+    return SweepResult(axes, levels, total, breakdown, baseline_total, mode_shift_to)
\ No newline at end of file
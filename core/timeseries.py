@@ -0,0 +1,217 @@
+import os
+import re
+import tempfile
+import threading
+from typing import Dict, Any, List, Optional, Tuple
+import numpy as np
+from core import FactorRegistry, CarbonCalculator
+from core.instrument import instrumented
+
+HOURS_PER_DAY = 24
+# first hour of Feb 29 in an hourly leap-year series
+LEAP_DAY = 59 * HOURS_PER_DAY
+_NAME = re.compile(r"^(?P<region>.+)_(?P<year>\d{4})\.npy$")
+
+def _month_days(days: int) -> np.ndarray:
+  # a 365-day series is laid out on a non-leap calendar even when the year is a leap year
+  feb = 29 if days == 366 else 28
+  return np.array([31, feb, 31, 30, 31, 30, 31, 31, 30, 31, 30, 31])
+
+def _recalendar(series: np.ndarray, hours: int) -> np.ndarray:
+  # an hourly series moved to the other calendar: Feb 29 is dropped for 8760 hours, or takes
+  # Feb 28's intensity for 8784
+  if hours == 8760:
+    return np.concatenate((series[:LEAP_DAY], series[LEAP_DAY + HOURS_PER_DAY:]))
+  return np.concatenate((series[:LEAP_DAY], series[LEAP_DAY - HOURS_PER_DAY:]))
+
+class IntensitySeriesStore:
+  # hourly grid intensity (kgCO2e/kWh) per region and year, one .npy file each under
+  # <directory>/<kind>/<REGION>_<YEAR>.npy; files are opened memory-mapped, so only the pages a
+  # calculation touches are read and worker processes share them through the page cache
+  def __init__(self, directory: str = "data/intensity", kind: str = "average"):
+    self.directory = directory
+    self.kind = kind
+    self._open: Dict[Tuple[str, int], Optional[np.ndarray]] = {}
+    self._available: Optional[Dict[str, List[int]]] = None
+    self._lock = threading.Lock()
+
+  def path(self, region: str, year: int) -> str:
+    return os.path.join(self.directory, self.kind, f"{region}_{int(year)}.npy")
+
+  def write(self, region: str, year: int, values) -> str:
+    values = np.ascontiguousarray(values, dtype=np.float64)
+    if values.ndim != 1 or len(values) % HOURS_PER_DAY or len(values) // HOURS_PER_DAY not in (365, 366):
+      raise ValueError(f"Expected an hourly series of 8760 or 8784 values, got shape {values.shape}")
+    path = self.path(region, year)
+    directory = os.path.dirname(os.path.abspath(path))
+    os.makedirs(directory, exist_ok=True)
+    fd, tmp = tempfile.mkstemp(dir=directory, prefix=".series-", suffix=".npy")
+    try:
+      with os.fdopen(fd, "wb") as f:
+        np.save(f, values)
+      os.chmod(tmp, 0o644)
+      os.replace(tmp, path)
+    except BaseException:
+      os.unlink(tmp)
+      raise
+    with self._lock:
+      self._open.pop((region, int(year)), None)
+      self._available = None
+    return path
+
+  def load(self, region: str, year: int) -> Optional[np.ndarray]:
+    # the stored series for exactly this region and year (no fallback), or None
+    key = (region, int(year))
+    with self._lock:
+      if key not in self._open:
+        path = self.path(region, year)
+        self._open[key] = np.load(path, mmap_mode="r") if os.path.exists(path) else None
+      return self._open[key]
+
+  def available(self) -> Dict[str, List[int]]:
+    # region -> sorted years, listed once per store (write() refreshes it)
+    if self._available is None:
+      out: Dict[str, List[int]] = {}
+      try:
+        names = os.listdir(os.path.join(self.directory, self.kind))
+      except FileNotFoundError:
+        names = []
+      for name in names:
+        m = _NAME.match(name)
+        if m:
+          out.setdefault(m.group("region"), []).append(int(m.group("year")))
+      self._available = {r: sorted(y) for r, y in out.items()}
+    return self._available
+
+  def resolve(self, region: str, year: Optional[int] = None) -> Optional[Tuple[str, int]]:
+    # same region -> country -> GLOBAL fallback as FactorRegistry; the latest year when none is given
+    available = self.available()
+    candidates = [region]
+    if len(region) >= 2 and "-" in region:
+      candidates.append(region.split("-")[0])
+    candidates.append("GLOBAL")
+    for r in candidates:
+      if year is None:
+        if available.get(r):
+          return r, available[r][-1]
+      elif int(year) in available.get(r, ()):
+        return r, int(year)
+    return None
+
+  def series(self, region: str, year: Optional[int] = None) -> Optional[np.ndarray]:
+    found = self.resolve(region, year)
+    return None if found is None else self.load(*found)
+
+class TimeResolvedCalculator:
+  # Electricity and EV items are scored against hourly intensity instead of the annual grid factor.
+  # Consumption may be hourly (8760/8784 values), monthly (12 values, spread over each month's
+  # days with an optional 24-value daily load shape) or a scalar (spread evenly over the year).
+  # Every consumption resolution reduces to a weight vector, so emissions are one dot product
+  # per household, or one matrix-vector product for many.
+  #
+  # Items without a series for their region fall back to the annual factor, so the output has
+  # the same shape and, in that case, the same numbers as CarbonCalculator.calculate.
+  PROFILE_KEYS = {"electricity": "electricity_profile", "ev": "ev_charging_profile"}
+
+  def __init__(self, registry: FactorRegistry, store: IntensitySeriesStore, rf_uplift: float = 1.0,
+               year: Optional[int] = None):
+    self.registry = registry
+    self.store = store
+    self.year = year
+    self.calculator = CarbonCalculator(registry, rf_uplift)
+    self._month_hour: Dict[Tuple[str, int, str], np.ndarray] = {}
+
+  def _month_hour_sums(self, region: str, year: int) -> np.ndarray:
+    # (12, 24) intensity summed over the days of each month, per hour of day
+    key = (region, year, self.store.kind)
+    m = self._month_hour.get(key)
+    if m is None:
+      series = self.store.load(region, year)
+      days = len(series) // HOURS_PER_DAY
+      by_day = np.asarray(series, dtype=float).reshape(days, HOURS_PER_DAY)
+      starts = np.concatenate(([0], np.cumsum(_month_days(days))[:-1]))
+      m = self._month_hour[key] = np.add.reduceat(by_day, starts, axis=0)
+    return m
+
+  def weights(self, region: str, year: Optional[int] = None, resolution: int = 12,
+              profile=None) -> Optional[Tuple[np.ndarray, Dict[str, Any]]]:
+    # vector w such that kgCO2e = consumption @ w, for consumption at the given resolution
+    # (number of values per year); None when no series covers the region
+    found = self.store.resolve(region, year if year is not None else self.year)
+    if found is None:
+      return None
+    series_region, series_year = found
+    series = self.store.load(series_region, series_year)
+    info = {"region": series_region, "year": series_year, "kind": self.store.kind}
+    if resolution == len(series):
+      return np.asarray(series, dtype=float), info
+    if resolution in (8760, 8784):
+      # hourly consumption recorded on the other calendar than the series' year
+      return _recalendar(np.asarray(series, dtype=float), resolution), info
+    days = _month_days(len(series) // HOURS_PER_DAY)
+    shape = np.full(HOURS_PER_DAY, 1.0 / HOURS_PER_DAY) if profile is None else np.asarray(profile, dtype=float)
+    if shape.shape != (HOURS_PER_DAY,) or not np.isfinite(shape).all() or (shape < 0).any() or shape.sum() <= 0:
+      raise ValueError("A daily load profile needs 24 finite, non-negative weights with a positive sum")
+    shape = shape / shape.sum()
+    # kWh per day of month m, spread over hours by the profile, against that month's intensity
+    monthly = self._month_hour_sums(series_region, series_year) @ shape / days
+    if resolution == 12:
+      return monthly, info
+    if resolution == 1:
+      return np.array([monthly @ days / days.sum()]), info
+    raise ValueError(f"Consumption must be hourly (8760 or 8784 values), monthly (12) or a scalar, got {resolution}")
+
+  @staticmethod
+  def _vector(value) -> np.ndarray:
+    if isinstance(value, (list, tuple, np.ndarray)) or hasattr(value, "to_numpy"):
+      return np.nan_to_num(np.asarray(value, dtype=float))
+    return np.array([float(value or 0.0)])
+
+  def _rescore(self, it, consumption: np.ndarray, region: str, year: Optional[int], profile, override: float):
+    # the item's factor is rescaled through its override, so a zero annual factor (nothing to
+    # scale) keeps the annual result rather than leaving factor and kgCO2e disagreeing
+    if not it.amount > 0 or not self.registry.factor_value(it.factor_id) > 0:
+      return None
+    found = self.weights(region, year, len(consumption), profile)
+    if found is None:
+      return None
+    w, info = found
+    kg = float(consumption @ w) * (1 - override)
+    # rescale the item's factor (and its low/high band) to the consumption-weighted intensity
+    it.override = 1 - kg / (it.amount * self.registry.factor_value(it.factor_id))
+    it.kgCO2e = kg
+    return {**info, "intensity": kg / it.amount if it.amount else 0.0}
+
+  @instrumented("timeseries.calculate")
+  def calculate(self, payload: Dict[str, Any]) -> Dict[str, Any]:
+    result = self.calculator.calculate(payload)
+    region = payload.get("region", "IN")
+    year = payload.get("year")
+    override = payload.get("_grid_factor_override_pct", 0.0)
+    resolved = {}
+    for it in result["items"]:
+      if it.activity == "electricity":
+        key, consumption = "electricity", self._vector(payload.get("electricity_kWh", 0.0))
+      elif it.activity == "travel_ev":
+        key = "ev"
+        consumption = self._vector(payload.get("ev_km", 0.0)) * payload.get("ev_kwh_per_km", 0.15)
+      else:
+        continue
+      info = self._rescore(it, consumption, region, year, payload.get(self.PROFILE_KEYS[key]), override)
+      if info is not None:
+        result["breakdown"][key] = it.kgCO2e
+        resolved[key] = info
+    if resolved:
+      result["total_kgCO2e"] = sum(result["breakdown"].values())
+    result["time_resolved"] = resolved
+    return result
+
+  @instrumented("timeseries.emissions_many")
+  def emissions_many(self, consumption, region: str, year: Optional[int] = None, profile=None) -> np.ndarray:
+    # kgCO2e for a (households, 8760 | 12) consumption matrix in one region
+    consumption = np.atleast_2d(np.asarray(consumption, dtype=float))
+    found = self.weights(region, year, consumption.shape[1], profile)
+    if found is None:
+      factor = self.registry.lookup("electricity", "grid", region)["factor"]
+      return consumption.sum(axis=1) * factor
+    return consumption @ found[0]
\ No newline at end of file
@@ -1,5 +1,88 @@
-from ui import create_interface
-
-if __name__ == "__main__":
-    demo = create_interface()
-    demo.launch()
\ No newline at end of file
+import argparse
+import json
+import os
+import sys
+
+def score(args) -> int:
+    from core import ScoringService, load_default_registry
+    service = ScoringService(load_default_registry(args.factors), uncertainty=args.ci, samples=args.samples,
+                             actions=json.loads(args.actions) if args.actions else None,
+                             batch_size=args.batch_size, workers=args.workers)
+    source = sys.stdin if args.input == "-" else open(args.input)
+    out = sys.stdout if args.output == "-" else open(args.output, "w")
+    try:
+        service.run(source, out)
+    except BrokenPipeError:
+        # the reader went away (e.g. piped into head); silence the flush at interpreter exit
+        os.dup2(os.open(os.devnull, os.O_WRONLY), sys.stdout.fileno())
+        return 1
+    finally:
+        service.close()
+        if source is not sys.stdin:
+            source.close()
+        if out is not sys.stdout:
+            out.close()
+    return 0
+
+def serve(args) -> int:
+    from core import ScoringService, RegistryManager
+    from core.service import make_server
+    # with --reload, an edited factor CSV is picked up without a restart; batches in flight finish
+    # on the version they started with
+    registry = RegistryManager(args.factors, samples=args.samples, poll_interval=args.reload or None)
+    service = ScoringService(registry.current(), uncertainty=args.ci, samples=args.samples,
+                             batch_size=args.batch_size, workers=args.workers)
+    registry.subscribe(service.use_registry)
+    server = make_server(service, args.host, args.port, args.max_requests)
+    print(f"Scoring on http://{args.host}:{server.server_port}/score", file=sys.stderr)
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        registry.stop()
+        server.server_close()
+        service.close()
+    return 0
+
+def ui(args) -> int:
+    from ui import create_interface
+    demo = create_interface()
+    demo.launch()
+    return 0
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(description="Carbon footprint calculator: web UI or headless NDJSON scoring.")
+    sub = parser.add_subparsers(dest="command")
+    sub.add_parser("ui", help="launch the Gradio interface (default)")
+
+    def scoring_options(p):
+        p.add_argument("--factors", default="data/emission_factors.csv", help="emission factor CSV")
+        p.add_argument("--ci", choices=["none", "analytic", "montecarlo"], default="none",
+                       help="confidence intervals to include")
+        p.add_argument("--samples", type=int, default=500, help="Monte Carlo samples per record")
+        p.add_argument("--batch-size", type=int, default=256, help="records scored and flushed together")
+        p.add_argument("--workers", type=int, default=1, help="scoring threads")
+
+    p = sub.add_parser("score", help="score NDJSON payloads, one result line per input line")
+    p.add_argument("input", nargs="?", default="-", help="NDJSON file, or - for stdin")
+    p.add_argument("-o", "--output", default="-", help="output file, or - for stdout")
+    p.add_argument("--actions", help="scenario actions (JSON) applied to records without their own")
+    scoring_options(p)
+
+    p = sub.add_parser("serve", help="HTTP service: POST NDJSON to /score")
+    p.add_argument("--host", default="127.0.0.1")
+    p.add_argument("--port", type=int, default=8080)
+    p.add_argument("--max-requests", type=int, default=4, help="concurrent /score requests before 503")
+    p.add_argument("--reload", type=float, default=0.0, metavar="SECONDS",
+                   help="poll the factor CSV and reload it when it changes (0: never)")
+    scoring_options(p)
+
+    args = parser.parse_args(argv)
+    # GREENCHAIN_METRICS / GREENCHAIN_PROFILE_SLOW_MS apply to every subcommand, including /metrics under serve
+    from core import instrument
+    instrument.configure_from_env()
+    return {"score": score, "serve": serve}.get(args.command, ui)(args)
+
+if __name__ == "__main__":
+    sys.exit(main())
\ No newline at end of file
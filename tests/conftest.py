@@ -0,0 +1,31 @@
+import os
+import sys
+import pytest
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+from core import CarbonCalculator, ScenarioEngine, load_default_registry
+
+FACTORS = os.path.join(ROOT, "data", "emission_factors.csv")
+
+PAYLOAD = {"region": "IN", "electricity_kWh": 3600.0,
+           "fuel": {"petrol_liters": 120.0, "diesel_liters": 0.0, "lpg_liters": 40.0},
+           "car_km": 5000.0, "bus_km": 600.0, "train_km": 800.0, "ev_km": 300.0,
+           "flight_short_km": 1200.0, "flight_long_km": 0.0}
+
+@pytest.fixture(scope="session")
+def registry():
+  return load_default_registry(FACTORS, snapshot=False)
+
+@pytest.fixture(scope="session")
+def calculator(registry):
+  return CarbonCalculator(registry)
+
+@pytest.fixture(scope="session")
+def scenario_engine(registry):
+  return ScenarioEngine(registry)
+
+@pytest.fixture
+def payload():
+  return {**PAYLOAD, "fuel": dict(PAYLOAD["fuel"])}
\ No newline at end of file
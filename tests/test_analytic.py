@@ -0,0 +1,71 @@
+import math
+import numpy as np
+import pytest
+from core import AnalyticEstimator, MonteCarloEstimator
+from core.analytic import EXCESS_KURTOSIS, _erf, _normal_cdf
+
+def _item(low, center, high, amount=1.0, activity="x"):
+  return {"activity": activity, "input_kWh": amount, "kgCO2e": amount * center,
+          "meta": {"factor": center, "low": low, "high": high}}
+
+def _sample_cumulants(x):
+  d = x - x.mean()
+  m2, m3, m4 = (d**2).mean(), (d**3).mean(), (d**4).mean()
+  return x.mean(), m2, m3, m4 - 3 * m2 * m2
+
+@pytest.mark.parametrize("low,center,high", [(0.0, 0.0, 1.0), (0.3, 0.5, 0.9), (1.0, 2.0, 3.0)])
+def test_triangular_cumulants_match_samples(low, center, high):
+  x = np.random.default_rng(0).triangular(low, center, high, 2_000_000)
+  k = AnalyticEstimator.cumulants(np.ones(1), np.array([low]), np.array([center]), np.array([high]))[:, 0]
+  mean, var, third, fourth = _sample_cumulants(x)
+  assert k[0] == pytest.approx(mean, rel=1e-3)
+  assert k[1] == pytest.approx(var, rel=5e-3)
+  assert k[3] / k[1]**2 == pytest.approx(EXCESS_KURTOSIS["triangular"])
+  assert fourth / var**2 == pytest.approx(-0.6, abs=0.02)
+  if k[2]:
+    assert k[2] == pytest.approx(third, rel=0.05)
+
+def test_uniform_cumulants_match_samples():
+  x = np.random.default_rng(1).uniform(-1.0, 1.0, 2_000_000)
+  k = AnalyticEstimator.cumulants(np.ones(1), np.array([-1.0]), np.array([0.0]), np.array([1.0]), "uniform")[:, 0]
+  mean, var, _, fourth = _sample_cumulants(x)
+  assert k[1] == pytest.approx(var, rel=5e-3)
+  assert k[3] == pytest.approx(fourth, rel=0.02)
+
+def test_unknown_distribution_is_rejected():
+  with pytest.raises(ValueError):
+    AnalyticEstimator.cumulants(np.ones(1), np.zeros(1), np.ones(1), np.ones(1), "lognormal")
+
+def test_analytic_matches_monte_carlo(registry, calculator, scenario_engine, payload):
+  analytic = AnalyticEstimator(registry)
+  mc = MonteCarloEstimator(registry, seed=3)
+  actions = {"solar_share": 35, "grid_factor_reduction_pct": 20, "ev_switch_pct": 30}
+  for p in (payload, scenario_engine.apply(payload, payload["region"], actions)):
+    items = calculator.calculate(p)["items"]
+    closed, sampled = analytic.run(items), mc.run(items, samples=400_000, method="sobol")
+    assert closed["method"] == "analytic"
+    for stat in ("mean", "p05", "p95"):
+      assert closed[stat] == pytest.approx(sampled[stat], rel=2e-3), stat
+
+def test_quantiles_stay_within_support(registry):
+  # skewed to the left edge: Cornish-Fisher alone puts p05 below zero
+  result = AnalyticEstimator(registry).run([_item(0.0, 0.0, 1.0)])
+  assert 0.0 <= result["p05"] <= result["mean"] <= result["p95"] <= 1.0
+  result = AnalyticEstimator(registry).run([_item(0.0, 1.0, 1.0, amount=2.0)])
+  assert 0.0 <= result["p05"] <= result["p95"] <= 2.0
+
+def test_normal_cdf_fallback_accuracy():
+  z = np.linspace(-6, 6, 2001)
+  exact = np.array([0.5 * (1 + math.erf(v / math.sqrt(2))) for v in z])
+  assert np.abs(_normal_cdf(z) - exact).max() < 2e-7
+  assert np.abs(_erf(z) - np.array([math.erf(v) for v in z])).max() < 2e-7
+
+def test_correlated_items_fall_back_to_sampling(registry):
+  items = [_item(0.5, 1.0, 2.0, activity="a"), _item(0.5, 1.0, 2.0, activity="b")]
+  estimator = AnalyticEstimator(registry, samples=200_000)
+  independent = estimator.run(items, correlation=np.eye(2))
+  correlated = estimator.run(items, correlation=np.array([[1.0, 0.9], [0.9, 1.0]]))
+  assert independent["method"] == "analytic" and correlated["method"] == "montecarlo"
+  assert correlated["mean"] == pytest.approx(independent["mean"], rel=0.01)
+  # positive correlation widens the interval of the sum
+  assert correlated["p95"] - correlated["p05"] > independent["p95"] - independent["p05"]
\ No newline at end of file
@@ -0,0 +1,66 @@
+import threading
+import time
+import numpy as np
+import pytest
+from core import ResultCache, content_key
+
+def test_lru_eviction():
+  cache = ResultCache(maxsize=2, ttl=None)
+  cache.set("a", 1)
+  cache.set("b", 2)
+  assert cache.get("a") == 1  # "b" is now the least recently used
+  cache.set("c", 3)
+  assert cache.get("b") is None and cache.get("a") == 1 and cache.get("c") == 3
+  assert cache.stats()["evictions"] == 1 and cache.stats()["size"] == 2
+
+def test_ttl_expiry(monkeypatch):
+  now = [1000.0]
+  monkeypatch.setattr(time, "monotonic", lambda: now[0])
+  cache = ResultCache(maxsize=4, ttl=10.0)
+  cache.set("a", 1)
+  now[0] += 10.0
+  assert cache.get("a") == 1
+  now[0] += 0.5
+  assert cache.get("a", "gone") == "gone"
+  assert cache.stats() == {"hits": 1, "misses": 1, "evictions": 1, "size": 0}
+
+def test_concurrent_misses_compute_once():
+  cache = ResultCache()
+  calls = []
+  started = threading.Event()
+
+  def compute():
+    calls.append(1)
+    started.set()
+    time.sleep(0.05)
+    return {"value": 42}
+
+  results = []
+  threads = [threading.Thread(target=lambda: results.append(cache.get_or_compute("k", compute))) for _ in range(8)]
+  for t in threads:
+    t.start()
+  for t in threads:
+    t.join()
+  assert len(calls) == 1
+  assert all(r is results[0] for r in results) and results[0]["value"] == 42
+
+def test_failures_are_not_cached():
+  cache = ResultCache()
+  with pytest.raises(RuntimeError):
+    cache.get_or_compute("k", lambda: (_ for _ in ()).throw(RuntimeError("boom")))
+  assert cache.get_or_compute("k", lambda: 7) == 7
+
+def test_cached_results_are_read_only():
+  cache = ResultCache()
+  value = cache.get_or_compute("k", lambda: {"breakdown": {"car": 1.0}, "items": [{"a": 1}], "image": np.zeros(3)})
+  with pytest.raises(TypeError):
+    value["breakdown"]["car"] = 2.0
+  with pytest.raises(TypeError):
+    value["items"][0]["a"] = 2
+  with pytest.raises(ValueError):
+    value["image"][0] = 1.0
+  assert cache.get("k")["breakdown"]["car"] == 1.0
+
+def test_content_key_ignores_dict_order():
+  assert content_key({"a": 1, "b": np.float64(2.0)}) == content_key({"b": 2.0, "a": 1})
+  assert content_key({"a": np.arange(3)}) == content_key({"a": [0, 1, 2]})
\ No newline at end of file
@@ -0,0 +1,49 @@
+import pytest
+
+pytest.importorskip("matplotlib")
+
+from core import instrument
+from ui.charts import ChartRenderer
+
+BASE = {"electricity": 2500.0, "car": 900.0, "bus": 60.0}
+AFTER = {"electricity": 1500.0, "car": 700.0, "bus": 80.0}
+
+def _inside(renderer, categories):
+  tpl = renderer.template(categories)
+  fig_box = tpl.figure.bbox
+  boxes = [tpl.title.get_window_extent(), tpl.ax.yaxis.get_tightbbox()]
+  return all(b.x0 >= fig_box.x0 - 1 and b.x1 <= fig_box.x1 + 1 and b.y0 >= fig_box.y0 - 1 and b.y1 <= fig_box.y1 + 1
+             for b in boxes)
+
+def test_layout_follows_title_and_values():
+  renderer = ChartRenderer()
+  categories = tuple(sorted(BASE))
+  renderer.render(BASE, AFTER, "short")
+  big = {k: v * 1e7 for k, v in BASE.items()}
+  renderer.render(big, AFTER, "A much longer title for the combined household bill • Baseline vs Scenario " * 2)
+  assert _inside(renderer, categories)
+
+def test_render_is_recorded_as_the_plot_stage():
+  instrument.metrics.reset()
+  instrument.enable()
+  try:
+    image = ChartRenderer().render(BASE, AFTER, "title")
+  finally:
+    instrument.enable(False)
+  assert image.shape == (500, 800, 3)
+  assert 'stage="ui.plot"' in instrument.metrics.to_prometheus()
+
+def test_data_mode_is_long_format():
+  table = ChartRenderer(mode="data").render(BASE, AFTER, "title")
+  assert len(table) == 6 and set(table["series"]) == {"Baseline", "Scenario"}
+def test_plot_grouped_breakdown_returns_a_figure():
+  from matplotlib.figure import Figure
+  from ui import gradio_app
+  fig = gradio_app.plot_grouped_breakdown(BASE, AFTER, "title")
+  assert isinstance(fig, Figure)
+  (ax,) = fig.axes
+  assert [t.get_text() for t in ax.get_xticklabels()] == sorted(BASE)
+  assert [r.get_height() for r in ax.containers[0]] == [BASE[c] for c in sorted(BASE)]
+  assert ax.get_title() == "title"
+  # standalone: a second call does not hand back or redraw the first figure
+  assert gradio_app.plot_grouped_breakdown(BASE, AFTER, "other") is not fig and ax.get_title() == "title"
\ No newline at end of file
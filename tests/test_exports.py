@@ -0,0 +1,17 @@
+import subprocess
+import sys
+import pytest
+from conftest import ROOT
+
+def _run(code: str) -> str:
+  return subprocess.run([sys.executable, "-c", code], cwd=ROOT, capture_output=True, text=True, check=True).stdout.strip()
+
+@pytest.mark.parametrize("first", ["import core.benchmark", "from core import benchmark", "import core",
+                                   "from core.footprint import CarbonCalculator"])
+def test_benchmark_is_the_function_in_any_import_order(first):
+  out = _run(f"{first}\nimport core.benchmark\nfrom core import benchmark\nimport core\n"
+             "print(callable(benchmark), core.benchmark is benchmark, benchmark(1.0, region='IN'))")
+  assert out.startswith("True True ")
+
+def test_importing_core_does_not_pull_in_pandas():
+  assert _run("import sys, core\ncore.UnitConverter\nprint('pandas' in sys.modules)") == "False"
\ No newline at end of file
@@ -0,0 +1,65 @@
+import json
+import pickle
+import numpy as np
+import pandas as pd
+import pytest
+from core import CarbonCalculator, ResultItem
+
+FUELS = ("petrol_liters", "diesel_liters", "lpg_liters")
+KM = ("car_km", "bus_km", "train_km", "ev_km", "flight_short_km", "flight_long_km")
+
+def _table(n: int, seed: int) -> pd.DataFrame:
+  rng = np.random.default_rng(seed)
+  def amounts(scale):
+    # about a third of the households have none of an activity
+    return np.where(rng.random(n) < 0.35, 0.0, rng.random(n) * scale)
+  table = {"region": rng.choice(["IN", "US", "EU", "US-CA", "XX"], n), "electricity_kWh": amounts(6000)}
+  table.update({f: amounts(200) for f in FUELS})
+  table.update({k: amounts(9000) for k in KM})
+  table["ev_kwh_per_km"] = rng.choice([0.15, 0.2], n)
+  table["_grid_factor_override_pct"] = rng.choice([0.0, 0.0, 0.3, 0.55], n)
+  return pd.DataFrame(table)
+
+def _payload(row) -> dict:
+  payload = {k: row[k] for k in ("region", "electricity_kWh", "ev_kwh_per_km", "_grid_factor_override_pct") + KM}
+  payload["fuel"] = {f: row[f] for f in FUELS}
+  return payload
+
+def test_calculate_many_matches_calculate(calculator):
+  table = _table(300, seed=11)
+  batch = calculator.calculate_many(table)
+  for i, row in table.iterrows():
+    scalar = calculator.calculate(_payload(row))
+    assert batch.at[i, "total_kgCO2e"] == scalar["total_kgCO2e"]
+    for key, value in scalar["breakdown"].items():
+      assert batch.at[i, key] == pytest.approx(value, rel=1e-12, abs=0.0)
+    assert batch.at[i, "eco_score"] == pytest.approx(calculator.eco_score(scalar["total_kgCO2e"]))
+
+def test_calculate_many_missing_columns_default_to_zero(calculator):
+  table = pd.DataFrame({"region": ["US", "IN"], "car_km": [1000.0, 0.0]})
+  batch = calculator.calculate_many(table)
+  for i, row in table.iterrows():
+    assert batch.at[i, "total_kgCO2e"] == calculator.calculate({"region": row["region"], "car_km": row["car_km"]})["total_kgCO2e"]
+def test_results_compare_equal(calculator, payload):
+  assert calculator.calculate(payload) == calculator.calculate(payload)
+  changed = calculator.calculate({**payload, "car_km": payload["car_km"] + 1})
+  assert changed != calculator.calculate(payload)
+
+def test_to_dict_is_plain_and_json_ready(calculator, payload):
+  result = calculator.calculate(payload)
+  plain = CarbonCalculator.to_dict(result)
+  assert all(type(it) is dict and type(it["meta"]) is dict for it in plain["items"])
+  decoded = json.loads(json.dumps(plain))
+  assert decoded["total_kgCO2e"] == result["total_kgCO2e"]
+  assert [it["activity"] for it in decoded["items"]] == [it["activity"] for it in result["items"]]
+  plain["items"][0]["kgCO2e"] = 0.0
+  assert result["items"][0]["kgCO2e"] > 0
+
+def test_items_are_read_only_and_pickle_without_the_registry(calculator, payload):
+  item = calculator.calculate({**payload, "_grid_factor_override_pct": 0.25})["items"][0]
+  assert isinstance(item, ResultItem)
+  with pytest.raises(TypeError):
+    item["kgCO2e"] = 0.0
+  assert item.meta["factor"] == item.factor == item.registry.band(item.factor_id, item.override)[0]
+  copy = pickle.loads(pickle.dumps(item))
+  assert type(copy) is dict and copy["kgCO2e"] == item["kgCO2e"] and copy["meta"]["factor"] == item.factor
\ No newline at end of file
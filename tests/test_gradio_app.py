@@ -0,0 +1,62 @@
+import asyncio
+import os
+import time
+import pytest
+
+pytest.importorskip("matplotlib")
+
+from conftest import ROOT
+from core import instrument
+from core.instrument import SlowRequestProfiler
+
+ARGS = ("Combined (manual)", "IN", 3600, 120, 0, 0, 5000, 600, 800, 1200, 0, 0, 35, 20, 30, 15, "bus", 20)
+
+@pytest.fixture
+def app(monkeypatch):
+  monkeypatch.chdir(ROOT)
+  from ui import gradio_app
+  gradio_app.result_cache.clear()
+  return gradio_app
+
+def _drain(app):
+  async def collect():
+    return [update async for update in app.run_calculation_stream(*ARGS)]
+  return asyncio.run(collect())
+
+def test_stream_yields_estimates_then_samples_then_chart(app):
+  updates = _drain(app)
+  assert len(updates) == 3
+  (first, no_chart), (second, still_no_chart), (final, chart) = updates
+  assert no_chart is None and still_no_chart is None and chart is not None
+  assert "≈ " in first and "≈ " not in second and final == second
+  summary, _ = app.run_calculation(*ARGS)
+  assert summary == final
+
+def test_stream_records_the_handler_stage(app):
+  instrument.metrics.reset()
+  instrument.enable()
+  try:
+    _drain(app)
+    _drain(app)
+  finally:
+    instrument.enable(False)
+  histograms = instrument.metrics.histograms
+  assert histograms["ui.run_calculation"].count == 2
+  assert histograms["calculator.calculate"].count >= 2
+
+def test_stream_profile_samples_the_worker_threads(app, monkeypatch, tmp_path):
+  def slow_chart(*args):
+    time.sleep(0.05)
+    return None
+  monkeypatch.setattr(app, "cached_chart", slow_chart)
+  instrument.set_profiler(SlowRequestProfiler(threshold=0.0, interval=0.001, output_dir=str(tmp_path)))
+  try:
+    _drain(app)
+  finally:
+    instrument.set_profiler(None)
+  (dump,) = os.listdir(tmp_path)
+  assert dump.startswith("run_calculation-")
+  with open(tmp_path / dump) as f:
+    stacks = [line.rsplit(" ", 1)[0] for line in f]
+  assert any("slow_chart" in stack for stack in stacks)
+  assert all("_run_profiled" in stack for stack in stacks)
\ No newline at end of file
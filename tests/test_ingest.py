@@ -0,0 +1,28 @@
+from core import StreamingPipeline
+
+def _records(region, n, amount=100.0):
+  return [{"category": "electricity", "subcategory": "grid", "region": region, "amount": amount} for _ in range(n)]
+
+def test_runs_keep_their_own_aggregates(registry):
+  pipeline = StreamingPipeline(registry, chunk_size=10)
+  first = pipeline.run(_records("US", 25))
+  second = pipeline.run(_records("IN", 15))
+  # interleave the two generators chunk by chunk
+  a1, b1 = next(first), next(second)
+  a_last = [a1, *first][-1]
+  b_last = [b1, *second][-1]
+  assert set(a_last.aggregates) == {"US"} and a_last.aggregates["US"]["records"] == 25
+  assert set(b_last.aggregates) == {"IN"} and b_last.aggregates["IN"]["records"] == 15
+  assert set(a_last.sketches.sketches) == {"US"}
+
+  again = list(pipeline.run(_records("US", 5)))[-1]
+  assert again.aggregates["US"]["records"] == 5
+
+def test_default_region_is_configurable(registry):
+  records = [{"category": "electricity", "subcategory": "grid", "amount": 10.0},
+             {"category": "electricity", "subcategory": "grid", "region": None, "amount": 10.0}]
+  result = list(StreamingPipeline(registry, default_region="US").run(records))[-1]
+  assert set(result.aggregates) == {"US"}
+  us = registry.lookup("electricity", "grid", "US")["factor"]
+  assert result.records["kgCO2e"].tolist() == [10.0 * us, 10.0 * us]
+  assert set(list(StreamingPipeline(registry).run(records))[-1].aggregates) == {"IN"}
\ No newline at end of file
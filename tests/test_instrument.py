@@ -0,0 +1,33 @@
+import os
+import subprocess
+import sys
+import threading
+import time
+from collections import Counter
+from conftest import ROOT, FACTORS
+from core.instrument import SlowRequestProfiler
+
+def test_concurrent_slow_requests_keep_separate_profiles(tmp_path):
+  profiler = SlowRequestProfiler(threshold=0.0, interval=0.001, output_dir=str(tmp_path))
+
+  def slow():
+    with profiler.profile("request"):
+      time.sleep(0.02)
+
+  threads = [threading.Thread(target=slow) for _ in range(8)]
+  for t in threads:
+    t.start()
+  for t in threads:
+    t.join()
+  # the same name, second and duration for every request; nothing may be overwritten
+  profiler._dump("request", 0.02, Counter({"a;b": 1}), threading.get_ident())
+  profiler._dump("request", 0.02, Counter({"a;b": 1}), threading.get_ident())
+  assert len(os.listdir(tmp_path)) == 10
+
+def test_score_command_reads_metrics_env():
+  code = ("import sys, main\nfrom core import metrics\n"
+          f"main.main(['score', '--factors', {FACTORS!r}, '-o', {os.devnull!r}])\n"
+          "print('stage=\"service.batch\"' in metrics.to_prometheus())")
+  out = subprocess.run([sys.executable, "-c", code], cwd=ROOT, input='{"region": "US", "car_km": 10}\n',
+                       env={**os.environ, "GREENCHAIN_METRICS": "1"}, capture_output=True, text=True, check=True)
+  assert out.stdout.strip() == "True"
\ No newline at end of file
@@ -0,0 +1,32 @@
+import numpy as np
+import pytest
+from core import MonteCarloEstimator
+
+def test_default_sample_count(registry, calculator, payload):
+  mc = MonteCarloEstimator(registry, samples=300)
+  items = calculator.calculate(payload)["items"]
+  assert mc.run(items)["samples"] == 300
+  assert mc.run(items, samples=50)["samples"] == 50
+
+@pytest.mark.parametrize("samples", [0, -5])
+def test_non_positive_sample_count_is_rejected(registry, calculator, payload, samples):
+  mc = MonteCarloEstimator(registry)
+  items = calculator.calculate(payload)["items"]
+  with pytest.raises(ValueError):
+    mc.run(items, samples=samples)
+  with pytest.raises(ValueError):
+    mc.run_paired(items, items, samples=samples)
+
+@pytest.mark.parametrize("limits", [{"batch": 0}, {"batch": -1}, {"max_samples": 0}, {"max_samples": -10}])
+def test_adaptive_run_rejects_non_positive_limits(registry, calculator, payload, limits):
+  items = calculator.calculate(payload)["items"]
+  with pytest.raises(ValueError, match="must be positive"):
+    MonteCarloEstimator(registry).run_adaptive(items, **limits)
+
+def test_seeded_runs_repeat(registry, calculator, payload):
+  mc = MonteCarloEstimator(registry, seed=7)
+  items = calculator.calculate(payload)["items"]
+  first, second = mc.run(items), mc.run(items)
+  assert first == second
+  assert first["p05"] <= first["mean"] <= first["p95"]
+  assert np.isfinite([first["mean"], first["p05"], first["p95"]]).all()
\ No newline at end of file
@@ -0,0 +1,51 @@
+import numpy as np
+import pandas as pd
+import pytest
+from core import MonteCarloEstimator, ParallelRunner
+
+def _portfolio(n: int, seed: int = 0) -> pd.DataFrame:
+  rng = np.random.default_rng(seed)
+  return pd.DataFrame({
+    "region": rng.choice(["IN", "US", "EU", "US-CA"], n),
+    "electricity_kWh": rng.random(n) * 6000,
+    "petrol_liters": np.where(rng.random(n) < 0.5, 0.0, rng.random(n) * 200),
+    "car_km": rng.random(n) * 9000,
+    "ev_km": np.where(rng.random(n) < 0.7, 0.0, rng.random(n) * 4000),
+    "flight_long_km": np.where(rng.random(n) < 0.8, 0.0, rng.random(n) * 20000),
+  })
+
+@pytest.fixture(scope="module")
+def runners(registry):
+  # 1003 rows in shards of 97 and 10_007 samples in shards of 1_500: neither divides evenly
+  single = ParallelRunner(registry, workers=1, shard_rows=97, shard_samples=1_500)
+  pooled = ParallelRunner(registry, workers=2, shard_rows=97, shard_samples=1_500)
+  yield single, pooled
+  pooled.close()
+
+def test_calculate_many_is_independent_of_workers(runners):
+  single, pooled = runners
+  table = _portfolio(1003)
+  pd.testing.assert_frame_equal(single.calculate_many(table), pooled.calculate_many(table), check_exact=True)
+
+def test_monte_carlo_is_independent_of_workers(runners, calculator, payload):
+  single, pooled = runners
+  items = calculator.calculate(payload)["items"]
+  assert single.monte_carlo(items, 10_007, seed=5) == pooled.monte_carlo(items, 10_007, seed=5)
+
+def test_sketched_monte_carlo_is_independent_of_workers(runners, calculator, payload, monkeypatch):
+  single, pooled = runners
+  monkeypatch.setattr(MonteCarloEstimator, "exact_limit", 5_000)
+  items = calculator.calculate(payload)["items"]
+  pooled.close()  # the next pool forks with the lowered limit
+  assert single.monte_carlo(items, 10_007, seed=5) == pooled.monte_carlo(items, 10_007, seed=5)
+
+def test_portfolio_quantiles_are_independent_of_workers(runners):
+  single, pooled = runners
+  table = _portfolio(1003, seed=1)
+  a, b = single.portfolio_quantiles(table), pooled.portfolio_quantiles(table)
+  assert {c: g.summary() for c, g in a.items()} == {c: g.summary() for c, g in b.items()}
+
+@pytest.mark.parametrize("samples", [0, -1])
+def test_monte_carlo_rejects_non_positive_samples(registry, calculator, payload, samples):
+  with pytest.raises(ValueError, match="samples must be positive"):
+    ParallelRunner(registry, workers=1).monte_carlo(calculator.calculate(payload)["items"], samples=samples)
\ No newline at end of file
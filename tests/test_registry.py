@@ -0,0 +1,82 @@
+import os
+import shutil
+import subprocess
+import sys
+import numpy as np
+import pytest
+from conftest import FACTORS, ROOT
+from core import RegistryManager, ScoringService
+
+@pytest.fixture
+def factors(tmp_path):
+  path = tmp_path / "factors.csv"
+  shutil.copy(FACTORS, path)
+  return str(path)
+
+def _edit(path, old, new):
+  with open(path) as f:
+    text = f.read()
+  with open(path, "w") as f:
+    f.write(text.replace(old, new))
+  st = os.stat(path)
+  # a distinct mtime even on filesystems with coarse timestamps
+  os.utime(path, ns=(st.st_atime_ns, st.st_mtime_ns + 1_000_000_000))
+
+def test_reload_swaps_only_on_content_change(factors):
+  manager = RegistryManager(factors)
+  first = manager.current()
+  payload = {"region": "IN", "electricity_kWh": 1000.0}
+  assert first.calculator.calculate(payload)["total_kgCO2e"] == pytest.approx(708.0)
+
+  os.utime(factors)
+  assert manager.reload() is False and manager.current().version == first.version
+
+  _edit(factors, "0.708", "0.800")
+  assert manager.reload() is True
+  second = manager.current()
+  assert second.version != first.version and second.generation == first.generation + 1
+  assert second.calculator.calculate(payload)["total_kgCO2e"] == pytest.approx(800.0)
+  # a request that pinned the old version still scores against it
+  assert first.calculator.calculate(payload)["total_kgCO2e"] == pytest.approx(708.0)
+
+def test_broken_file_keeps_the_current_version(factors):
+  manager = RegistryManager(factors)
+  current = manager.current()
+  with open(factors, "w") as f:
+    f.write("not,a,factor,table\n1,2,3,4\n")
+  assert manager.reload(force=True) is False
+  assert manager.current() is current and manager.last_error
+
+def test_check_waits_for_the_file_to_settle(factors):
+  manager = RegistryManager(factors)
+  first = manager.current()
+  _edit(factors, "0.708", "0.750")
+  assert manager.check() is False and manager.current() is first
+  assert manager.check() is True and manager.current() is not first
+
+def test_service_pins_the_managers_version(factors):
+  manager = RegistryManager(factors)
+  service = ScoringService(manager.current())
+  manager.subscribe(service.use_registry)
+  assert service.version is manager.current()
+  _edit(factors, "0.708", "0.900")
+  manager.reload()
+  assert service.version is manager.current()
+  assert service.score({"region": "IN", "electricity_kWh": 10.0})["total_kgCO2e"] == pytest.approx(9.0)
+
+def test_items_read_the_precomputed_bands(registry, calculator):
+  for override in (0.0, 0.3, 0.55):
+    items = calculator.calculate({"region": "US", "electricity_kWh": 100.0, "car_km": 50.0,
+                                  "_grid_factor_override_pct": override})["items"]
+    for it in items:
+      scale = 1 - it.override if it.override else 1.0
+      assert (it.factor, it.low, it.high) == tuple(registry.value(it.factor_id, k) * scale for k in ("factor", "low", "high"))
+    bands = registry.adjusted([it.factor_id for it in items], [it.override for it in items])
+    assert np.array_equal(bands, np.array([[it.factor, it.low, it.high] for it in items]))
+
+def test_ui_polling_is_opt_in():
+  pytest.importorskip("matplotlib")
+  env = {k: v for k, v in os.environ.items() if k != "GREENCHAIN_RELOAD_SECONDS"}
+  code = "from ui import gradio_app\nprint(gradio_app.registry_manager.poll_interval)"
+  out = subprocess.run([sys.executable, "-c", code], cwd=ROOT, env=env, capture_output=True, text=True, check=True)
+  assert out.stdout.strip() == "None"
\ No newline at end of file
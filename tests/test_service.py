@@ -0,0 +1,50 @@
+import http.client
+import io
+import json
+import threading
+import pytest
+from core import ScoringService
+from core.service import _chunked_lines, _sized_lines, make_server
+
+@pytest.fixture(scope="module")
+def service(registry):
+  service = ScoringService(registry)
+  yield service
+  service.close()
+
+def _body(n_big=1):
+  # ids over 1 MiB: one line each, longer than a single capped read
+  lines = [json.dumps({"id": "x" * (3 << 19), "region": "US", "car_km": 10}) for _ in range(n_big)]
+  lines.append(json.dumps({"id": 2, "region": "IN", "electricity_kWh": 100}))
+  return ("\n".join(lines) + "\n").encode("utf-8")
+
+def test_sized_lines_keep_long_lines_whole():
+  body = _body(2)
+  lines = list(_sized_lines(io.BytesIO(body), len(body)))
+  assert len(lines) == 3 and all(json.loads(line) for line in lines)
+  # a final line without a newline is still a record
+  assert list(_sized_lines(io.BytesIO(b'{"a": 1}\n{"b": 2}'), 17)) == ['{"a": 1}\n', '{"b": 2}']
+
+def test_chunked_lines_join_across_chunks():
+  data = b'{"a": 1}\n{"b"' + b': 2}\n'
+  encoded = b"".join(b"%x\r\n%s\r\n" % (len(c), c) for c in (data[:11], data[11:])) + b"0\r\n\r\n"
+  assert list(_chunked_lines(io.BytesIO(encoded))) == ['{"a": 1}', '{"b": 2}']
+
+def test_one_output_line_per_input_line(service):
+  server = make_server(service, port=0)
+  thread = threading.Thread(target=server.serve_forever, daemon=True)
+  thread.start()
+  try:
+    conn = http.client.HTTPConnection("127.0.0.1", server.server_port, timeout=30)
+    conn.request("POST", "/score", body=_body(), headers={"Content-Type": "application/x-ndjson"})
+    out = [json.loads(line) for line in conn.getresponse().read().decode("utf-8").splitlines()]
+  finally:
+    server.shutdown()
+    server.server_close()
+  assert len(out) == 2 and not any("error" in r for r in out)
+  assert out[1]["id"] == 2 and out[0]["total_kgCO2e"] > 0
+
+def test_bad_line_yields_one_error_record(service):
+  out = service.score_batch(['{"id": 1, "car_km": 5}', "not json", '[1, 2]'])
+  records = [json.loads(line) for line in out]
+  assert "error" not in records[0] and "error" in records[1] and "error" in records[2]
\ No newline at end of file
@@ -0,0 +1,33 @@
+import pytest
+from core import WhatIfSession
+
+ACTIONS = {"solar_share": 35, "efficiency_pct": 20, "ev_switch_pct": 30, "mode_shift": {"to": "bus", "pct": 15},
+           "grid_factor_reduction_pct": 20}
+
+def _assert_matches_full(session, calculator, scenario_engine):
+  payload = session.payload
+  assert session.baseline == calculator.calculate(payload)
+  assert session.scenario == calculator.calculate(scenario_engine.apply(payload, payload.get("region", "IN"),
+                                                                         session.actions))
+  # the incremental samples are the ones a session built from scratch on the same inputs draws
+  fresh = WhatIfSession(session.registry, payload, session.actions, samples=session.samples, seed=session.seed)
+  assert session.uncertainty() == fresh.uncertainty()
+
+@pytest.mark.parametrize("fields, dirty", [
+  ({"region": "US"}, {"electricity", "ev"}),
+  ({"_grid_factor_override_pct": 0.3}, {"electricity", "ev"}),
+  ({"fuel": {"petrol_liters": 60.0, "diesel_liters": 0.0, "lpg_liters": 40.0}}, {"fuel_petrol", "fuel_diesel", "fuel_lpg"}),
+  ({"train_km": 1500.0}, {"train"}),
+])
+def test_incremental_update_matches_full_calculate(registry, calculator, scenario_engine, payload, fields, dirty):
+  session = WhatIfSession(registry, payload, ACTIONS, samples=200)
+  _assert_matches_full(session, calculator, scenario_engine)
+  session.update(**fields)
+  assert session.last_dirty["baseline"] == dirty
+  _assert_matches_full(session, calculator, scenario_engine)
+
+def test_action_change_only_touches_the_scenario(registry, calculator, scenario_engine, payload):
+  session = WhatIfSession(registry, payload, ACTIONS, samples=200)
+  session.set_action("ev_switch_pct", 60)
+  assert session.last_dirty["baseline"] == set() and session.last_dirty["scenario"]
+  _assert_matches_full(session, calculator, scenario_engine)
\ No newline at end of file
@@ -0,0 +1,82 @@
+import json
+import numpy as np
+import pytest
+from core import KLLSketch, SketchGroup
+from core.sketch import merge_all
+
+QS = np.linspace(0.01, 0.99, 99)
+
+def _rank_error(sketch, values):
+  ordered = np.sort(values)
+  estimates = sketch.quantiles(QS)
+  ranks = np.searchsorted(ordered, estimates, side="right") / len(ordered)
+  return float(np.abs(ranks - QS).max())
+
+@pytest.mark.parametrize("k", [100, 200, 400])
+def test_rank_error_is_bounded(k):
+  values = np.random.default_rng(k).lognormal(0.0, 1.0, 200_000)
+  sketch = KLLSketch(k, seed=1)
+  for chunk in np.array_split(values, 37):
+    sketch.update(chunk)
+  assert _rank_error(sketch, values) < 3.0 / k
+  # memory stays around k / (1 - c) items however long the stream
+  assert sum(len(level) for level in sketch.levels) < 4 * k
+
+def test_exact_statistics():
+  values = np.random.default_rng(2).normal(10.0, 3.0, 50_000)
+  sketch = KLLSketch(seed=3).update(values).update([np.nan])
+  assert len(sketch) == len(values)
+  assert sketch.mean == pytest.approx(values.mean())
+  assert sketch.quantile(0.0) == values.min() and sketch.quantile(1.0) == values.max()
+
+def test_merged_shards_match_one_stream():
+  values = np.random.default_rng(4).gamma(2.0, 3.0, 300_000)
+  shards = [KLLSketch(200, seed=i).update(part) for i, part in enumerate(np.array_split(values, 12))]
+  merged = merge_all(shards)
+  assert len(merged) == len(values)
+  assert merged.mean == pytest.approx(values.mean())
+  assert _rank_error(merged, values) < 3.0 / 200
+  assert len(merge_all([])) == 0 and KLLSketch().merge(KLLSketch()).n == 0
+
+def test_round_trip_through_json():
+  sketch = KLLSketch(seed=5).update(np.random.default_rng(5).random(20_000))
+  restored = KLLSketch.from_dict(json.loads(json.dumps(sketch.to_dict())))
+  assert restored.summary() == sketch.summary()
+
+def test_group_sketches_per_key_and_merges():
+  rng = np.random.default_rng(6)
+  keys = rng.choice(["IN", "US", "EU"], 60_000)
+  values = np.where(keys == "US", 10.0, 1.0) * rng.random(60_000)
+  half = len(keys) // 2
+  group = SketchGroup(seed=7).update(keys[:half], values[:half])
+  group.merge(SketchGroup(seed=8).update(keys[half:], values[half:]))
+  summary = group.summary()
+  assert set(summary) == {"IN", "US", "EU"}
+  for key in summary:
+    mask = keys == key
+    assert summary[key]["count"] == mask.sum()
+    assert _rank_error(group.sketches[key], values[mask]) < 3.0 / 200
+  restored = SketchGroup.from_dict(json.loads(json.dumps(group.to_dict())))
+  assert restored.summary() == summary
+def test_merge_all_leaves_its_inputs_alone():
+  rng = np.random.default_rng(3)
+  shards = [KLLSketch(k=64, seed=i).update(rng.normal(size=5_000)) for i in range(4)]
+  before = [json.dumps(s.to_dict()) for s in shards]
+  merged = merge_all(shards)
+  assert all(merged is not s for s in shards) and len(merged) == 20_000
+  assert [json.dumps(s.to_dict()) for s in shards] == before
+  # the same merge twice gives the same sketch, since the first input's random state was copied
+  assert merge_all(shards).to_dict() == merged.to_dict()
+
+def test_group_copy_is_independent():
+  group = SketchGroup(k=32, seed=1).update(["a", "b"] * 100, np.arange(200.0))
+  dup = group.copy().update(["a"] * 50, np.full(50, 1e6))
+  assert len(group.sketches["a"]) == 100 and len(dup.sketches["a"]) == 150
+
+def test_empty_sketch_serializes_without_infinities():
+  text = json.dumps(KLLSketch().to_dict(), allow_nan=False)
+  state = json.loads(text)
+  assert state["min"] is None and state["max"] is None
+  restored = KLLSketch.from_dict(state)
+  assert len(restored) == 0
+  assert len(restored.merge(KLLSketch().update([1.0, 2.0]))) == 2 and restored.min == 1.0 and restored.max == 2.0
\ No newline at end of file
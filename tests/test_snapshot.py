@@ -0,0 +1,49 @@
+import os
+import shutil
+import numpy as np
+from conftest import FACTORS
+from core import load_default_registry
+from core.snapshot import snapshot_path, open_snapshot, read_header
+
+def _copy(tmp_path):
+  csv = str(tmp_path / "factors.csv")
+  shutil.copy(FACTORS, csv)
+  return csv
+
+def test_snapshot_round_trip(tmp_path, registry):
+  csv = _copy(tmp_path)
+  built = load_default_registry(csv)
+  assert os.path.exists(snapshot_path(csv))
+  opened = open_snapshot(snapshot_path(csv), source=csv)
+  assert opened is not None and opened.version == built.version == registry.version
+  for name, col in registry.columns().items():
+    np.testing.assert_array_equal(opened.columns()[name], col)
+
+def test_snapshot_rebuilt_after_same_size_edit(tmp_path):
+  csv = _copy(tmp_path)
+  before = load_default_registry(csv)
+  st = os.stat(csv)
+  with open(csv, newline="") as f:
+    text = f.read()
+  # change one digit of the first factor, keeping the size and the mtime
+  header, first, rest = text.split("\n", 2)
+  fields = first.split(",")
+  col = header.split(",").index("factor")
+  digit = next(i for i, c in enumerate(fields[col]) if c in "123456789")
+  fields[col] = fields[col][:digit] + str(int(fields[col][digit]) % 9 + 1) + fields[col][digit + 1:]
+  with open(csv, "w", newline="") as f:
+    f.write("\n".join([header, ",".join(fields), rest]))
+  os.utime(csv, ns=(st.st_atime_ns, st.st_mtime_ns))
+  assert os.stat(csv).st_size == st.st_size
+
+  assert open_snapshot(snapshot_path(csv), source=csv) is None
+  after = load_default_registry(csv)
+  assert after.version != before.version
+  assert read_header(snapshot_path(csv))["version"] == after.version
+  assert open_snapshot(snapshot_path(csv), source=csv).version == after.version
+
+def test_snapshot_survives_touch(tmp_path):
+  csv = _copy(tmp_path)
+  load_default_registry(csv)
+  os.utime(csv)
+  assert open_snapshot(snapshot_path(csv), source=csv) is not None
\ No newline at end of file
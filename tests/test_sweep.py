@@ -0,0 +1,25 @@
+import itertools
+import numpy as np
+import pytest
+from core import ScenarioSweep
+
+RANGES = {"efficiency_pct": [0, 15, 40], "solar_share": [0, 50], "ev_switch_pct": [0, 30, 100],
+          "mode_shift": [0, 25, 60], "grid_factor_reduction_pct": [0, 20]}
+
+@pytest.mark.parametrize("target", ["bus", "train", "ev", "car", "flight_short", "flight_long", "bike"])
+def test_sweep_matches_apply_and_calculate(registry, calculator, scenario_engine, payload, target):
+  result = ScenarioSweep(registry).run(payload, RANGES, mode_shift_to=target)
+  assert result.total.shape == tuple(len(v) for v in RANGES.values())
+  for index in itertools.product(*(range(len(v)) for v in result.levels)):
+    actions = result.actions_at(index)
+    expected = calculator.calculate(scenario_engine.apply(payload, payload["region"], actions))
+    assert result.total[index] == pytest.approx(expected["total_kgCO2e"], rel=1e-12), actions
+    for key, value in expected["breakdown"].items():
+      assert result.breakdown[key][index] == pytest.approx(value, rel=1e-12, abs=1e-9), (key, actions)
+
+def test_cheapest_meets_target(registry, payload):
+  result = ScenarioSweep(registry).run(payload, RANGES, mode_shift_to="ev")
+  best = result.cheapest(20.0, k=3)
+  assert best and all(b["savings_pct"] >= 20.0 for b in best)
+  assert [b["cost"] for b in best] == sorted(b["cost"] for b in best)
+  assert np.all(result.savings_pct[result.total <= result.baseline_total] >= 0)
\ No newline at end of file
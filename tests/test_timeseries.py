@@ -0,0 +1,52 @@
+import numpy as np
+import pytest
+from core import IntensitySeriesStore, TimeResolvedCalculator
+
+@pytest.fixture
+def store(tmp_path):
+  store = IntensitySeriesStore(str(tmp_path))
+  store.write("IN", 2023, np.full(8760, 0.5))
+  store.write("IN", 2024, np.full(8784, 0.5))
+  return store
+
+@pytest.mark.parametrize("year", [2023, 2024])
+@pytest.mark.parametrize("hours", [8760, 8784])
+def test_constant_series_matches_flat_consumption(registry, store, year, hours):
+  calc = TimeResolvedCalculator(registry, store)
+  consumption = np.random.default_rng(hours).gamma(2.0, 0.25, hours)
+  hourly = calc.calculate({"region": "IN", "year": year, "electricity_kWh": consumption})
+  monthly = calc.calculate({"region": "IN", "year": year,
+                            "electricity_kWh": [c.sum() for c in np.array_split(consumption, 12)]})
+  flat = calc.calculate({"region": "IN", "year": year, "electricity_kWh": float(consumption.sum())})
+  for result in (hourly, monthly):
+    assert result["total_kgCO2e"] == pytest.approx(flat["total_kgCO2e"], rel=1e-12)
+    assert result["time_resolved"]["electricity"]["year"] == year
+  item = hourly["items"][0]
+  assert item.factor == pytest.approx(0.5) and item.kgCO2e == pytest.approx(item.amount * item.factor)
+
+def test_leap_day_is_dropped_or_filled(registry, store):
+  leap = np.arange(8784, dtype=float)
+  store.write("US", 2024, leap)
+  calc = TimeResolvedCalculator(registry, store)
+  w, _ = calc.weights("US", 2024, 8760)
+  np.testing.assert_array_equal(w, np.delete(leap, np.s_[59 * 24:60 * 24]))
+  store.write("US", 2023, np.delete(leap, np.s_[59 * 24:60 * 24]))
+  w, _ = calc.weights("US", 2023, 8784)
+  np.testing.assert_array_equal(w[59 * 24:60 * 24], w[58 * 24:59 * 24])
+
+@pytest.mark.parametrize("profile", [[-1.0] + [1.0] * 23, [np.nan] + [1.0] * 23, [np.inf] + [1.0] * 23,
+                                     [0.0] * 24, [1.0] * 12])
+def test_weights_reject_bad_profiles(registry, store, profile):
+  with pytest.raises(ValueError):
+    TimeResolvedCalculator(registry, store).weights("IN", 2023, 12, profile)
+
+def test_zero_annual_factor_keeps_the_annual_result(registry, store, monkeypatch):
+  calc = TimeResolvedCalculator(registry, store, year=2023)
+  monkeypatch.setattr(registry, "factor_value", lambda factor_id, override=0.0: 0.0)
+  result = calc.calculate({"region": "IN", "electricity_kWh": 100.0})
+  assert "electricity" not in result["time_resolved"]
+  assert result["items"][0].override == 0.0
+
+def test_load_reads_only_the_exact_series(store):
+  assert store.load("IN", 2024).shape == (8784,)
+  assert store.load("IN-MH", 2024) is None and store.series("IN-MH", 2024).shape == (8784,)
\ No newline at end of file
@@ -1,3 +1,8 @@
-from .gradio_app import create_interface
-
+def __getattr__(name):
+    # defer gradio_app (and with it gradio, matplotlib and the registry) until it is used
+    if name == "create_interface":
+        from .gradio_app import create_interface
+        return create_interface
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+
 __all__ = ["create_interface"]
\ No newline at end of file
@@ -0,0 +1,114 @@
+import math
+import threading
+from collections import OrderedDict
+from typing import Any, Dict, List, Optional, Tuple
+import numpy as np
+from core import ResultCache, content_key, instrumented
+
+CHART_MODES = ("image", "data")
+
+class _Template:
+    # one pre-built grouped bar chart for a fixed category set; requests only update bar heights
+    def __init__(self, categories: Tuple[str, ...], figsize: Tuple[float, float], dpi: int):
+        # the OO API on an Agg canvas: nothing is registered with pyplot, so nothing leaks
+        from matplotlib.figure import Figure
+        from matplotlib.backends.backend_agg import FigureCanvasAgg
+        self.lock = threading.Lock()
+        self.figure = Figure(figsize=figsize, dpi=dpi)
+        self.canvas = FigureCanvasAgg(self.figure)
+        self.ax = self.figure.add_subplot()
+
+        x = np.arange(len(categories))
+        width = 0.35
+        zeros = np.zeros(len(categories))
+        self.baseline = self.ax.bar(x - width/2, zeros, width, label="Baseline")
+        self.scenario = self.ax.bar(x + width/2, zeros, width, label="Scenario")
+        self.ax.set_ylabel("CO₂ Emissions (kg)")
+        self.title = self.ax.set_title(" ", wrap=True)
+        self.ax.set_xticks(x)
+        self.ax.set_xticklabels(categories, rotation=30, ha="right")
+        self.ax.legend()
+        # the title and y tick label widths decide the margins; the layout is recomputed when either changes
+        self.layout: Optional[Tuple[str, Optional[int]]] = None
+
+    def update(self, baseline_vals: List[float], after_vals: List[float], title: str):
+        # bar heights, limits, title and, when they changed, the margins; the caller holds the lock
+        for rect, v in zip(self.baseline, baseline_vals):
+            rect.set_height(v)
+        for rect, v in zip(self.scenario, after_vals):
+            rect.set_height(v)
+        top = max(baseline_vals + after_vals, default=0.0)
+        self.ax.set_ylim(0, top * 1.05 if top > 0 else 1.0)
+        self.title.set_text(title)
+        layout = (title, math.floor(math.log10(top * 1.05)) if top > 0 else None)
+        if layout != self.layout:
+            self.figure.tight_layout()
+            self.layout = layout
+
+    def render(self, baseline_vals: List[float], after_vals: List[float], title: str) -> np.ndarray:
+        with self.lock:
+            self.update(baseline_vals, after_vals, title)
+            self.canvas.draw()
+            return np.asarray(self.canvas.buffer_rgba())[..., :3].copy()
+
+class ChartRenderer:
+    # "image" mode returns an RGB array drawn from a cached per-category-set template, with images
+    # cached by content hash; "data" mode returns a long-format table for a browser-side bar plot
+    def __init__(self, mode: str = "image", max_templates: int = 16, cache_size: int = 32,
+                 figsize: Tuple[float, float] = (8, 5), dpi: int = 100):
+        if mode not in CHART_MODES:
+            raise ValueError(f"Unknown chart mode {mode!r}, expected one of {CHART_MODES}")
+        self.mode = mode
+        self.max_templates = max_templates
+        self.figsize = figsize
+        self.dpi = dpi
+        self.images = ResultCache(maxsize=cache_size, ttl=None)
+        self._templates: "OrderedDict[Tuple[str, ...], _Template]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    def template(self, categories: Tuple[str, ...]) -> _Template:
+        with self._lock:
+            tpl = self._templates.get(categories)
+            if tpl is None:
+                tpl = self._templates[categories] = _Template(categories, self.figsize, self.dpi)
+                if len(self._templates) > self.max_templates:
+                    self._templates.popitem(last=False)
+            else:
+                self._templates.move_to_end(categories)
+            return tpl
+
+    @staticmethod
+    def _series(base_breakdown: Dict[str, float], after_breakdown: Dict[str, float]):
+        categories = tuple(sorted(set(base_breakdown) | set(after_breakdown)))
+        return (categories, [float(base_breakdown.get(c, 0)) for c in categories],
+                [float(after_breakdown.get(c, 0)) for c in categories])
+
+    def image(self, base_breakdown: Dict[str, float], after_breakdown: Dict[str, float], title: str) -> np.ndarray:
+        categories, baseline_vals, after_vals = self._series(base_breakdown, after_breakdown)
+        key = content_key("chart", categories, baseline_vals, after_vals, title, self.figsize, self.dpi)
+        return self.images.get_or_compute(
+            key, lambda: self.template(categories).render(baseline_vals, after_vals, title))
+
+    def data(self, base_breakdown: Dict[str, float], after_breakdown: Dict[str, float]) -> "pd.DataFrame":
+        import pandas as pd
+        categories, baseline_vals, after_vals = self._series(base_breakdown, after_breakdown)
+        return pd.DataFrame({
+            "category": list(categories) * 2,
+            "series": ["Baseline"] * len(categories) + ["Scenario"] * len(categories),
+            "kgCO2e": baseline_vals + after_vals,
+        })
+
+    @instrumented("ui.plot")
+    def figure(self, base_breakdown: Dict[str, float], after_breakdown: Dict[str, float], title: str) -> "Figure":
+        # a standalone matplotlib Figure drawn like the images, for callers that keep editing or saving
+        # it; built fresh on each call, never cached or shared with the templates
+        categories, baseline_vals, after_vals = self._series(base_breakdown, after_breakdown)
+        tpl = _Template(categories, self.figsize, self.dpi)
+        tpl.update(baseline_vals, after_vals, title)
+        return tpl.figure
+
+    @instrumented("ui.plot")
+    def render(self, base_breakdown: Dict[str, float], after_breakdown: Dict[str, float], title: str) -> Any:
+        if self.mode == "data":
+            return self.data(base_breakdown, after_breakdown)
+        return self.image(base_breakdown, after_breakdown, title)
\ No newline at end of file
@@ -1,216 +1,333 @@
-import gradio as gr
-import matplotlib.pyplot as plt
-import numpy as np
-from typing import Dict, Any
-from core import CarbonCalculator, MonteCarloEstimator, ScenarioEngine, benchmark, load_default_registry
-
-# Init engines
-registry = load_default_registry()
-calc = CarbonCalculator(registry)
-mc = MonteCarloEstimator(registry)
-scenario_engine = ScenarioEngine(registry)
-
-# Plot helper
-def plot_grouped_breakdown(base_breakdown, after_breakdown, title="Emission Breakdown"):
-    categories = list(set(base_breakdown.keys()) | set(after_breakdown.keys()))
-    categories.sort()
-
-    baseline_vals = [base_breakdown.get(cat, 0) for cat in categories]
-    after_vals    = [after_breakdown.get(cat, 0) for cat in categories]
-
-    x = np.arange(len(categories))
-    width = 0.35
-
-    fig, ax = plt.subplots(figsize=(8, 5))
-    ax.bar(x - width/2, baseline_vals, width, label="Baseline")
-    ax.bar(x + width/2, after_vals, width, label="Scenario")
-
-    ax.set_ylabel("CO₂ Emissions (kg)")
-    ax.set_title(title)
-    ax.set_xticks(x)
-    ax.set_xticklabels(categories, rotation=30, ha="right")
-    ax.legend()
-
-    plt.tight_layout()
-    return fig
-
-# Payload builders
-def build_payload_base(region: str) -> Dict[str, Any]:
-    return {"region": region}
-
-def apply_electricity(payload: Dict[str, Any], kwh: float) -> Dict[str, Any]:
-    payload["electricity_kWh"] = max(0.0, float(kwh or 0))
-    return payload
-
-def apply_fuel(payload: Dict[str, Any], petrol_l: float, diesel_l: float, lpg_l: float) -> Dict[str, Any]:
-    payload["fuel"] = {
-        "petrol_liters": max(0.0, float(petrol_l or 0)),
-        "diesel_liters": max(0.0, float(diesel_l or 0)),
-        "lpg_liters":    max(0.0, float(lpg_l or 0)),
-    }
-    return payload
-
-def apply_travel(payload: Dict[str, Any], car_km: float, bus_km: float, train_km: float,
-                 short_km: float, long_km: float, ev_km: float) -> Dict[str, Any]:
-    payload["car_km"] = max(0.0, float(car_km or 0))
-    payload["bus_km"] = max(0.0, float(bus_km or 0))
-    payload["train_km"] = max(0.0, float(train_km or 0))
-    payload["flight_short_km"] = max(0.0, float(short_km or 0))
-    payload["flight_long_km"]  = max(0.0, float(long_km or 0))
-    payload["ev_km"] = max(0.0, float(ev_km or 0))
-    return payload
-
-# Main calculation
-def run_calculation(
-    bill_type: str,
-    region: str,
-    electricity_kwh: float,
-    petrol_l: float, diesel_l: float, lpg_l: float,
-    car_km: float, bus_km: float, train_km: float, short_km: float, long_km: float, ev_km: float,
-    solar_share: float, efficiency_pct: float, ev_switch_pct: float,
-    mode_shift_pct: float, mode_shift_to: str, grid_reduction: float
-):
-    payload = build_payload_base(region)
-
-    if bill_type == "Electricity":
-        apply_electricity(payload, electricity_kwh)
-    elif bill_type == "Fuel":
-        apply_fuel(payload, petrol_l, diesel_l, lpg_l)
-    elif bill_type == "Travel":
-        apply_travel(payload, car_km, bus_km, train_km, short_km, long_km, ev_km)
-    elif bill_type == "Combined (manual)":
-        if electricity_kwh is not None:
-            apply_electricity(payload, electricity_kwh)
-        apply_fuel(payload, petrol_l, diesel_l, lpg_l)
-        apply_travel(payload, car_km, bus_km, train_km, short_km, long_km, ev_km)
-
-    # Baseline
-    base = calc.calculate(payload)
-    mc_base = mc.run(base["items"])
-    annual = base["total_kgCO2e"]
-    score = calc.eco_score(annual)
-    per_capita_t = (annual / 1000.0) / 4
-    bench = benchmark(per_capita_t, region=region)
-
-    # Scenario
-    actions = {
-        "solar_share": solar_share,
-        "efficiency_pct": efficiency_pct,
-        "ev_switch_pct": ev_switch_pct,
-        "mode_shift": {"to": mode_shift_to, "pct": mode_shift_pct},
-        "grid_factor_reduction_pct": grid_reduction
-    }
-    scen_payload = scenario_engine.apply(payload, region, actions)
-    after = calc.calculate(scen_payload)
-    mc_after = mc.run(after["items"])
-
-    summary = f"""### Baseline Results  
-**Total**: {annual:.2f} kgCO2e/yr  
-**95% CI**: {mc_base['p05']:.2f} — {mc_base['p95']:.2f} kgCO2e  
-**EcoScore**: {score}/100  
-**Per-capita**: {per_capita_t:.2f} tCO2e → {bench}  
-
-### Scenario Results  
-**Total**: {after['total_kgCO2e']:.2f} kgCO2e/yr  
-**95% CI**: {mc_after['p05']:.2f} — {mc_after['p95']:.2f} kgCO2e  
-**Savings**: {annual - after['total_kgCO2e']:.2f} kgCO2e  
-({(100*(annual-after['total_kgCO2e'])/annual if annual>0 else 0):.1f}%)  
-"""
-
-    fig = plot_grouped_breakdown(base["breakdown"], after["breakdown"],
-                                 f"{bill_type} • Baseline vs Scenario")
-
-    return summary, fig
-
-# UI handler to toggle inputs
-def toggle_inputs(bill_type):
-    return (
-        gr.update(visible=bill_type in ["Electricity", "Combined (manual)"]), # electricity
-        gr.update(visible=bill_type in ["Fuel", "Combined (manual)"]),        # fuel
-        gr.update(visible=bill_type in ["Travel", "Combined (manual)"]),      # travel
-    )
-
-
-# Dynamic visibility helper
-def on_bill_type_change(bill_type):
-    note = ""
-    if bill_type == "Electricity":
-        note = "Tip: Scenario controls that affect electricity (solar, efficiency, grid factor) will be applied."
-        return note, gr.update(visible=True), gr.update(visible=False), gr.update(visible=False)
-    elif bill_type == "Fuel":
-        note = "Tip: Fuel emissions are direct; electricity-related scenarios won't change fuel unless you use the Combined mode."
-        return note, gr.update(visible=False), gr.update(visible=True), gr.update(visible=False)
-    elif bill_type == "Travel":
-        note = "Tip: EV switch and mode shift scenarios are most relevant here."
-        return note, gr.update(visible=False), gr.update(visible=False), gr.update(visible=True)
-    else:  # Combined
-        note = "Tip: Combined mode lets you enter any fields; all relevant scenarios will apply."
-        return note, gr.update(visible=True), gr.update(visible=True), gr.update(visible=True)
-
-# Gradio Interface
-def create_interface():
-    with gr.Blocks() as demo:
-        gr.Markdown("# 🌍 GreenChain — Modular Carbon Footprint Calculator")
-        gr.Markdown(
-            "Choose a **bill type** below. Enter only the fields relevant to that bill. The scenario controls will automatically apply only where they make sense for that bill type.")
-
-        with gr.Row():
-            bill_type = gr.Radio(["Electricity", "Fuel", "Travel", "Combined (manual)"], value="Electricity",
-                                 label="Bill Type")
-            region = gr.Dropdown(["IN", "US", "EU", "GLOBAL"], value="IN", label="Region")
-
-        guidance = gr.Markdown("", elem_id="guidance")
-
-        with gr.Group(visible=True) as electricity_group:
-            electricity_kwh = gr.Number(value=3600, label="Electricity (kWh)")
-
-        with gr.Group(visible=False) as fuel_group:
-            petrol = gr.Number(value=120, label="Petrol (liters)")
-            diesel = gr.Number(value=0, label="Diesel (liters)")
-            lpg = gr.Number(value=0, label="LPG (liters)")
-
-        with gr.Group(visible=False) as travel_group:
-            car_km = gr.Number(value=5000, label="Car travel (km)")
-            bus_km = gr.Number(value=600, label="Bus travel (km)")
-            train_km = gr.Number(value=800, label="Train travel (km)")
-            flight_short = gr.Number(value=1200, label="Flight short-haul (km)")
-            flight_long = gr.Number(value=0, label="Flight long-haul (km)")
-            ev_km = gr.Number(value=0, label="EV travel (km)")
-
-        bill_type.change(
-            fn=on_bill_type_change,
-            inputs=[bill_type],
-            outputs=[guidance, electricity_group, fuel_group, travel_group]
-        )
-
-        gr.Markdown("### Scenario Settings (auto-applied when relevant)")
-        with gr.Row():
-            solar_share = gr.Slider(0, 100, value=35, label="Solar Share (%)")
-            efficiency_pct = gr.Slider(0, 100, value=20, label="Efficiency (%)")
-            grid_reduction = gr.Slider(0, 100, value=20, label="Grid Factor Reduction (%)")
-        with gr.Row():
-            ev_switch_pct = gr.Slider(0, 100, value=30, label="EV Switch from Car (%)")
-            mode_shift_pct = gr.Slider(0, 100, value=15, label="Mode Shift from Car (%)")
-            mode_shift_to = gr.Dropdown(["bus", "train"], value="bus", label="Shift Car →")
-
-        run_btn = gr.Button("Calculate Footprint 🚀")
-        output_text = gr.Markdown()
-        out_fig = gr.Plot()
-
-        run_btn.click(
-            fn=run_calculation,
-            inputs=[
-                bill_type, region,
-                electricity_kwh,
-                petrol, diesel, lpg,
-                car_km, bus_km, train_km, flight_short, flight_long, ev_km,
-                solar_share, efficiency_pct, ev_switch_pct, mode_shift_pct, mode_shift_to, grid_reduction
-            ],
-            outputs=[output_text, out_fig]
-        )
-
-    return demo
-
-if __name__ == "__main__":
-    demo = create_interface()
-    demo.launch()
+import asyncio
+import functools
+import os
+from concurrent.futures import ThreadPoolExecutor
+from typing import Dict, Any, Optional
+from core import AnalyticEstimator, CarbonCalculator, RegistryManager, RegistryVersion, ResultCache, benchmark, content_key
+from core import instrument
+from ui.charts import ChartRenderer
+
+instrument.configure_from_env()
+
+# Init engines on first use; gradio and matplotlib are also imported only where they are needed.
+# With GREENCHAIN_RELOAD_SECONDS set, the factor CSV is polled at that interval and swapped in without
+# a restart; each handler takes one version and uses it for every step of the request
+registry_manager = RegistryManager(poll_interval=float(os.environ.get("GREENCHAIN_RELOAD_SECONDS", "0")) or None)
+
+def get_version() -> RegistryVersion:
+    return registry_manager.current()
+
+def get_engines():
+    return get_version().engines()
+
+def __getattr__(name):
+    engines = {"registry": 0, "calc": 1, "mc": 2, "scenario_engine": 3}
+    if name in engines:
+        return get_engines()[engines[name]]
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+
+def get_analytic() -> AnalyticEstimator:
+    return get_version().analytic
+
+# Results keyed on the normalized payload and registry version; a slider nudge only misses the scenario entries
+result_cache = ResultCache(maxsize=256, ttl=600.0)
+
+def cached_result(payload: Dict[str, Any], version: Optional[RegistryVersion] = None) -> Dict[str, Any]:
+    version = version or get_version()
+    key = content_key("result", payload, version.version)
+    return result_cache.get_or_compute(key, lambda: version.calculator.calculate(payload))
+
+def cached_mc(payload: Dict[str, Any], result: Dict[str, Any], version: Optional[RegistryVersion] = None) -> Dict[str, Any]:
+    version = version or get_version()
+    mc = version.mc
+    key = content_key("mc", payload, version.version, mc.samples, mc.seed)
+    return result_cache.get_or_compute(key, lambda: mc.run(result["items"]))
+
+def cached_analytic(payload: Dict[str, Any], result: Dict[str, Any], version: Optional[RegistryVersion] = None) -> Dict[str, Any]:
+    version = version or get_version()
+    analytic = version.analytic
+    key = content_key("analytic", payload, version.version, analytic.mc.samples, analytic.mc.seed)
+    return result_cache.get_or_compute(key, lambda: analytic.run(result["items"]))
+
+def cached_footprint(payload: Dict[str, Any], version: Optional[RegistryVersion] = None):
+    version = version or get_version()
+    result = cached_result(payload, version)
+    return result, cached_mc(payload, result, version)
+
+# Charts are drawn from reusable templates and cached by content, or handed to the browser as data
+# (GREENCHAIN_CHARTS=data)
+chart_renderer = ChartRenderer(mode=os.environ.get("GREENCHAIN_CHARTS", "image"))
+
+def cached_chart(base_breakdown, after_breakdown, title):
+    return chart_renderer.render(base_breakdown, after_breakdown, title)
+
+def cache_stats() -> Dict[str, int]:
+    return result_cache.stats()
+
+def metrics_text(fmt: str = "prometheus") -> str:
+    return instrument.metrics.to_json() if fmt == "json" else instrument.metrics.to_prometheus()
+
+# Plot helper, kept for existing callers: still returns a matplotlib Figure, drawn like the UI's charts
+def plot_grouped_breakdown(base_breakdown, after_breakdown, title="Emission Breakdown"):
+    return chart_renderer.figure(base_breakdown, after_breakdown, title)
+
+# Payload builders
+def build_payload_base(region: str) -> Dict[str, Any]:
+    return {"region": region}
+
+def apply_electricity(payload: Dict[str, Any], kwh: float) -> Dict[str, Any]:
+    payload["electricity_kWh"] = max(0.0, float(kwh or 0))
+    return payload
+
+def apply_fuel(payload: Dict[str, Any], petrol_l: float, diesel_l: float, lpg_l: float) -> Dict[str, Any]:
+    payload["fuel"] = {
+        "petrol_liters": max(0.0, float(petrol_l or 0)),
+        "diesel_liters": max(0.0, float(diesel_l or 0)),
+        "lpg_liters":    max(0.0, float(lpg_l or 0)),
+    }
+    return payload
+
+def apply_travel(payload: Dict[str, Any], car_km: float, bus_km: float, train_km: float,
+                 short_km: float, long_km: float, ev_km: float) -> Dict[str, Any]:
+    payload["car_km"] = max(0.0, float(car_km or 0))
+    payload["bus_km"] = max(0.0, float(bus_km or 0))
+    payload["train_km"] = max(0.0, float(train_km or 0))
+    payload["flight_short_km"] = max(0.0, float(short_km or 0))
+    payload["flight_long_km"]  = max(0.0, float(long_km or 0))
+    payload["ev_km"] = max(0.0, float(ev_km or 0))
+    return payload
+
+# Main calculation
+def build_payload(bill_type: str, region: str, electricity_kwh: float,
+                  petrol_l: float, diesel_l: float, lpg_l: float,
+                  car_km: float, bus_km: float, train_km: float, short_km: float, long_km: float, ev_km: float) -> Dict[str, Any]:
+    payload = build_payload_base(region)
+
+    if bill_type == "Electricity":
+        apply_electricity(payload, electricity_kwh)
+    elif bill_type == "Fuel":
+        apply_fuel(payload, petrol_l, diesel_l, lpg_l)
+    elif bill_type == "Travel":
+        apply_travel(payload, car_km, bus_km, train_km, short_km, long_km, ev_km)
+    elif bill_type == "Combined (manual)":
+        if electricity_kwh is not None:
+            apply_electricity(payload, electricity_kwh)
+        apply_fuel(payload, petrol_l, diesel_l, lpg_l)
+        apply_travel(payload, car_km, bus_km, train_km, short_km, long_km, ev_km)
+    return payload
+
+def build_actions(solar_share: float, efficiency_pct: float, ev_switch_pct: float,
+                  mode_shift_pct: float, mode_shift_to: str, grid_reduction: float) -> Dict[str, Any]:
+    return {
+        "solar_share": solar_share,
+        "efficiency_pct": efficiency_pct,
+        "ev_switch_pct": ev_switch_pct,
+        "mode_shift": {"to": mode_shift_to, "pct": mode_shift_pct},
+        "grid_factor_reduction_pct": grid_reduction
+    }
+
+def format_summary(region: str, base: Dict[str, Any], after: Dict[str, Any], mc_base=None, mc_after=None) -> str:
+    annual = base["total_kgCO2e"]
+    score = CarbonCalculator.eco_score(annual)
+    per_capita_t = (annual / 1000.0) / 4
+    bench = benchmark(per_capita_t, region=region)
+
+    def ci(mc):
+        if not mc:
+            return "_estimating…_"
+        approx = "≈ " if mc.get("method") == "analytic" else ""
+        return f"{approx}{mc['p05']:.2f} — {mc['p95']:.2f} kgCO2e"
+
+    return f"""### Baseline Results  
+**Total**: {annual:.2f} kgCO2e/yr  
+**95% CI**: {ci(mc_base)}  
+**EcoScore**: {score}/100  
+**Per-capita**: {per_capita_t:.2f} tCO2e → {bench}  
+
+### Scenario Results  
+**Total**: {after['total_kgCO2e']:.2f} kgCO2e/yr  
+**95% CI**: {ci(mc_after)}  
+**Savings**: {annual - after['total_kgCO2e']:.2f} kgCO2e  
+({(100*(annual-after['total_kgCO2e'])/annual if annual>0 else 0):.1f}%)  
+"""
+
+@instrument.profiled("run_calculation")
+@instrument.instrumented("ui.run_calculation")
+def run_calculation(
+    bill_type: str,
+    region: str,
+    electricity_kwh: float,
+    petrol_l: float, diesel_l: float, lpg_l: float,
+    car_km: float, bus_km: float, train_km: float, short_km: float, long_km: float, ev_km: float,
+    solar_share: float, efficiency_pct: float, ev_switch_pct: float,
+    mode_shift_pct: float, mode_shift_to: str, grid_reduction: float
+):
+    payload = build_payload(bill_type, region, electricity_kwh, petrol_l, diesel_l, lpg_l,
+                            car_km, bus_km, train_km, short_km, long_km, ev_km)
+    actions = build_actions(solar_share, efficiency_pct, ev_switch_pct, mode_shift_pct, mode_shift_to, grid_reduction)
+
+    version = get_version()
+
+    # Baseline
+    base, mc_base = cached_footprint(payload, version)
+
+    # Scenario
+    scen_payload = version.scenario.apply(payload, region, actions)
+    after, mc_after = cached_footprint(scen_payload, version)
+
+    summary = format_summary(region, base, after, mc_base, mc_after)
+    fig = cached_chart(base["breakdown"], after["breakdown"],
+                        f"{bill_type} • Baseline vs Scenario")
+
+    return summary, fig
+
+# Async handler: CPU work runs on a bounded pool (numpy releases the GIL in the Monte Carlo kernels)
+# and results stream back as they become available
+WORKERS = int(os.environ.get("GREENCHAIN_WORKERS", "4"))
+CONCURRENCY = int(os.environ.get("GREENCHAIN_CONCURRENCY", "16"))
+
+@functools.lru_cache(maxsize=1)
+def get_executor() -> ThreadPoolExecutor:
+    return ThreadPoolExecutor(max_workers=WORKERS, thread_name_prefix="greenchain")
+
+async def offload(fn, *args):
+    # carried into the worker, so the request's profile samples the thread doing the work
+    return await asyncio.get_running_loop().run_in_executor(get_executor(), instrument.carry(fn), *args)
+
+def prepare(payload: Dict[str, Any], region: str, actions: Dict[str, Any]):
+    # the first call loads the factor CSV, so taking the version happens off the event loop too
+    version = get_version()
+    return version, version.scenario.apply(payload, region, actions)
+
+@instrument.profiled("run_calculation")
+@instrument.instrumented("ui.run_calculation")
+async def run_calculation_stream(
+    bill_type: str,
+    region: str,
+    electricity_kwh: float,
+    petrol_l: float, diesel_l: float, lpg_l: float,
+    car_km: float, bus_km: float, train_km: float, short_km: float, long_km: float, ev_km: float,
+    solar_share: float, efficiency_pct: float, ev_switch_pct: float,
+    mode_shift_pct: float, mode_shift_to: str, grid_reduction: float
+):
+    payload = build_payload(bill_type, region, electricity_kwh, petrol_l, diesel_l, lpg_l,
+                            car_km, bus_km, train_km, short_km, long_km, ev_km)
+    actions = build_actions(solar_share, efficiency_pct, ev_switch_pct, mode_shift_pct, mode_shift_to, grid_reduction)
+    version, scen_payload = await offload(prepare, payload, region, actions)
+
+    # 1. deterministic totals and breakdown, with closed-form intervals until sampling finishes
+    base, after = await asyncio.gather(offload(cached_result, payload, version),
+                                       offload(cached_result, scen_payload, version))
+    ci_base, ci_after = await asyncio.gather(offload(cached_analytic, payload, base, version),
+                                             offload(cached_analytic, scen_payload, after, version))
+    yield format_summary(region, base, after, ci_base, ci_after), None
+
+    # 2. Monte Carlo confidence intervals
+    mc_base, mc_after = await asyncio.gather(offload(cached_mc, payload, base, version),
+                                             offload(cached_mc, scen_payload, after, version))
+    summary = format_summary(region, base, after, mc_base, mc_after)
+    yield summary, None
+
+    # 3. chart
+    fig = await offload(cached_chart, base["breakdown"], after["breakdown"], f"{bill_type} • Baseline vs Scenario")
+    yield summary, fig
+
+# UI handler to toggle inputs
+def toggle_inputs(bill_type):
+    import gradio as gr
+    return (
+        gr.update(visible=bill_type in ["Electricity", "Combined (manual)"]), # electricity
+        gr.update(visible=bill_type in ["Fuel", "Combined (manual)"]),        # fuel
+        gr.update(visible=bill_type in ["Travel", "Combined (manual)"]),      # travel
+    )
+
+
+# Dynamic visibility helper
+def on_bill_type_change(bill_type):
+    import gradio as gr
+    note = ""
+    if bill_type == "Electricity":
+        note = "Tip: Scenario controls that affect electricity (solar, efficiency, grid factor) will be applied."
+        return note, gr.update(visible=True), gr.update(visible=False), gr.update(visible=False)
+    elif bill_type == "Fuel":
+        note = "Tip: Fuel emissions are direct; electricity-related scenarios won't change fuel unless you use the Combined mode."
+        return note, gr.update(visible=False), gr.update(visible=True), gr.update(visible=False)
+    elif bill_type == "Travel":
+        note = "Tip: EV switch and mode shift scenarios are most relevant here."
+        return note, gr.update(visible=False), gr.update(visible=False), gr.update(visible=True)
+    else:  # Combined
+        note = "Tip: Combined mode lets you enter any fields; all relevant scenarios will apply."
+        return note, gr.update(visible=True), gr.update(visible=True), gr.update(visible=True)
+
+# Gradio Interface
+def create_interface():
+    import gradio as gr
+    with gr.Blocks() as demo:
+        gr.Markdown("# 🌍 GreenChain — Modular Carbon Footprint Calculator")
+        gr.Markdown(
+            "Choose a **bill type** below. Enter only the fields relevant to that bill. The scenario controls will automatically apply only where they make sense for that bill type.")
+
+        with gr.Row():
+            bill_type = gr.Radio(["Electricity", "Fuel", "Travel", "Combined (manual)"], value="Electricity",
+                                 label="Bill Type")
+            region = gr.Dropdown(["IN", "US", "EU", "GLOBAL"], value="IN", label="Region")
+
+        guidance = gr.Markdown("", elem_id="guidance")
+
+        with gr.Group(visible=True) as electricity_group:
+            electricity_kwh = gr.Number(value=3600, label="Electricity (kWh)")
+
+        with gr.Group(visible=False) as fuel_group:
+            petrol = gr.Number(value=120, label="Petrol (liters)")
+            diesel = gr.Number(value=0, label="Diesel (liters)")
+            lpg = gr.Number(value=0, label="LPG (liters)")
+
+        with gr.Group(visible=False) as travel_group:
+            car_km = gr.Number(value=5000, label="Car travel (km)")
+            bus_km = gr.Number(value=600, label="Bus travel (km)")
+            train_km = gr.Number(value=800, label="Train travel (km)")
+            flight_short = gr.Number(value=1200, label="Flight short-haul (km)")
+            flight_long = gr.Number(value=0, label="Flight long-haul (km)")
+            ev_km = gr.Number(value=0, label="EV travel (km)")
+
+        bill_type.change(
+            fn=on_bill_type_change,
+            inputs=[bill_type],
+            outputs=[guidance, electricity_group, fuel_group, travel_group]
+        )
+
+        gr.Markdown("### Scenario Settings (auto-applied when relevant)")
+        with gr.Row():
+            solar_share = gr.Slider(0, 100, value=35, label="Solar Share (%)")
+            efficiency_pct = gr.Slider(0, 100, value=20, label="Efficiency (%)")
+            grid_reduction = gr.Slider(0, 100, value=20, label="Grid Factor Reduction (%)")
+        with gr.Row():
+            ev_switch_pct = gr.Slider(0, 100, value=30, label="EV Switch from Car (%)")
+            mode_shift_pct = gr.Slider(0, 100, value=15, label="Mode Shift from Car (%)")
+            mode_shift_to = gr.Dropdown(["bus", "train"], value="bus", label="Shift Car →")
+
+        run_btn = gr.Button("Calculate Footprint 🚀")
+        output_text = gr.Markdown()
+        if chart_renderer.mode == "data":
+            out_fig = gr.BarPlot(x="category", y="kgCO2e", color="series", show_label=False)
+        else:
+            out_fig = gr.Image(type="numpy", show_label=False)
+
+        run_btn.click(
+            fn=run_calculation_stream,
+            inputs=[
+                bill_type, region,
+                electricity_kwh,
+                petrol, diesel, lpg,
+                car_km, bus_km, train_km, flight_short, flight_long, ev_km,
+                solar_share, efficiency_pct, ev_switch_pct, mode_shift_pct, mode_shift_to, grid_reduction
+            ],
+            outputs=[output_text, out_fig],
+            concurrency_limit=CONCURRENCY
+        )
+
+    return demo
+
+if __name__ == "__main__":
+    demo = create_interface()
+    demo.launch()